@@ -2,19 +2,62 @@
 """
 API 域名网络诊断工具
 测试 api.z.ai:443 在不同网络环境下的连接性能
+
+用法:
+    python api_domain_diagnostic.py                      # 诊断 api.z.ai:443
+    python api_domain_diagnostic.py example.com --samples 200
+    python api_domain_diagnostic.py localhost --port 8443 --resolve 127.0.0.1 --insecure
+    python api_domain_diagnostic.py --watch 30 --samples 5 --html api_trend.html  # 持续监测
+    python api_domain_diagnostic.py api.z.ai api.openai.com:443 --sort tcp         # 批量诊断
+    python api_domain_diagnostic.py --targets-file endpoints.txt --parallel 16
 """
 
-import subprocess
-import socket
-import time
+import argparse
+import asyncio
+import csv
+import ipaddress
 import json
+import time
+import unicodedata
 from datetime import datetime
 from typing import Dict, List, Tuple
 
+from connection_timing import (
+    DEFAULT_CONCURRENCY, DEFAULT_SAMPLES, PHASES, format_breakdown, make_ssl_context, sample_ips,
+    time_requests
+)
+from dns_client import DEFAULT_SAMPLES as DEFAULT_DNS_SAMPLES
+from dns_client import (
+    DNSError, default_resolvers, fastest_resolver, parse_server, query, sample_resolvers
+)
+from latency_monitor import Monitor, add_watch_arguments, measurement
+from latency_stats import format_histogram
+from probe_scheduler import ProbeScheduler, SharedLookups, run_command
+
 class APIDomainDiagnostics:
-    def __init__(self, domain: str, port: int = 443):
+    def __init__(self, domain: str, port: int = 443, dns_servers: Dict[str, str] = None,
+                 dns_samples: int = DEFAULT_DNS_SAMPLES, samples: int = DEFAULT_SAMPLES,
+                 concurrency: int = DEFAULT_CONCURRENCY, path: str = '/', tls: bool = True,
+                 insecure: bool = False, ips: List[str] = None, shared: SharedLookups = None,
+                 verbose: bool = True):
         self.domain = domain
         self.port = port
+        # DNS 服务器：名称 -> host[:port]
+        self.dns_servers = dns_servers or default_resolvers()
+        self.dns_samples = dns_samples
+        # 连接耗时采样：每个 IP 的次数与并发数、请求路径
+        self.samples = samples
+        self.concurrency = concurrency
+        self.path = path
+        self.ssl_context = make_ssl_context(insecure) if tls else None
+        # 指定时跳过 DNS 解析，直接测试这些 IP（类似 curl --resolve）
+        self.ips = ips
+        # --watch 模式下最近一次解析到的 IP，某一轮解析失败时继续测试这些 IP
+        self._watch_ips = []
+        # DNS 解析、whois、ping 与路由追踪的结果按域名/IP 共享（批量诊断时多个目标共用）
+        self.shared = shared or SharedLookups()
+        # 批量诊断时不逐步打印
+        self.verbose = verbose
         self.results = {
             'domain': domain,
             'port': port,
@@ -22,125 +65,102 @@ class APIDomainDiagnostics:
             'tests': {}
         }
 
-    def run_command(self, command: str) -> Tuple[str, str, int]:
-        """执行 shell 命令"""
-        try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            return result.stdout.strip(), result.stderr.strip(), result.returncode
-        except subprocess.TimeoutExpired:
-            return "", "命令超时", -1
-        except Exception as e:
-            return "", str(e), -1
-
-    def resolve_dns(self) -> Dict:
-        """DNS 解析测试"""
-        print(f"🔍 解析 {self.domain} 的 DNS...")
-
-        dns_servers = {
-            '系统默认': None,
-            '阿里DNS': '223.5.5.5',
-            '腾讯DNS': '119.29.29.29',
-            'Cloudflare': '1.1.1.1',
-            'Google': '8.8.8.8'
-        }
-
-        results = {}
-
-        for name, server in dns_servers.items():
-            try:
-                start = time.time()
-                if server:
-                    # 使用指定 DNS 服务器
-                    cmd = f"nslookup {self.domain} {server}"
-                else:
-                    cmd = f"nslookup {self.domain}"
-
-                stdout, _, _ = self.run_command(cmd)
-                elapsed = (time.time() - start) * 1000
-
-                # 解析 IP 地址
-                ip = None
-                for line in stdout.split('\n'):
-                    if 'Address:' in line and '##' not in line and '#' not in line.split('Address:')[1]:
-                        ip = line.split('Address:')[1].strip()
-                        break
-                    elif 'Addresses:' in line:
-                        addrs = line.split('Addresses:')[1].strip().split()
-                        if addrs:
-                            ip = addrs[0]
-                            break
-
-                results[name] = {
-                    'ip': ip,
-                    'resolve_time_ms': round(elapsed, 2),
-                    'server': server or '系统默认'
-                }
-            except Exception as e:
-                results[name] = {'error': str(e)}
-
-        # 找出最快的 DNS 和所有解析的 IP
-        valid_results = {k: v for k, v in results.items() if 'ip' in v and v['ip']}
-        ips = list(set([r['ip'] for r in valid_results.values()]))
+    def log(self, message: str = ''):
+        if self.verbose:
+            print(message)
+
+    async def resolve_dns(self) -> Dict:
+        """DNS 解析测试：直接向各服务器查询 A/AAAA 记录（并发），每个服务器采样多次"""
+        self.log(f"🔍 解析 {self.domain} 的 DNS...")
+
+        results = await sample_resolvers(
+            self.dns_servers, self.domain, ('A', 'AAAA'), self.dns_samples
+        )
+        for result in results.values():
+            ipv4 = result['answers']['A']
+            result['ip'] = ipv4[0] if ipv4 else None
+            result['resolve_time_ms'] = result.get('p50_ms')
+
+        # 最快服务器的应答排在前面，其余服务器返回的不同地址依次追加
+        fastest = fastest_resolver(results)
+        ordered = sorted(results, key=lambda name: name != fastest)
+        ips, ipv6 = [], []
+        for name in ordered:
+            answers = results[name]['answers']
+            ips.extend(ip for ip in answers['A'] if ip not in ips)
+            ipv6.extend(ip for ip in answers['AAAA'] if ip not in ipv6)
 
         return {
-            'status': 'OK' if valid_results else 'ERROR',
+            'status': 'OK' if ips else 'ERROR',
             'results': results,
             'resolved_ips': ips,
-            'fastest_dns': min(valid_results.items(), key=lambda x: x[1]['resolve_time_ms'])[0] if valid_results else None
+            'resolved_ipv6': ipv6,
+            # 不同服务器返回的地址集合不同，通常意味着 GeoDNS 或 CDN 调度
+            'consistent_answers': len({tuple(r['answers']['A']) for r in results.values() if r['answers']['A']}) <= 1,
+            'fastest_dns': fastest
         }
 
-    def test_tcp_connect(self, ip: str) -> Dict:
-        """测试 TCP 连接延迟"""
-        latencies = []
-        success_count = 0
+    async def test_connection_timing(self, ips: List[str]) -> Dict:
+        """同时对所有解析到的 IP 采样，分解 TCP 连接、TLS 握手、首字节与传输耗时"""
+        targets = await sample_ips(
+            ips, self.port, self.domain, self.samples, self.concurrency,
+            self.path, self.ssl_context
+        )
 
-        for i in range(10):
-            try:
-                start = time.time()
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(5)
-                sock.connect((ip, self.port))
-                sock.close()
-                elapsed = (time.time() - start) * 1000
-                latencies.append(elapsed)
-                success_count += 1
-            except socket.timeout:
-                latencies.append(5000)
-            except Exception as e:
-                latencies.append(5000)
-
-        latencies.sort()
-        successful = [l for l in latencies if l < 5000]
-
-        if not successful:
-            return {'status': 'ERROR', 'message': '无法连接'}
+        reachable = {ip: r for ip, r in targets.items() if r['succeeded']}
+        if not reachable:
+            return {'status': 'ERROR', 'message': '无法连接', 'targets': targets}
 
+        # TCP 连接 p50 最低的 IP 作为主要结果
+        fastest_ip = min(reachable, key=lambda ip: reachable[ip]['phases']['tcp_connect']['p50_ms'])
         return {
             'status': 'OK',
-            'success_rate': f"{success_count}/10",
-            'min_ms': round(successful[0], 2),
-            'avg_ms': round(sum(successful) / len(successful), 2),
-            'max_ms': round(successful[-1], 2),
-            'jitter_ms': round(statistics_std(successful) if len(successful) > 1 else 0, 2)
+            'samples_per_ip': self.samples,
+            'fastest_ip': fastest_ip,
+            'tcp_connect': reachable[fastest_ip]['phases']['tcp_connect'],
+            'targets': targets
         }
 
-    def trace_route(self, target: str) -> Dict:
+    async def watch_sample(self) -> List[Tuple]:
+        """--watch 模式的一轮采样：向第一个 DNS 服务器解析一次，再对每个 IP 请求 samples 次"""
+        measurements = []
+        ips = self.ips
+        if not ips:
+            server, port = parse_server(next(iter(self.dns_servers.values())))
+            try:
+                response = await query(server, self.domain, 'A', port)
+                measurements.append(measurement('dns', response['elapsed_ms']))
+                ips = [value for rtype, value, _ in response['answers'] if rtype == 'A']
+            except DNSError:
+                measurements.append(measurement('dns', None))
+            ips = ips or self._watch_ips
+            self._watch_ips = ips
+
+        results = await asyncio.gather(*(
+            time_requests(ip, self.port, self.domain, self.samples, self.concurrency,
+                          self.path, self.ssl_context)
+            for ip in ips
+        ))
+        for ip, samples in zip(ips, results):
+            for sample in samples:
+                if 'error' in sample:
+                    measurements.append(measurement(f'{ip} total', None))
+                    continue
+                measurements.extend(
+                    measurement(f'{ip} {phase}', sample[phase])
+                    for phase in PHASES if phase in sample
+                )
+        return measurements
+
+    async def trace_route(self, target: str) -> Dict:
         """路由追踪"""
-        print(f"🔍 追踪到 {target} 的路由路径...")
+        self.log(f"🔍 追踪到 {target} 的路由路径...")
 
-        cmd = f"traceroute -n -m 15 -q 1 {target}"
-        stdout, stderr, _ = self.run_command(cmd)
+        stdout, stderr, _ = await run_command(['traceroute', '-n', '-m', '15', '-q', '1', target])
 
-        if stderr and "Command not found" in stderr:
+        if stderr.startswith('未找到命令'):
             # macOS 使用 traceroute，Linux 可能需要
-            cmd = f"tracepath -n {target}"
-            stdout, stderr, _ = self.run_command(cmd)
+            stdout, stderr, _ = await run_command(['tracepath', '-n', target])
 
         hops = []
         for line in stdout.split('\n'):
@@ -170,10 +190,9 @@ class APIDomainDiagnostics:
             'first_hops': hops[:5]
         }
 
-    def ping_test(self, target: str) -> Dict:
+    async def ping_test(self, target: str) -> Dict:
         """Ping 测试"""
-        cmd = f"ping -c 20 -i 0.2 {target}"
-        stdout, stderr, _ = self.run_command(cmd)
+        stdout, stderr, _ = await run_command(['ping', '-c', '20', '-i', '0.2', target])
 
         if not stdout:
             return {'status': 'ERROR', 'message': 'Ping 无响应'}
@@ -205,11 +224,10 @@ class APIDomainDiagnostics:
             'packet_loss': packet_loss
         }
 
-    def check_server_location(self, ip: str) -> Dict:
+    async def check_server_location(self, ip: str) -> Dict:
         """推断服务器位置"""
-        # 使用 whois 查询 IP 归属地
-        cmd = f"whois {ip} | grep -i 'country\\|netname'"
-        stdout, _, _ = self.run_command(cmd)
+        # 使用 whois 查询 IP 归属地（只看 country 与 netname 行）
+        stdout, _, _ = await run_command(['whois', ip])
 
         country = '未知'
         isp = '未知'
@@ -231,75 +249,95 @@ class APIDomainDiagnostics:
             'isp': isp
         }
 
-    def run_diagnostics(self) -> Dict:
-        """运行完整诊断"""
-        print("=" * 60)
-        print(f"🚀 开始诊断 {self.domain}:{self.port}")
-        print("=" * 60)
-        print()
-
-        # 1. DNS 解析
-        dns_result = self.resolve_dns()
+    async def run_diagnostics_async(self) -> Dict:
+        """运行完整诊断：解析后，位置、连接耗时、Ping 与路由追踪并发进行"""
+        self.log("=" * 60)
+        self.log(f"🚀 开始诊断 {format_target(self.domain, self.port)}")
+        self.log("=" * 60)
+        self.log()
+
+        # 1. DNS 解析（目标本身是 IP 时不解析）
+        if not self.ips and is_ip_address(self.domain):
+            self.ips = [self.domain]
+        if self.ips:
+            dns_result = {'status': 'OK', 'resolved_ips': self.ips, 'fastest_dns': '指定 IP，未解析'}
+        else:
+            dns_result = await self.shared.get(('dns', self.domain), self.resolve_dns)
         self.results['tests']['dns'] = dns_result
 
         if dns_result['status'] != 'OK' or not dns_result['resolved_ips']:
-            print("❌ DNS 解析失败，无法继续")
+            self.log("❌ DNS 解析失败，无法继续")
             return self.results
 
-        primary_ip = dns_result['resolved_ips'][0]
-        print(f"✅ DNS 解析成功: {primary_ip}")
-        print(f"   最快 DNS: {dns_result['fastest_dns']}")
-        print()
+        resolved_ips = dns_result['resolved_ips']
+        primary_ip = resolved_ips[0]
+        self.log(f"✅ DNS 解析成功: {', '.join(resolved_ips)}")
+        self.log(f"   最快 DNS: {dns_result['fastest_dns']}")
+        self.log()
+
+        self.log(f"🔍 推断服务器位置、测试连接耗时（{len(resolved_ips)} 个 IP，各 {self.samples} 次）、Ping 与追踪路由...")
+        location, timing_result, ping_result, route_result = await asyncio.gather(
+            self.shared.get(('whois', primary_ip), lambda: self.check_server_location(primary_ip)),
+            self.test_connection_timing(resolved_ips),
+            self.shared.get(('ping', primary_ip), lambda: self.ping_test(primary_ip)),
+            self.shared.get(('traceroute', primary_ip), lambda: self.trace_route(primary_ip))
+        )
+        self.log()
 
         # 2. 服务器位置推断
-        print("🔍 推断服务器位置...")
-        location = self.check_server_location(primary_ip)
         self.results['tests']['server_location'] = location
-        print(f"   IP: {location['ip']}")
-        print(f"   国家/地区: {location['country']}")
-        print(f"   ISP: {location['isp']}")
-        print()
-
-        # 3. TCP 连接测试
-        print("🔍 测试 TCP 连接延迟...")
-        tcp_result = self.test_tcp_connect(primary_ip)
-        self.results['tests']['tcp_connection'] = tcp_result
-        if tcp_result['status'] == 'OK':
-            print(f"   平均延迟: {tcp_result['avg_ms']}ms")
-            print(f"   最小延迟: {tcp_result['min_ms']}ms")
-            print(f"   成功率: {tcp_result['success_rate']}")
-        print()
+        self.log("📍 服务器位置:")
+        self.log(f"   IP: {location['ip']}")
+        self.log(f"   国家/地区: {location['country']}")
+        self.log(f"   ISP: {location['isp']}")
+        self.log()
+
+        # 3. 连接耗时分解（所有 IP 同时采样）
+        self.results['tests']['connection_timing'] = timing_result
+        self.log("⏱️ 连接耗时:")
+        if timing_result['status'] == 'OK':
+            fastest = timing_result['targets'][timing_result['fastest_ip']]
+            self.log(f"   最快 IP: {timing_result['fastest_ip']}")
+            self.log(f"   TCP 连接 p50/p95: {timing_result['tcp_connect']['p50_ms']}ms / {timing_result['tcp_connect']['p95_ms']}ms")
+            self.log(f"   成功率: {fastest['success_rate']}")
+        else:
+            self.log(f"   ❌ {timing_result['message']}")
+        self.log()
 
         # 4. Ping 测试
-        print("🔍 执行 Ping 测试...")
-        ping_result = self.ping_test(primary_ip)
         self.results['tests']['ping'] = ping_result
+        self.log("📶 Ping:")
         if ping_result['status'] == 'OK':
-            print(f"   平均延迟: {ping_result['avg_latency_ms']}ms")
-            print(f"   丢包率: {ping_result['packet_loss']}")
-        print()
+            self.log(f"   平均延迟: {ping_result['avg_latency_ms']}ms")
+            self.log(f"   丢包率: {ping_result['packet_loss']}")
+        else:
+            self.log(f"   ❌ {ping_result['message']}")
+        self.log()
 
         # 5. 路由追踪
-        print("🔍 追踪路由路径...")
-        route_result = self.trace_route(primary_ip)
         self.results['tests']['route_trace'] = route_result
-        print(f"   跳数: {route_result['hops_count']}")
-        print(f"   网络类型: {', '.join(route_result['network_type'])}")
-        print()
+        self.log("🛣️ 路由:")
+        self.log(f"   跳数: {route_result['hops_count']}")
+        self.log(f"   网络类型: {', '.join(route_result['network_type'])}")
+        self.log()
 
         # 6. 生成建议
         self.results['recommendation'] = self._generate_recommendation()
 
         return self.results
 
+    def run_diagnostics(self) -> Dict:
+        """运行完整诊断"""
+        return asyncio.run(self.run_diagnostics_async())
+
     def _generate_recommendation(self) -> Dict:
         """生成连接建议"""
-        tcp = self.results['tests'].get('tcp_connection', {})
+        tcp = self.results['tests'].get('connection_timing', {}).get('tcp_connect', {})
         ping = self.results['tests'].get('ping', {})
         route = self.results['tests'].get('route_trace', {})
         location = self.results['tests'].get('server_location', {})
 
-        latency = tcp.get('avg_ms') or ping.get('avg_latency_ms')
+        latency = tcp.get('p50_ms') or ping.get('avg_latency_ms')
         packet_loss = ping.get('packet_loss', '0%').replace('%', '')
         network_types = route.get('network_type', [])
         server_country = location.get('country', '未知')
@@ -358,12 +396,13 @@ class APIDomainDiagnostics:
         print()
 
         # 核心结果
-        tcp = self.results['tests'].get('tcp_connection', {})
+        timing = self.results['tests'].get('connection_timing', {})
+        tcp = timing.get('tcp_connect', {})
         ping = self.results['tests'].get('ping', {})
         location = self.results['tests'].get('server_location', {})
         rec = self.results.get('recommendation', {})
 
-        latency = tcp.get('avg_ms') or ping.get('avg_latency_ms')
+        latency = tcp.get('p50_ms') or ping.get('avg_latency_ms')
 
         print(f"🌐 服务器信息:")
         print(f"   IP: {location.get('ip', 'N/A')}")
@@ -372,10 +411,24 @@ class APIDomainDiagnostics:
         print()
 
         print(f"📈 连接性能:")
-        print(f"   平均延迟: {latency}ms" if latency else "   平均延迟: N/A")
+        print(f"   TCP 连接延迟 (p50): {latency}ms" if latency else "   TCP 连接延迟 (p50): N/A")
         print(f"   丢包率: {ping.get('packet_loss', 'N/A')}")
         print()
 
+        if timing.get('targets'):
+            dns = self.results['tests'].get('dns', {})
+            dns_ms = dns.get('results', {}).get(dns.get('fastest_dns'))
+            print(f"⏱️ 连接阶段耗时 (ms):")
+            for line in format_breakdown(timing['targets'], dns_ms):
+                print(f"   {line}")
+            for ip, result in timing['targets'].items():
+                if result['succeeded']:
+                    print()
+                    print(f"   {ip} 总耗时分布:")
+                    for line in format_histogram(result['histograms']['total']):
+                        print(f"     {line}")
+            print()
+
         print(f"💡 连接建议:")
         print(f"   推荐方式: {rec.get('connection_method', 'N/A')}")
         print(f"   延迟评级: {rec.get('latency_level', 'N/A')}")
@@ -395,22 +448,331 @@ class APIDomainDiagnostics:
             print(json.dumps(result, indent=2, ensure_ascii=False))
 
 
-def statistics_std(data: List[float]) -> float:
-    """计算标准差"""
-    if len(data) < 2:
-        return 0
-    mean = sum(data) / len(data)
-    variance = sum((x - mean) ** 2 for x in data) / (len(data) - 1)
-    return variance ** 0.5
+# 批量诊断：单个目标的超时与全部目标的默认截止时间（秒）
+BATCH_TARGET_TIMEOUT = 180
+BATCH_DEADLINE = 900
+DEFAULT_PARALLEL = 8
+
+# 汇总表可排序的列：--sort 名称 -> (列, 标题)
+BATCH_COLUMNS = {
+    'total': ('total_p50_ms', '总耗时p50'),
+    'p95': ('total_p95_ms', '总耗时p95'),
+    'tcp': ('tcp_p50_ms', 'TCP'),
+    'tls': ('tls_p50_ms', 'TLS'),
+    'ttfb': ('ttfb_p50_ms', 'TTFB'),
+    'dns': ('dns_p50_ms', 'DNS'),
+    'ping': ('ping_ms', 'Ping'),
+    'loss': ('packet_loss_pct', '丢包%'),
+    'target': ('target', '目标')
+}
+
+
+def is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def format_target(host: str, port: int) -> str:
+    return f'[{host}]:{port}' if ':' in host else f'{host}:{port}'
+
+
+def parse_target(value: str, default_port: int = 443) -> Tuple[str, int]:
+    """解析 host、host:port 或 [IPv6]:port"""
+    value = value.strip()
+    if value.startswith('['):
+        host, _, port = value[1:].partition(']')
+        return host, int(port.lstrip(':')) if port.strip(':') else default_port
+    if value.count(':') == 1:
+        host, port = value.split(':')
+        return host, int(port)
+    return value, default_port
+
+
+def load_targets(values: List[str], targets_file: str = None, default_port: int = 443) -> List[Tuple[str, int]]:
+    """命令行与文件（每行一个，# 开头为注释）中的目标，去重后保持顺序"""
+    lines = list(values)
+    if targets_file:
+        with open(targets_file, 'r', encoding='utf-8') as f:
+            lines.extend(line.split('#', 1)[0] for line in f)
+    targets = []
+    for line in lines:
+        if line.strip():
+            target = parse_target(line, default_port)
+            if target not in targets:
+                targets.append(target)
+    return targets
+
+
+class BatchDiagnostics:
+    """批量诊断多个 host:port 目标
+
+    所有目标经同一个 ProbeScheduler 执行（同时进行的目标数有上限），并共用一个 SharedLookups：
+    同一域名只解析一次，同一 IP 的 whois、ping 与路由追踪只执行一次。
+    """
+
+    def __init__(self, targets: List[Tuple[str, int]], parallel: int = DEFAULT_PARALLEL,
+                 deadline: float = BATCH_DEADLINE, **options):
+        self.targets = targets
+        self.parallel = parallel
+        self.deadline = deadline
+        self.options = options
+        self.shared = SharedLookups()
+        self.results = {}
+        self.rows = []
+
+    async def _diagnose(self, domain: str, port: int) -> Dict:
+        diagnostics = APIDomainDiagnostics(domain, port, shared=self.shared, verbose=False, **self.options)
+        results = await diagnostics.run_diagnostics_async()
+        row = summarize_target(format_target(domain, port), results)
+        if row['error']:
+            print(f"   ✗ {row['target']}: {row['error']}")
+        else:
+            print(
+                f"   ✓ {row['target']}: 总耗时 p50 {row['total_p50_ms']}ms"
+                f" | {row['latency_level']} | {row['connection_method']}"
+            )
+        return results
+
+    async def run_async(self) -> Dict:
+        scheduler = ProbeScheduler(deadline=self.deadline, max_concurrency=self.parallel)
+        for domain, port in self.targets:
+            scheduler.add(
+                format_target(domain, port),
+                lambda domain=domain, port=port: self._diagnose(domain, port),
+                BATCH_TARGET_TIMEOUT
+            )
+
+        start = time.perf_counter()
+        self.results = await scheduler.run()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.rows = [summarize_target(target, result) for target, result in self.results.items()]
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'duration_ms': round(elapsed_ms, 1),
+            'target_timings_ms': scheduler.timings,
+            'shared_lookups': self.shared.stats,
+            'summary': self.rows,
+            'targets': self.results
+        }
+
+    def run(self) -> Dict:
+        print("=" * 60)
+        print(f"🚀 批量诊断 {len(self.targets)} 个目标（同时进行 {self.parallel} 个）")
+        print("=" * 60)
+        report = asyncio.run(self.run_async())
+        print()
+        print(f"⏱️ 诊断耗时 {report['duration_ms'] / 1000:.1f}s"
+              f"（各目标耗时之和 {sum(report['target_timings_ms'].values()) / 1000:.1f}s）")
+        return report
+
+    def sorted_rows(self, sort: str = 'total') -> List[Dict]:
+        """按指定列排序，缺少数据的目标排在最后"""
+        column = BATCH_COLUMNS[sort][0]
+        return sorted(self.rows, key=lambda row: (row[column] is None, row[column] or 0))
+
+    def print_report(self, sort: str = 'total'):
+        print()
+        print("=" * 60)
+        print(f"📊 批量诊断汇总（按 {BATCH_COLUMNS[sort][1]} 排序）")
+        print("=" * 60)
+        columns = ['total', 'p95', 'dns', 'tcp', 'tls', 'ttfb', 'ping', 'loss']
+        print(_pad('目标', 36) + ''.join(_pad(BATCH_COLUMNS[c][1], 11, right=True) for c in columns) + "  建议")
+        for row in self.sorted_rows(sort):
+            cells = ''.join(_pad(_cell(row[BATCH_COLUMNS[c][0]]), 11, right=True) for c in columns)
+            note = row['error'] or f"{row['connection_method']}（{row['latency_level']}）"
+            print(_pad(row['target'], 36) + cells + f"  {note}")
+        print()
+        for kind, stats in self.shared.stats.items():
+            print(f"   {kind}: 执行 {stats['executed']} 次，复用 {stats['reused']} 次")
+
+    def write_csv(self, path: str, sort: str = 'total'):
+        rows = self.sorted_rows(sort)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['target'])
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def _cell(value) -> str:
+    return '-' if value is None else str(value)
+
+
+def _pad(text: str, width: int, right: bool = False) -> str:
+    """按显示宽度补齐（中文字符占两列）"""
+    display = sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+    padding = ' ' * max(width - display, 0)
+    return padding + text if right else text + padding
+
+
+def summarize_target(target: str, results: Dict) -> Dict:
+    """单个目标诊断结果的一行汇总（批量报告与 CSV 使用）"""
+    tests = results.get('tests', {})
+    dns = tests.get('dns', {})
+    timing = tests.get('connection_timing', {})
+    fastest = timing.get('targets', {}).get(timing.get('fastest_ip'), {})
+    phases = fastest.get('phases', {})
+    ping = tests.get('ping', {})
+    location = tests.get('server_location', {})
+    recommendation = results.get('recommendation', {})
+    dns_ms = dns.get('results', {}).get(dns.get('fastest_dns'), {})
+
+    error = None
+    if results.get('status') in ('TIMEOUT', 'ERROR'):
+        error = results.get('message')
+    elif dns.get('status') != 'OK':
+        error = 'DNS 解析失败'
+    elif timing.get('status') != 'OK':
+        error = timing.get('message')
+
+    packet_loss = ping.get('packet_loss') if ping.get('status') == 'OK' else None
+    return {
+        'target': target,
+        'ips': len(dns.get('resolved_ips', [])),
+        'fastest_ip': timing.get('fastest_ip'),
+        'country': location.get('country'),
+        'isp': location.get('isp'),
+        'dns_p50_ms': dns_ms.get('p50_ms'),
+        'tcp_p50_ms': phases.get('tcp_connect', {}).get('p50_ms'),
+        'tls_p50_ms': phases.get('tls_handshake', {}).get('p50_ms'),
+        'ttfb_p50_ms': phases.get('ttfb', {}).get('p50_ms'),
+        'total_p50_ms': phases.get('total', {}).get('p50_ms'),
+        'total_p95_ms': phases.get('total', {}).get('p95_ms'),
+        'ping_ms': ping.get('avg_latency_ms'),
+        'packet_loss_pct': float(packet_loss.rstrip('%')) if packet_loss else None,
+        'hops': tests.get('route_trace', {}).get('hops_count'),
+        'connection_method': recommendation.get('connection_method'),
+        'latency_level': recommendation.get('latency_level'),
+        'error': error
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="API 域名网络诊断")
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        help="诊断的目标 host 或 host:port，可指定多个（默认 api.z.ai）",
+    )
+    parser.add_argument("--port", type=int, default=443, help="目标未写端口时使用的端口（默认 443）")
+    parser.add_argument(
+        "--targets-file",
+        help="批量诊断：目标列表文件，每行一个 host[:port]",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=DEFAULT_PARALLEL,
+        help=f"批量诊断时同时进行的目标数（默认 {DEFAULT_PARALLEL}）",
+    )
+    parser.add_argument(
+        "--sort",
+        choices=list(BATCH_COLUMNS),
+        default="total",
+        help="批量诊断汇总表的排序列（默认 total）",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=BATCH_DEADLINE,
+        help=f"批量诊断的截止时间（秒，默认 {BATCH_DEADLINE}）",
+    )
+    parser.add_argument(
+        "--dns-server",
+        action="append",
+        help="要测试的 DNS 服务器 host[:port]，可重复指定（默认为系统与公共 DNS 服务器）",
+    )
+    parser.add_argument(
+        "--dns-samples",
+        type=int,
+        default=DEFAULT_DNS_SAMPLES,
+        help=f"每个 DNS 服务器的查询轮数（默认 {DEFAULT_DNS_SAMPLES}）",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=DEFAULT_SAMPLES,
+        help=f"每个 IP 的连接耗时采样次数（默认 {DEFAULT_SAMPLES}）",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"每个 IP 同时进行的请求数（默认 {DEFAULT_CONCURRENCY}）",
+    )
+    parser.add_argument("--path", default="/", help="采样请求的路径（默认 /）")
+    parser.add_argument(
+        "--resolve",
+        action="append",
+        metavar="IP",
+        help="跳过 DNS 解析，直接测试指定 IP（可重复指定，例如指向本地的 HTTPS 测试服务）",
+    )
+    parser.add_argument("--no-tls", action="store_true", help="使用明文 HTTP")
+    parser.add_argument("--insecure", action="store_true", help="不校验证书（自签名证书）")
+    add_watch_arguments(parser, default_store="api_domain_watch.db")
+    return parser.parse_args()
+
+
+def run_batch(targets: List[Tuple[str, int]], args, options: Dict):
+    batch = BatchDiagnostics(targets, parallel=args.parallel, deadline=args.deadline, **options)
+    report = batch.run()
+    batch.print_report(args.sort)
+    report['summary'] = batch.sorted_rows(args.sort)
+
+    output_file = 'api_domain_batch_report.json'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    csv_file = 'api_domain_batch_report.csv'
+    batch.write_csv(csv_file, args.sort)
+
+    print()
+    print("=" * 60)
+    print(f"✅ 报告已保存: {output_file}、{csv_file}")
+    print("=" * 60)
 
 
 def main():
-    domain = "api.z.ai"
-    port = 443
+    args = parse_args()
+    targets = load_targets(args.targets, args.targets_file, args.port) or [('api.z.ai', args.port)]
+    options = dict(
+        dns_servers={server: server for server in args.dns_server} if args.dns_server else None,
+        dns_samples=args.dns_samples,
+        samples=args.samples,
+        concurrency=args.concurrency,
+        path=args.path,
+        tls=not args.no_tls,
+        insecure=args.insecure
+    )
+
+    if len(targets) > 1 or args.targets_file:
+        if args.resolve or args.watch:
+            print("❌ 批量诊断不支持 --resolve 与 --watch")
+            return
+        try:
+            run_batch(targets, args, options)
+        except KeyboardInterrupt:
+            print("\n\n⚠️ 诊断被用户中断")
+        return
 
-    diagnostics = APIDomainDiagnostics(domain, port)
+    domain, port = targets[0]
+    diagnostics = APIDomainDiagnostics(domain, port, ips=args.resolve, **options)
 
     try:
+        if args.watch:
+            monitor = Monitor(
+                f"{format_target(domain, port)} 连接延迟趋势",
+                args.watch,
+                args.store,
+                window=args.window,
+                html_path=args.html,
+                rounds=args.rounds
+            )
+            asyncio.run(monitor.run(diagnostics.watch_sample))
+            return
+
         results = diagnostics.run_diagnostics()
         diagnostics.print_report()
 
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+静态资源构建：压缩 styles/*.css 与 scripts/*.js，按内容哈希命名输出到 dist/
+
+- 压缩基于词法切分（字符串、模板字符串、正则字面量、注释分别识别），不会误伤代码
+- 输出 dist/styles/main.<hash>.css 等文件，并写入 dist/asset-manifest.json
+- 将 HTML 页面与 service-worker.js 中的资源引用改写为带哈希的文件，
+  service worker 的 CACHE_VERSION 由 manifest 的哈希决定
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+from output_writer import write_bytes, write_json, write_text
+
+ASSET_SOURCES = ["styles/*.css", "scripts/*.js"]
+ASSET_DIST_DIR = "dist"
+ASSET_MANIFEST_PATH = "dist/asset-manifest.json"
+SERVICE_WORKER_PATH = "service-worker.js"
+
+# 需要改写资源引用的页面
+# blog/ 下为分页、分类与标签列表页（见 blog_pages.py）
+HTML_GLOBS = ["*.html", "blog/**/*.html"]
+
+# 资源引用：可带 ../ 或 / 前缀，可能已指向 dist/ 中带哈希的旧文件或带 ?v= 查询串
+ASSET_REF_PATTERN = re.compile(
+    r"""(?P<quote>["'(])(?P<prefix>(?:\.\./|/)*)(?:dist/)?"""
+    r"""(?P<dir>styles|scripts)/(?P<stem>[\w-]+?)(?:\.[0-9a-f]{10})?\.(?P<ext>css|js)"""
+    r"""(?:\?[^"')\s]*)?(?=["')])"""
+)
+CACHE_VERSION_PATTERN = re.compile(r"const CACHE_VERSION = '[^']*';")
+
+
+# ================================
+# CSS 压缩
+# ================================
+
+CSS_TOKEN_PATTERN = re.compile(
+    r"""
+      (?P<comment>/\*.*?\*/)
+    | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+    | (?P<url>url\(\s*(?:"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|[^)"'\s]*)\s*\))
+    | (?P<space>\s+)
+    | (?P<word>[\w.#%-]+)
+    | (?P<other>.)
+    """,
+    re.S | re.X | re.I,
+)
+
+# 这些字符前后的空白可以去掉；":" 前的空白在选择器中有意义（"a :hover"），不去掉
+CSS_NO_SPACE_BEFORE = set("{};,>)!")
+CSS_NO_SPACE_AFTER = set("{};,:>(")
+
+
+def rebase_css_url(token, src_dir, out_dir):
+    """文件移动到 dist/ 后，改写相对路径的 url()"""
+    inner = token[4:-1].strip()
+    quote = inner[0] if inner[:1] in ("'", '"') else ""
+    path = inner[1:-1] if quote else inner
+    if not path or re.match(r"^(?:[a-z]+:|/|#)", path, re.I):
+        return token
+    target = posixpath.normpath(posixpath.join(src_dir, path))
+    return f"url({quote}{posixpath.relpath(target, out_dir)}{quote})"
+
+
+def minify_css(css, src_dir=None, out_dir=None):
+    """压缩 CSS：去掉注释与多余空白，保留字符串与 url() 原样"""
+    out = []
+    pending_space = False
+    for match in CSS_TOKEN_PATTERN.finditer(css):
+        kind, token = match.lastgroup, match.group()
+        if kind == "space" or (kind == "comment" and not token.startswith("/*!")):
+            pending_space = True
+            continue
+        if kind == "url" and src_dir is not None:
+            token = rebase_css_url(token, src_dir, out_dir)
+        if token == "}" and out and out[-1] == ";":
+            out.pop()
+        if (
+            pending_space
+            and out
+            and out[-1][-1] not in CSS_NO_SPACE_AFTER
+            and token[0] not in CSS_NO_SPACE_BEFORE
+        ):
+            out.append(" ")
+        out.append(token)
+        pending_space = False
+    return "".join(out)
+
+
+# ================================
+# JS 压缩
+# ================================
+
+# 这些关键字之后的 "/" 是正则字面量而不是除号
+JS_KEYWORDS_BEFORE_EXPRESSION = {
+    "return", "typeof", "instanceof", "in", "of", "new", "delete", "void",
+    "throw", "case", "do", "else", "yield", "await",
+}  # fmt: skip
+JS_WORD_PATTERN = re.compile(r"[\w$\u0080-￿]+")
+JS_SPACE_PATTERN = re.compile(r"\s+")
+
+# 换行前后是这些字符时，换行不会触发自动分号插入，可以去掉
+JS_NEWLINE_SAFE_AFTER = set("{;,([=:?&|")
+JS_NEWLINE_SAFE_BEFORE = set("}]),;:?")
+
+
+def _scan_string(src, i):
+    quote = src[i]
+    j = i + 1
+    while src[j] != quote:
+        if src[j] == "\\":
+            j += 1
+        elif src[j] == "\n":
+            raise ValueError(f"未闭合的字符串（位置 {i}）")
+        j += 1
+    return j + 1
+
+
+def _scan_template(src, i):
+    """扫描模板字符串片段，返回 (结束位置, 是否以 ${ 结尾)"""
+    j = i + 1
+    while True:
+        c = src[j]
+        if c == "\\":
+            j += 2
+        elif c == "`":
+            return j + 1, False
+        elif src.startswith("${", j):
+            return j + 2, True
+        else:
+            j += 1
+
+
+def _scan_regex(src, i):
+    j = i + 1
+    in_class = False
+    while True:
+        c = src[j]
+        if c == "\\":
+            j += 2
+            continue
+        if c == "\n":
+            raise ValueError(f"未闭合的正则表达式（位置 {i}）")
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            break
+        j += 1
+    j += 1
+    while j < len(src) and (src[j].isalnum() or src[j] == "_"):
+        j += 1
+    return j
+
+
+def tokenize_js(src):
+    """将 JS 源码切分为 (类型, 文本)，类型为 space/newline/word/str/regex/punct
+
+    注释视为空白；模板字符串的静态片段作为 str，${} 中的表达式正常切分。
+    """
+    tokens = []
+    braces = []  # "{" 或 "${"，用于判断 "}" 是否回到模板字符串
+    prev = None  # 上一个有效 token，用于区分正则与除号
+    i = 0
+    n = len(src)
+
+    def emit(kind, text):
+        nonlocal prev
+        tokens.append((kind, text))
+        if kind not in ("space", "newline"):
+            prev = (kind, text)
+
+    while i < n:
+        c = src[i]
+        if c.isspace():
+            j = JS_SPACE_PATTERN.match(src, i).end()
+            emit("newline" if "\n" in src[i:j] else "space", " ")
+        elif src.startswith("//", i):
+            j = src.find("\n", i)
+            j = n if j == -1 else j
+            emit("space", " ")
+        elif src.startswith("/*", i):
+            j = src.index("*/", i + 2) + 2
+            emit("newline" if "\n" in src[i:j] else "space", " ")
+        elif c in ("'", '"'):
+            j = _scan_string(src, i)
+            emit("str", src[i:j])
+        elif c == "`" or (c == "}" and braces and braces[-1] == "${"):
+            if c == "}":
+                braces.pop()
+            j, opens = _scan_template(src, i)
+            if opens:
+                braces.append("${")
+            emit("str", src[i:j])
+        elif c == "/" and (
+            prev is None
+            or (prev[0] == "punct" and prev[1] not in (")", "]", "}"))
+            or (prev[0] == "word" and prev[1] in JS_KEYWORDS_BEFORE_EXPRESSION)
+        ):
+            j = _scan_regex(src, i)
+            emit("regex", src[i:j])
+        elif JS_WORD_PATTERN.match(src, i):
+            j = JS_WORD_PATTERN.match(src, i).end()
+            emit("word", src[i:j])
+        else:
+            if c == "{":
+                braces.append("{")
+            elif c == "}" and braces:
+                braces.pop()
+            j = i + 1
+            emit("punct", c)
+        i = j
+    return tokens
+
+
+def minify_js(js):
+    """压缩 JS：去掉注释，合并空白；保留可能影响自动分号插入的换行"""
+    out = []
+    pending = None  # None / "space" / "newline"
+    for kind, text in tokenize_js(js):
+        if kind in ("space", "newline"):
+            if pending != "newline":
+                pending = kind
+            continue
+        if pending and out:
+            last, first = out[-1][-1], text[0]
+            if pending == "newline" and not (
+                last in JS_NEWLINE_SAFE_AFTER or first in JS_NEWLINE_SAFE_BEFORE
+            ):
+                out.append("\n")
+            elif (
+                (JS_WORD_PATTERN.match(last) and JS_WORD_PATTERN.match(first))
+                or last + first in ("++", "--", "//", "/*")
+                or (first == "." and last.isdigit())
+            ):
+                out.append(" ")
+        out.append(text)
+        pending = None
+    return "".join(out).strip()
+
+
+# ================================
+# 构建与引用改写
+# ================================
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def build_assets(sources=ASSET_SOURCES, dist_dir=ASSET_DIST_DIR):
+    """压缩并以内容哈希命名输出所有资源，删除输出目录中过期的旧文件，返回 manifest"""
+    assets = {}
+    for pattern in sources:
+        for path in sorted(glob.glob(pattern)):
+            src_dir, filename = posixpath.split(path.replace(os.sep, "/"))
+            stem, ext = posixpath.splitext(filename)
+            out_dir = posixpath.join(dist_dir, src_dir)
+
+            with open(path, "r", encoding="utf-8") as f:
+                source = f.read()
+            try:
+                if ext == ".css":
+                    minified = minify_css(source, src_dir, out_dir)
+                else:
+                    minified = minify_js(source)
+            except (ValueError, IndexError) as e:
+                print(f"⚠️  {path} 无法解析，原样输出: {e}")
+                minified = source
+            data = minified.encode("utf-8")
+
+            output = posixpath.join(out_dir, f"{stem}.{content_hash(data)}{ext}")
+            write_bytes(output, data)
+            assets[path.replace(os.sep, "/")] = output
+
+            savings = (1 - len(data) / max(1, len(source.encode("utf-8")))) * 100
+            print(f"✅ {path} -> {output} (减少 {savings:.1f}%)")
+
+    # 只清理本步骤输出的目录，dist/ 下其他构建步骤的产物不受影响
+    in_use = set(assets.values())
+    for pattern in sources:
+        out_dir = posixpath.join(dist_dir, posixpath.dirname(pattern))
+        if not os.path.isdir(out_dir):
+            continue
+        for filename in sorted(os.listdir(out_dir)):
+            path = posixpath.join(out_dir, filename)
+            if path not in in_use and os.path.isfile(path):
+                os.remove(path)
+                print(f"  🗑️  已删除旧资源: {path}")
+
+    version = content_hash(json.dumps(assets, sort_keys=True).encode("utf-8"))
+    manifest = {"version": version, "assets": assets}
+    write_json(
+        ASSET_MANIFEST_PATH,
+        manifest,
+        trailing_newline=True,
+        ensure_ascii=False,
+        indent=2,
+        sort_keys=True,
+    )
+    return manifest
+
+
+def load_asset_manifest(path=ASSET_MANIFEST_PATH):
+    """读取资源 manifest，不存在时返回 None"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def rewrite_asset_urls(text, manifest):
+    """将文本中的资源引用改写为 manifest 中带哈希的文件（未知资源保持不变）"""
+    assets = manifest["assets"]
+
+    def replace(match):
+        logical = f"{match['dir']}/{match['stem']}.{match['ext']}"
+        if logical not in assets:
+            return match.group()
+        return f"{match['quote']}{match['prefix']}{assets[logical]}"
+
+    return ASSET_REF_PATTERN.sub(replace, text)
+
+
+def normalize_asset_urls(text):
+    """将带哈希的资源引用还原为源文件路径（用于比较页面内容是否变化）"""
+    return ASSET_REF_PATTERN.sub(
+        lambda m: f"{m['quote']}{m['prefix']}{m['dir']}/{m['stem']}.{m['ext']}", text
+    )
+
+
+def rewrite_file(path, manifest, transform=None):
+    """改写单个文件中的资源引用，内容有变化时才写回，返回是否写入"""
+    with open(path, "r", encoding="utf-8") as f:
+        original = f.read()
+    text = rewrite_asset_urls(original, manifest)
+    if transform:
+        text = transform(text)
+    return write_text(path, text)
+
+
+def rewrite_references(manifest, html_globs=HTML_GLOBS, sw_path=SERVICE_WORKER_PATH):
+    """改写所有页面与 service worker 中的资源引用"""
+    html_files = sorted(
+        {f for pattern in html_globs for f in glob.glob(pattern, recursive=True)}
+    )
+    changed = [f for f in html_files if rewrite_file(f, manifest)]
+
+    if os.path.exists(sw_path):
+        cache_version = f"const CACHE_VERSION = '{manifest['version']}';"
+        if rewrite_file(
+            sw_path,
+            manifest,
+            lambda text: CACHE_VERSION_PATTERN.sub(cache_version, text),
+        ):
+            changed.append(sw_path)
+
+    print(f"📋 已检查 {len(html_files)} 个页面，更新 {len(changed)} 个文件")
+    return changed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="压缩静态资源并按内容哈希命名")
+    parser.add_argument(
+        "--no-rewrite", action="store_true", help="只生成 dist/，不改写页面中的引用"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("🚀 开始构建静态资源...")
+    manifest = build_assets()
+    if not args.no_rewrite:
+        rewrite_references(manifest)
+    print(f"🎉 资源构建完成！版本 {manifest['version']}")
@@ -0,0 +1,313 @@
+"""
+文章列表页：分页、分类与标签列表页，以及供无限滚动使用的 JSON feed
+
+同一份文章列表生成三类列表，每类按 BLOG_PAGE_SIZE 分页：
+- 全部文章：blog.html（第 1 页）、blog/page/<n>.html
+- 分类：blog/category/<分类>.html、blog/category/<分类>/page/<n>.html
+- 标签：blog/tag/<标签>.html、blog/tag/<标签>/page/<n>.html
+
+每一页另有同名目录下的 page/<n>.json（第 1 页同样生成），页面通过 #blogGrid 的
+data-next-feed 指向下一页的 feed，scripts/blog.js 滚动到底部时加载并追加卡片。
+blog.html 的 HTML 与 DOM 大小因此不随文章数量增长。blog/ 目录完全由这里生成，
+不再对应任何列表的旧文件会被删除。
+
+不来自 Notion 的手工页面记录在 data/static-articles.json，与 Notion 文章一起分页。
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+from urllib.parse import quote
+
+from asset_pipeline import normalize_asset_urls
+from critical_css import normalize_page_styles
+from output_writer import stats as write_stats
+from output_writer import write_json, write_text
+from templating import render_template
+
+BLOG_DIR = "blog"
+# 不来自 Notion 的文章（手工维护的页面），与 Notion 文章合并生成列表
+STATIC_ARTICLES_PATH = "data/static-articles.json"
+BLOG_PAGE_SIZE = int(os.environ.get("BLOG_PAGE_SIZE", "12"))
+SITE_URL = "https://kev1nl33.github.io/personal-blog"
+
+DEFAULT_SUBHEADING = "探索职业发展、AI应用、投资思考与个人成长的深度思考"
+
+
+def tag_slug(tag):
+    """标签的文件名：小写，空白与连续的 - 替换为单个 -（保留中文）
+
+    去掉了其他标点的标签（如 C++、C#）追加原标签的短哈希，
+    避免与同名的不含标点的标签（C）共用一个文件名。
+    """
+    name = tag.strip().lower()
+    slug = re.sub(r"[^\w]+", "-", name).strip("-")
+    if slug != re.sub(r"[\s-]+", "-", name).strip("-"):
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:6]
+        slug = f"{slug}-{digest}" if slug else digest
+    return slug
+
+
+def href(path):
+    """站内相对链接（文件名中的中文与空格需要编码）"""
+    return quote(path)
+
+
+def load_static_articles(path=STATIC_ARTICLES_PATH):
+    """读取手工维护的文章条目；页面文件已不存在的条目不列出"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [entry for entry in entries if os.path.exists(f"{entry['url']}.html")]
+
+
+def merge_static_articles(articles, static_articles):
+    """Notion 文章加上手工维护的文章；URL 相同时以 Notion 的数据为准"""
+    urls = {article["url"] for article in articles}
+    return list(articles) + [a for a in static_articles if a["url"] not in urls]
+
+
+class Listing:
+    """一个分页列表：first 为第 1 页的路径，base 为其余分页与 feed 所在目录"""
+
+    def __init__(self, key, heading, subheading, first, base, articles):
+        self.key = key
+        self.heading = heading
+        self.subheading = subheading
+        self.first = first
+        self.base = base
+        self.articles = articles
+
+    @property
+    def page_count(self):
+        return max(1, -(-len(self.articles) // BLOG_PAGE_SIZE))
+
+    def page_path(self, n):
+        return self.first if n == 1 else f"{self.base}/page/{n}.html"
+
+    def feed_path(self, n):
+        return f"{self.base}/page/{n}.json"
+
+    def page_articles(self, n):
+        return self.articles[(n - 1) * BLOG_PAGE_SIZE : n * BLOG_PAGE_SIZE]
+
+
+def build_listings(articles, categories):
+    """全部文章、各分类与各标签的列表；categories 为「中文名 -> 英文标识」"""
+    articles = sorted(articles, key=lambda a: a["date_short"], reverse=True)
+    listings = [
+        Listing("all", "所有文章", DEFAULT_SUBHEADING, "blog.html", BLOG_DIR, articles)
+    ]
+
+    for name, key in categories.items():
+        matched = [a for a in articles if a["category_en"] == key]
+        if matched:
+            listings.append(
+                Listing(
+                    f"category:{key}",
+                    name,
+                    f"「{name}」分类下的 {len(matched)} 篇文章",
+                    f"{BLOG_DIR}/category/{key}.html",
+                    f"{BLOG_DIR}/category/{key}",
+                    matched,
+                )
+            )
+
+    # 大小写或空白不同的同一标签合并为一个列表，使用第一次出现时的写法
+    tags = {}
+    for article in articles:
+        for tag in article.get("tags", []):
+            slug = tag_slug(tag)
+            if slug:
+                name, matched = tags.setdefault(slug, (tag, []))
+                if article not in matched:
+                    matched.append(article)
+    for slug, (name, matched) in sorted(tags.items()):
+        listings.append(
+            Listing(
+                f"tag:{slug}",
+                f"#{name}",
+                f"标签「{name}」下的 {len(matched)} 篇文章",
+                f"{BLOG_DIR}/tag/{slug}.html",
+                f"{BLOG_DIR}/tag/{slug}",
+                matched,
+            )
+        )
+    return listings
+
+
+def feed_item(article):
+    """feed 中的文章条目（scripts/blog.js 中的 renderCard 据此生成卡片）"""
+    return {
+        "url": f"{article['url']}.html",
+        "title": article["title"],
+        "excerpt": article["excerpt"],
+        "category": article["category"],
+        "category_en": article["category_en"],
+        "tags": article.get("tags", []),
+        "date": article["date_short"],
+        "read_time": article["read_time"],
+    }
+
+
+def blog_card(article):
+    """文章卡片 HTML（与 scripts/blog.js 中的 renderCard 保持一致）"""
+    e = html.escape
+    # 手工维护的文章可能没有阅读时间
+    meta = e(article["date_short"])
+    if article.get("read_time"):
+        meta += f" · {article['read_time']}分钟"
+    return f"""                <article class="bento-card p-6 blog-card reveal" data-category="{e(article["category_en"])}" data-tags="{e(",".join(article.get("tags", [])))}">
+                    <div class="mb-3">
+                        <span class="tag tag--{e(article["category_en"])}">{e(article["category"] or "")}</span>
+                    </div>
+                    <h3 class="text-xl font-bold mb-3 leading-tight">
+                        {e(article["title"] or "")}
+                    </h3>
+                    <p class="text-sm text-gray-600 mb-4 font-serif line-clamp-3">
+                        {e(article["excerpt"])}
+                    </p>
+                    <div class="flex justify-between items-center">
+                        <div class="text-xs text-gray-500 font-mono">{meta}</div>
+                        <a href="{href(article["url"])}.html" class="font-mono font-bold text-xs hover:text-brand-accent transition-colors">
+                            阅读 →
+                        </a>
+                    </div>
+                </article>
+"""
+
+
+def link_buttons(links, css_class, current, indent=" " * 20):
+    """筛选按钮：links 为 (列表键, 文本, 路径, data 属性)，当前列表高亮"""
+    return "\n".join(
+        f'{indent}<a href="{href(path)}" class="{css_class}'
+        f'{" active" if key == current else ""}"{attrs}>{html.escape(text)}</a>'
+        for key, text, path, attrs in links
+    )
+
+
+def pagination_html(listing, n, indent=" " * 16):
+    """分页导航：上一页、各页码、下一页"""
+    links = []
+    if n > 1:
+        links.append((listing.page_path(n - 1), "← 上一页", ""))
+    for i in range(1, listing.page_count + 1):
+        links.append((listing.page_path(i), str(i), " active" if i == n else ""))
+    if n < listing.page_count:
+        links.append((listing.page_path(n + 1), "下一页 →", ""))
+    if len(links) == 1:
+        return ""
+    return "\n".join(
+        f'{indent}<a href="{href(path)}" class="page-btn{active}">{text}</a>'
+        for path, text, active in links
+    )
+
+
+def render_listing_page(listing, n, category_links, tag_links):
+    path = listing.page_path(n)
+    page_title = listing.heading if n == 1 else f"{listing.heading}（第 {n} 页）"
+    if listing.key == "all":
+        page_title = f"{page_title} - 职业规划、AI应用、投资思考"
+    return render_template(
+        "blog-list.html",
+        root="../" * path.count("/") or "./",
+        page_title=html.escape(page_title),
+        description=html.escape(f"{listing.subheading}。计划李的个人博客。"),
+        canonical_url=f"{SITE_URL}/{href(path)}",
+        feed_url=href(listing.feed_path(n)),
+        heading=html.escape(listing.heading),
+        subheading=html.escape(listing.subheading),
+        category_links=category_links,
+        tag_links=tag_links,
+        cards="\n".join(blog_card(a) for a in listing.page_articles(n)),
+        next_feed=(href(listing.feed_path(n + 1)) if n < listing.page_count else ""),
+        pagination=pagination_html(listing, n),
+    )
+
+
+def feed(listing, n):
+    return {
+        "page": n,
+        "pages": listing.page_count,
+        "total": len(listing.articles),
+        "next": (href(listing.feed_path(n + 1)) if n < listing.page_count else None),
+        "items": [feed_item(a) for a in listing.page_articles(n)],
+    }
+
+
+def write_page(path, text):
+    """写入列表页；与现有文件只差后续构建步骤改写的资源引用和页面样式区域时不写"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            existing = f.read()
+    except OSError:
+        existing = None
+    if existing is not None and normalize_page_styles(
+        normalize_asset_urls(existing)
+    ) == normalize_page_styles(normalize_asset_urls(text)):
+        write_stats.record_skip(len(existing.encode("utf-8")))
+        return False
+    return write_text(path, text)
+
+
+def remove_stale_files(outputs, blog_dir=BLOG_DIR):
+    """删除 blog/ 下不再生成的文件与空目录"""
+    removed = 0
+    for root, dirs, files in os.walk(blog_dir, topdown=False):
+        for filename in files:
+            path = os.path.join(root, filename).replace(os.sep, "/")
+            if path not in outputs:
+                os.remove(path)
+                removed += 1
+        if not os.listdir(root):
+            os.rmdir(root)
+    return removed
+
+
+def build_blog_pages(articles, categories):
+    """生成全部列表页与 feed（合并手工维护的文章），返回生成的页面数"""
+    articles = merge_static_articles(articles, load_static_articles())
+    listings = build_listings(articles, categories)
+    by_key = {listing.key: listing for listing in listings}
+
+    category_links = [("all", "全部", "blog.html", ' data-category="all"')] + [
+        (
+            f"category:{key}",
+            name,
+            by_key[f"category:{key}"].first,
+            f' data-category="{key}"',
+        )
+        for name, key in categories.items()
+        if f"category:{key}" in by_key
+    ]
+    tag_links = [
+        (listing.key, listing.heading, listing.first, "")
+        for listing in listings
+        if listing.key.startswith("tag:")
+    ]
+
+    outputs = set()
+    for listing in listings:
+        category_html = link_buttons(category_links, "category-btn", listing.key)
+        tag_html = link_buttons(tag_links, "tag-btn", listing.key)
+        for n in range(1, listing.page_count + 1):
+            path = listing.page_path(n)
+            write_page(path, render_listing_page(listing, n, category_html, tag_html))
+            feed_path = listing.feed_path(n)
+            write_json(
+                feed_path, feed(listing, n), ensure_ascii=False, separators=(",", ":")
+            )
+            outputs.update((path, feed_path))
+
+    removed = remove_stale_files(outputs)
+    pages = sum(listing.page_count for listing in listings)
+    print(
+        f"✅ 文章列表: {len(listings)} 个列表共 {pages} 页"
+        f"（每页 {BLOG_PAGE_SIZE} 篇）"
+        + (f"，删除旧文件 {removed} 个" if removed else "")
+    )
+    return pages
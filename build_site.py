@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+一站式构建：构建静态资源，同步 Notion 内容，构建文章页面样式，并生成搜索索引、相关文章推荐、sitemap.xml 与 robots.txt
+Notion 文章的数据只获取一次，搜索索引与 sitemap 直接复用内存中的文章记录；
+其余静态页面只在 mtime/内容哈希变化时才重新解析
+"""
+
+import sync_notion
+from asset_pipeline import build_assets, rewrite_references
+from critical_css import build_page_styles
+from generate_related import generate_related
+from generate_search_index import generate_search_index, make_record
+from generate_sitemap import generate_robots, generate_sitemap
+from image_pipeline import process_gallery
+from notion_cache import ResponseCache
+from output_writer import print_write_stats
+
+
+def article_search_record(article):
+    """由内存中的文章数据生成搜索索引记录，正文纯文本不可用时返回 None"""
+    if article.get("text") is None:
+        return None
+    content_text = " ".join(
+        part for part in (article["title"], article["excerpt"], article["text"]) if part
+    )
+    return make_record(
+        f"{article['url']}.html",
+        article["title"],
+        article["description"],
+        article["category"],
+        article["keywords"],
+        content_text,
+        article=True,
+    )
+
+
+def article_lastmods(articles):
+    """文章页面的 sitemap lastmod 取 Notion 的最后编辑日期"""
+    return {
+        f"{article['url']}.html": article["last_edited_time"][:10]
+        for article in articles
+        if article.get("last_edited_time")
+    }
+
+
+def main(full=False):
+    print("📦 构建静态资源...")
+    assets = build_assets()
+
+    articles = sync_notion.main(full=full)
+    sync_notion.sync_coffee_beans()
+    sync_notion.sync_cafe_visits()
+    sync_notion.sync_brewing_notes()
+    sync_notion.update_coffee_html()
+
+    print("\n🖼️  处理相册图片...")
+    process_gallery()
+
+    if articles is None:
+        print("\n⚠️  文章同步失败，搜索索引与 sitemap 将从磁盘上的页面生成")
+        articles = []
+
+    # 页面全部生成后统一改写资源引用，再建索引（索引缓存按页面内容哈希判断变化）
+    print("\n🔗 改写资源引用...")
+    rewrite_references(assets)
+
+    # 文章页面的 Tailwind CDN 运行时替换为构建期样式表与内联关键 CSS
+    print("\n🎨 构建页面样式...")
+    build_page_styles()
+
+    # 没有正文纯文本的文章（IR 缓存缺失）退回到从磁盘解析其页面
+    records = [r for r in map(article_search_record, articles) if r is not None]
+
+    print("\n🔎 生成搜索索引...")
+    search_index = generate_search_index(records, full=full)
+    generate_related(search_index)
+
+    print("\n🗺️  生成 SEO 文件...")
+    generate_sitemap(article_lastmods(articles))
+    generate_robots()
+
+    sync_notion.notion.print_stats()
+    print_write_stats()
+    print("\n🎉 构建完成！")
+
+
+if __name__ == "__main__":
+    args = sync_notion.parse_args()
+    if args.cache or args.offline:
+        sync_notion.notion.enable_cache(ResponseCache(), offline=args.offline)
+    main(full=args.full)
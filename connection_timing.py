@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+连接耗时分解 - 分别测量 TCP 连接、TLS 握手、首字节（TTFB）与传输耗时
+
+每个样本是一次完整的 HTTP(S) 请求，使用 time.perf_counter_ns 在各阶段边界打点：
+- tcp_connect: 发起连接到三次握手完成
+- tls_handshake: TLS 握手（SNI 与证书校验使用域名，连接的是指定 IP）
+- ttfb: 请求发出到收到响应的第一个字节
+- transfer: 第一个字节到响应读完
+- total: 以上之和
+
+所有 IP 同时采样，每个 IP 内最多 concurrency 个请求并发，汇总为百分位数、抖动与直方图。
+DNS 解析由 dns_client 单独测量。
+
+用法:
+    python connection_timing.py api.z.ai 1.2.3.4 --samples 200
+    python connection_timing.py localhost 127.0.0.1 --port 8443 --insecure
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import ssl
+import time
+from typing import Dict, List, Optional
+
+from latency_stats import format_histogram, histogram, summarize
+
+PHASES = ['tcp_connect', 'tls_handshake', 'ttfb', 'transfer', 'total']
+
+DEFAULT_SAMPLES = 20
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 10.0
+# 每个响应最多读取的字节数，超出部分不计入传输耗时
+MAX_RESPONSE_BYTES = 1024 * 1024
+
+
+def make_ssl_context(insecure: bool = False) -> ssl.SSLContext:
+    """TLS 上下文；insecure 时不校验证书（用于自签名证书的本地服务）"""
+    context = ssl.create_default_context()
+    if insecure:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def _elapsed_ms(start_ns: int, end_ns: int) -> float:
+    return (end_ns - start_ns) / 1e6
+
+
+async def _exchange(ip: str, port: int, host: str, path: str,
+                    ssl_context: Optional[ssl.SSLContext], sample: Dict):
+    loop = asyncio.get_running_loop()
+    family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    writer = None
+    try:
+        sample['stage'] = 'tcp_connect'
+        start = time.perf_counter_ns()
+        await loop.sock_connect(sock, (ip, port))
+        connected = time.perf_counter_ns()
+        sample['tcp_connect'] = _elapsed_ms(start, connected)
+
+        sample['stage'] = 'tls_handshake'
+        reader, writer = await asyncio.open_connection(
+            sock=sock,
+            ssl=ssl_context,
+            server_hostname=host if ssl_context else None
+        )
+        handshaken = time.perf_counter_ns()
+        if ssl_context:
+            sample['tls_handshake'] = _elapsed_ms(connected, handshaken)
+            sample['tls_version'] = writer.get_extra_info('ssl_object').version()
+
+        sample['stage'] = 'ttfb'
+        request = (
+            f'GET {path} HTTP/1.1\r\n'
+            f'Host: {host}\r\n'
+            'User-Agent: api-domain-diagnostic\r\n'
+            'Accept: */*\r\n'
+            'Connection: close\r\n\r\n'
+        )
+        writer.write(request.encode('ascii'))
+        await writer.drain()
+        sent = time.perf_counter_ns()
+        chunk = await reader.read(65536)
+        first_byte = time.perf_counter_ns()
+        if not chunk:
+            raise ConnectionError('服务器未返回响应')
+        sample['ttfb'] = _elapsed_ms(sent, first_byte)
+        status_line = chunk.split(b'\r\n', 1)[0].split()
+        sample['status'] = int(status_line[1]) if len(status_line) > 1 and status_line[1].isdigit() else None
+
+        sample['stage'] = 'transfer'
+        received = len(chunk)
+        while chunk and received < MAX_RESPONSE_BYTES:
+            chunk = await reader.read(65536)
+            received += len(chunk)
+        finished = time.perf_counter_ns()
+        sample['transfer'] = _elapsed_ms(first_byte, finished)
+        sample['bytes'] = received
+        sample['total'] = _elapsed_ms(start, finished)
+    finally:
+        if writer is not None:
+            writer.close()
+        else:
+            sock.close()
+
+
+async def time_request(ip: str, port: int, host: str, path: str = '/',
+                       ssl_context: Optional[ssl.SSLContext] = None,
+                       timeout: float = DEFAULT_TIMEOUT) -> Dict:
+    """对 ip:port 发起一次请求，返回各阶段耗时（毫秒）；失败时返回出错的阶段与原因"""
+    sample = {}
+    try:
+        await asyncio.wait_for(_exchange(ip, port, host, path, ssl_context, sample), timeout)
+    except asyncio.TimeoutError:
+        return {'error': f'超时 ({timeout:g}s)', 'stage': sample.get('stage')}
+    except (OSError, ssl.SSLError, ValueError) as e:
+        return {'error': str(e) or type(e).__name__, 'stage': sample.get('stage')}
+    del sample['stage']
+    return sample
+
+
+async def time_requests(ip: str, port: int, host: str, samples: int = DEFAULT_SAMPLES,
+                        concurrency: int = DEFAULT_CONCURRENCY, path: str = '/',
+                        ssl_context: Optional[ssl.SSLContext] = None,
+                        timeout: float = DEFAULT_TIMEOUT) -> List[Dict]:
+    """对一个 IP 发起 samples 次请求（最多 concurrency 个并发），返回每次的结果"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await time_request(ip, port, host, path, ssl_context, timeout)
+
+    return await asyncio.gather(*(one() for _ in range(samples)))
+
+
+async def sample_ip(ip: str, port: int, host: str, samples: int = DEFAULT_SAMPLES,
+                    concurrency: int = DEFAULT_CONCURRENCY, path: str = '/',
+                    ssl_context: Optional[ssl.SSLContext] = None,
+                    timeout: float = DEFAULT_TIMEOUT) -> Dict:
+    """对一个 IP 采样 samples 次，汇总各阶段的百分位数、抖动与直方图"""
+    results = await time_requests(ip, port, host, samples, concurrency, path, ssl_context, timeout)
+    succeeded = [r for r in results if 'error' not in r]
+
+    errors = {}
+    for r in results:
+        if 'error' in r:
+            key = f"{r['stage']}: {r['error']}"
+            errors[key] = errors.get(key, 0) + 1
+
+    statuses = {}
+    for r in succeeded:
+        statuses[str(r['status'])] = statuses.get(str(r['status']), 0) + 1
+
+    phases = [phase for phase in PHASES if any(phase in r for r in succeeded)]
+    report = {
+        'ip': ip,
+        'samples': samples,
+        'succeeded': len(succeeded),
+        'success_rate': f'{len(succeeded)}/{samples}',
+        'status_codes': statuses,
+        'phases': {phase: summarize([r[phase] for r in succeeded]) for phase in phases},
+        'histograms': {phase: histogram([r[phase] for r in succeeded]) for phase in phases}
+    }
+    tls_versions = sorted({r['tls_version'] for r in succeeded if r.get('tls_version')})
+    if tls_versions:
+        report['tls_versions'] = tls_versions
+    if succeeded:
+        report['bytes'] = max(r['bytes'] for r in succeeded)
+    if errors:
+        report['errors'] = errors
+    return report
+
+
+async def sample_ips(ips: List[str], port: int, host: str, samples: int = DEFAULT_SAMPLES,
+                     concurrency: int = DEFAULT_CONCURRENCY, path: str = '/',
+                     ssl_context: Optional[ssl.SSLContext] = None,
+                     timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Dict]:
+    """同时对所有 IP 采样，返回 IP -> 汇总结果"""
+    results = await asyncio.gather(*(
+        sample_ip(ip, port, host, samples, concurrency, path, ssl_context, timeout)
+        for ip in ips
+    ))
+    return dict(zip(ips, results))
+
+
+def format_breakdown(results: Dict[str, Dict], dns_ms: Optional[Dict] = None) -> List[str]:
+    """各 IP 各阶段 p50/p95 的对照表"""
+    # 中文表头占两列宽度
+    lines = [f"{'IP':<40} {'阶段':<12} {'p50':>9} {'p95':>9} {'p99':>9} {'抖动':>6}"]
+    if dns_ms:
+        lines.append(f"{'(DNS)':<40} {'dns':<14} {dns_ms['p50_ms']:>9} {dns_ms['p95_ms']:>9} {'':>9} {'':>8}")
+    for ip, result in results.items():
+        if not result['succeeded']:
+            lines.append(f"{ip:<40} 全部失败 {result.get('errors')}")
+            continue
+        for phase, stats in result['phases'].items():
+            lines.append(
+                f"{ip:<40} {phase:<14} {stats['p50_ms']:>9} {stats['p95_ms']:>9} "
+                f"{stats['p99_ms']:>9} {stats['jitter_ms']:>8}"
+            )
+    return lines
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="分解测量 TCP/TLS/HTTP 各阶段耗时")
+    parser.add_argument("host", help="域名（用于 SNI 与 Host 请求头）")
+    parser.add_argument("ips", nargs="+", help="要采样的 IP 地址")
+    parser.add_argument("--port", type=int, default=443, help="端口（默认 443）")
+    parser.add_argument("--path", default="/", help="请求路径（默认 /）")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="每个 IP 的采样次数")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="每个 IP 的并发请求数")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="单次请求超时（秒）")
+    parser.add_argument("--no-tls", action="store_true", help="使用明文 HTTP")
+    parser.add_argument("--insecure", action="store_true", help="不校验证书")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    ssl_context = None if args.no_tls else make_ssl_context(args.insecure)
+    print(f"🔍 {args.host}:{args.port}，{len(args.ips)} 个 IP 各采样 {args.samples} 次...")
+    results = asyncio.run(sample_ips(
+        args.ips, args.port, args.host, args.samples, args.concurrency,
+        args.path, ssl_context, args.timeout
+    ))
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print()
+    for line in format_breakdown(results):
+        print(line)
+    for ip, result in results.items():
+        if result['succeeded']:
+            print(f"\n{ip} 总耗时分布:")
+            for line in format_histogram(result['histograms']['total']):
+                print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,944 @@
+#!/usr/bin/env python3
+"""
+文章页面样式构建：取代浏览器端编译 class 的 Tailwind CDN 运行时
+
+- 扫描带 <!-- page-styles:模板名 --> 标记的页面，收集 class 属性与内联脚本中用到的 class
+- 为这些 class 生成 Tailwind 工具类，与 Preflight、main.css、neo-brutalism.css 合并，
+  去掉没有用到的规则，整站只输出一份带哈希的样式表 dist/page-styles/site.<hash>.css
+- 每个模板取正文之前（首屏）用到的规则作为关键 CSS 内联，
+  完整样式表与 Google Fonts 异步加载，首次渲染不再被脚本与外部 CSS 阻塞
+
+标记区域的原始内容来自 templates/partials/page-styles.html，构建后整体替换；
+未经本步骤处理的页面仍使用该局部模板中的 CDN 方案，可以正常显示。
+"""
+
+import glob
+import os
+import posixpath
+import re
+
+from asset_pipeline import HTML_GLOBS, content_hash, minify_css
+from output_writer import write_bytes, write_text
+
+PAGE_STYLES_PARTIAL = "templates/partials/page-styles.html"
+PAGE_STYLES_DIST_DIR = "dist/page-styles"
+PREFLIGHT_PATH = "styles/vendor/tailwind-preflight.css"
+
+# 标记区域：开始标记独占一行，区域内容整体替换
+PAGE_STYLES_PATTERN = re.compile(
+    r"(?P<start><!-- page-styles:(?P<name>[\w-]+) -->\n)(?P<body>.*?)(?P<end>[ \t]*<!-- /page-styles -->)",
+    re.S,
+)
+
+# 首屏内容到正文为止
+ABOVE_THE_FOLD_END = '<div class="article-content">'
+
+CLASS_ATTR_PATTERN = re.compile(r"""\bclass\s*=\s*(?:"([^"]*)"|'([^']*)')""", re.I)
+SCRIPT_PATTERN = re.compile(r"<script\b[^>]*>(.*?)</script>", re.S | re.I)
+STYLE_PATTERN = re.compile(r"<style\b[^>]*>(.*?)</style>", re.S | re.I)
+TOKEN_PATTERN = re.compile(r"[\w:./-]+")
+
+# 页面样式区域中的外部资源
+STYLESHEET_PATTERN = re.compile(r"""<link\b[^>]*\brel=["']stylesheet["'][^>]*>""", re.I)
+PRECONNECT_PATTERN = re.compile(r"""<link\b[^>]*\brel=["']preconnect["'][^>]*>""", re.I)
+HREF_PATTERN = re.compile(r"""\bhref=["']([^"']+)["']""", re.I)
+
+# 由外部样式表提供的 class（Remix Icon 图标），构建时无法检查
+EXTERNAL_CLASS_PREFIXES = ("ri-",)
+
+# 异步加载样式表：先 preload，加载完成后切换为 stylesheet
+ASYNC_STYLESHEET = (
+    '<link rel="preload" href="{href}" as="style" '
+    "onload=\"this.onload=null;this.rel='stylesheet'\">"
+)
+
+
+# ================================
+# Tailwind 工具类
+# ================================
+
+# 与 templates/partials/page-styles.html 中的 tailwind.config 保持一致
+SCREENS = {"sm": 640, "md": 768, "lg": 1024, "xl": 1280, "2xl": 1536}
+PSEUDO_VARIANTS = {
+    "hover": ":hover",
+    "focus": ":focus",
+    "focus-visible": ":focus-visible",
+    "active": ":active",
+}
+
+COLORS = {
+    "inherit": "inherit",
+    "current": "currentColor",
+    "transparent": "transparent",
+    "black": "#000",
+    "white": "#fff",
+    "gray-50": "#f9fafb",
+    "gray-100": "#f3f4f6",
+    "gray-200": "#e5e7eb",
+    "gray-300": "#d1d5db",
+    "gray-400": "#9ca3af",
+    "gray-500": "#6b7280",
+    "gray-600": "#4b5563",
+    "gray-700": "#374151",
+    "gray-800": "#1f2937",
+    "gray-900": "#111827",
+    "gray-950": "#030712",
+    "brand-black": "#0a0a0a",
+    "brand-white": "#f4f4f0",
+    "brand-accent": "#FF4D00",
+    "brand-blue": "#0047AB",
+    "brand-green": "#059669",
+    "brand-gray": "#8a8a8a",
+}
+
+FONT_FAMILIES = {
+    "sans": '"Noto Sans SC",Inter,sans-serif',
+    "serif": '"Noto Serif SC",serif',
+    "mono": '"JetBrains Mono",monospace',
+}
+
+# 字号与默认行高
+FONT_SIZES = {
+    "xs": ("0.75rem", "1rem"),
+    "sm": ("0.875rem", "1.25rem"),
+    "base": ("1rem", "1.5rem"),
+    "lg": ("1.125rem", "1.75rem"),
+    "xl": ("1.25rem", "1.75rem"),
+    "2xl": ("1.5rem", "2rem"),
+    "3xl": ("1.875rem", "2.25rem"),
+    "4xl": ("2.25rem", "2.5rem"),
+    "5xl": ("3rem", "1"),
+    "6xl": ("3.75rem", "1"),
+    "7xl": ("4.5rem", "1"),
+    "8xl": ("6rem", "1"),
+    "9xl": ("8rem", "1"),
+}
+
+FONT_WEIGHTS = {
+    "thin": 100,
+    "extralight": 200,
+    "light": 300,
+    "normal": 400,
+    "medium": 500,
+    "semibold": 600,
+    "bold": 700,
+    "extrabold": 800,
+    "black": 900,
+}
+
+LEADING = {
+    "none": "1",
+    "tight": "1.25",
+    "snug": "1.375",
+    "normal": "1.5",
+    "relaxed": "1.625",
+    "loose": "2",
+}
+
+TRACKING = {
+    "tighter": "-0.05em",
+    "tight": "-0.025em",
+    "normal": "0em",
+    "wide": "0.025em",
+    "wider": "0.05em",
+    "widest": "0.1em",
+}
+
+MAX_WIDTHS = {
+    "none": "none",
+    "xs": "20rem",
+    "sm": "24rem",
+    "md": "28rem",
+    "lg": "32rem",
+    "xl": "36rem",
+    "2xl": "42rem",
+    "3xl": "48rem",
+    "4xl": "56rem",
+    "5xl": "64rem",
+    "6xl": "72rem",
+    "7xl": "80rem",
+    "full": "100%",
+    "prose": "65ch",
+}
+
+RADII = {
+    "none": "0px",
+    "sm": "0.125rem",
+    "": "0.25rem",
+    "md": "0.375rem",
+    "lg": "0.5rem",
+    "xl": "0.75rem",
+    "2xl": "1rem",
+    "3xl": "1.5rem",
+    "full": "9999px",
+}
+
+SHADOWS = {
+    "sm": "0 1px 2px 0 rgb(0 0 0 / 0.05)",
+    "": "0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1)",
+    "md": "0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1)",
+    "lg": "0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1)",
+    "none": "0 0 #0000",
+}
+
+SPACING_KEYS = (
+    "0 0.5 1 1.5 2 2.5 3 3.5 4 5 6 7 8 9 10 11 12 14 16 20 24 28 32 36 40 44 48 52 56 60 64 72 80 96"
+).split()
+
+
+# 方向后缀对应的属性后缀；简写排在单边之前，单边的规则才能覆盖简写
+SIDES = {
+    "": ("",),
+    "x": ("-left", "-right"),
+    "y": ("-top", "-bottom"),
+    "t": ("-top",),
+    "r": ("-right",),
+    "b": ("-bottom",),
+    "l": ("-left",),
+}
+SIDE_ORDER = {"": 0, "x": 1, "y": 1, "t": 2, "r": 2, "b": 2, "l": 2}
+
+TRANSITION_TIMING = (
+    "transition-timing-function:cubic-bezier(0.4,0,0.2,1);transition-duration:150ms"
+)
+
+POSITION = {
+    "static": "position:static",
+    "fixed": "position:fixed",
+    "absolute": "position:absolute",
+    "relative": "position:relative",
+    "sticky": "position:sticky",
+}
+DISPLAY = {
+    "block": "display:block",
+    "inline-block": "display:inline-block",
+    "inline": "display:inline",
+    "flex": "display:flex",
+    "inline-flex": "display:inline-flex",
+    "table": "display:table",
+    "grid": "display:grid",
+    "hidden": "display:none",
+}
+SIZING = {
+    "h-auto": "height:auto",
+    "h-full": "height:100%",
+    "h-screen": "height:100vh",
+    "min-h-full": "min-height:100%",
+    "min-h-screen": "min-height:100vh",
+    "w-auto": "width:auto",
+    "w-full": "width:100%",
+    "w-screen": "width:100vw",
+    "min-w-0": "min-width:0px",
+}
+FLEX = {
+    "flex-1": "flex:1 1 0%",
+    "flex-auto": "flex:1 1 auto",
+    "flex-none": "flex:none",
+    "shrink-0": "flex-shrink:0",
+    "grow": "flex-grow:1",
+}
+INTERACTIVITY = {
+    "cursor-pointer": "cursor:pointer",
+    "select-none": "-webkit-user-select:none;user-select:none",
+}
+FLEX_LAYOUT = {
+    "flex-row": "flex-direction:row",
+    "flex-col": "flex-direction:column",
+    "flex-wrap": "flex-wrap:wrap",
+    "flex-nowrap": "flex-wrap:nowrap",
+    "items-start": "align-items:flex-start",
+    "items-end": "align-items:flex-end",
+    "items-center": "align-items:center",
+    "items-baseline": "align-items:baseline",
+    "items-stretch": "align-items:stretch",
+    "justify-start": "justify-content:flex-start",
+    "justify-end": "justify-content:flex-end",
+    "justify-center": "justify-content:center",
+    "justify-between": "justify-content:space-between",
+    "justify-around": "justify-content:space-around",
+    "justify-evenly": "justify-content:space-evenly",
+}
+OVERFLOW = {
+    "overflow-auto": "overflow:auto",
+    "overflow-hidden": "overflow:hidden",
+    "overflow-x-auto": "overflow-x:auto",
+    "truncate": "overflow:hidden;text-overflow:ellipsis;white-space:nowrap",
+    "whitespace-nowrap": "white-space:nowrap",
+}
+TEXT_ALIGN = {
+    "text-left": "text-align:left",
+    "text-center": "text-align:center",
+    "text-right": "text-align:right",
+    "text-justify": "text-align:justify",
+}
+TEXT_STYLE = {
+    "uppercase": "text-transform:uppercase",
+    "lowercase": "text-transform:lowercase",
+    "capitalize": "text-transform:capitalize",
+    "normal-case": "text-transform:none",
+    "italic": "font-style:italic",
+    "not-italic": "font-style:normal",
+}
+TEXT_DECORATION = {
+    "underline": "text-decoration-line:underline",
+    "line-through": "text-decoration-line:line-through",
+    "no-underline": "text-decoration-line:none",
+}
+TRANSITIONS = {
+    "transition": "transition-property:color,background-color,border-color,"
+    "text-decoration-color,fill,stroke,opacity,box-shadow,transform,filter,"
+    "backdrop-filter;" + TRANSITION_TIMING,
+    "transition-colors": "transition-property:color,background-color,border-color,"
+    "text-decoration-color,fill,stroke;" + TRANSITION_TIMING,
+    "transition-opacity": "transition-property:opacity;" + TRANSITION_TIMING,
+    "transition-transform": "transition-property:transform;" + TRANSITION_TIMING,
+}
+
+TRANSFORM = "transform:translate(var(--tw-translate-x,0),var(--tw-translate-y,0))"
+TRANSFORMS = {"transform": TRANSFORM}
+OUTLINES = {"outline-none": "outline:2px solid transparent;outline-offset:2px"}
+
+SPACE_BETWEEN_SUFFIX = " > :not([hidden]) ~ :not([hidden])"
+
+
+def spacing_value(key, negative=False, extra=None):
+    """间距刻度：数字 n 对应 n/4 rem，不在刻度中时返回 None"""
+    if key == "px":
+        value = "1px"
+    elif key == "0":
+        value = "0px"
+    elif key in SPACING_KEYS:
+        value = f"{float(key) / 4:g}rem"
+    elif extra and key in extra:
+        value = extra[key]
+    else:
+        return None
+    return f"-{value}" if negative and value not in ("0px", "auto") else value
+
+
+def static_utility(table):
+    pattern = re.compile("|".join(map(re.escape, table)))
+    return pattern, lambda m: (0, table[m.group(0)]), ""
+
+
+def lookup_utility(pattern, prop, table):
+    def build(m):
+        key = m.group("key") or ""
+        return (0, f"{prop}:{table[key]}") if key in table else None
+
+    return re.compile(pattern), build, ""
+
+
+def box_utility(pattern, prop):
+    def build(m):
+        negative = "neg" in m.groupdict() and m.group("neg") == "-"
+        value = spacing_value(m.group("key"), negative, {"auto": "auto"})
+        if value is None or (value == "auto" and prop != "margin"):
+            return None
+        side = m.group("side")
+        return SIDE_ORDER[side], ";".join(f"{prop}{s}:{value}" for s in SIDES[side])
+
+    return re.compile(pattern), build, ""
+
+
+def _inset(m):
+    extra = {"auto": "auto", "full": "100%", "1/2": "50%"}
+    value = spacing_value(m.group("key"), m.group("neg") == "-", extra)
+    if value is None:
+        return None
+    props = {
+        "inset": ("top", "right", "bottom", "left"),
+        "inset-x": ("left", "right"),
+        "inset-y": ("top", "bottom"),
+    }.get(m.group("prop"), (m.group("prop"),))
+    return len(props) == 1, ";".join(f"{p}:{value}" for p in props)
+
+
+def _size(m):
+    extra = {"1/2": "50%", "1/3": "33.333333%", "2/3": "66.666667%"}
+    value = spacing_value(m.group("key"), extra=extra)
+    prop = "height" if m.group("prop") == "h" else "width"
+    return (0, f"{prop}:{value}") if value else None
+
+
+def _line_clamp(m):
+    key = m.group("key")
+    if key == "none":
+        return (
+            0,
+            "overflow:visible;display:block;-webkit-box-orient:horizontal;-webkit-line-clamp:none",
+        )
+    return 0, (
+        "overflow:hidden;display:-webkit-box;-webkit-box-orient:vertical;"
+        f"-webkit-line-clamp:{key}"
+    )
+
+
+def _translate(m):
+    extra = {"full": "100%", "1/2": "50%"}
+    value = spacing_value(m.group("key"), m.group("neg") == "-", extra)
+    if value is None:
+        return None
+    return 0, f"--tw-translate-{m.group('axis')}:{value};{TRANSFORM}"
+
+
+def _gap(m):
+    value = spacing_value(m.group("key"))
+    if value is None:
+        return None
+    axis = m.group("axis")
+    prop = {"": "gap", "-x": "column-gap", "-y": "row-gap"}[axis]
+    return bool(axis), f"{prop}:{value}"
+
+
+def _space_between(m):
+    value = spacing_value(m.group("key"))
+    prop = "margin-left" if m.group("axis") == "x" else "margin-top"
+    return (0, f"{prop}:{value}") if value else None
+
+
+def _border_width(m):
+    width = {"": "1px", "0": "0px", "2": "2px", "4": "4px", "8": "8px"}
+    if (m.group("key") or "") not in width:
+        return None
+    side = m.group("side") or ""
+    value = width[m.group("key") or ""]
+    return SIDE_ORDER[side], ";".join(f"border{s}-width:{value}" for s in SIDES[side])
+
+
+def _color(prop):
+    def build(m):
+        key = m.group("key")
+        return (0, f"{prop}:{COLORS[key]}") if key in COLORS else None
+
+    return build
+
+
+def _font_size(m):
+    if m.group("key") not in FONT_SIZES:
+        return None
+    size, line_height = FONT_SIZES[m.group("key")]
+    return 0, f"font-size:{size};line-height:{line_height}"
+
+
+def _numeric(prop, allowed, fmt="{}"):
+    def build(m):
+        key = m.group("key")
+        return (0, f"{prop}:{fmt.format(key)}") if key in allowed else None
+
+    return build
+
+
+def _opacity(m):
+    value = int(m.group("key"))
+    if value > 100 or value % 5:
+        return None
+    return 0, f"opacity:{value / 100:g}"
+
+
+SPACING = r"(?P<key>\d+(?:\.5)?|px|auto)"
+SIDE = r"(?P<side>[xytrbl]?)"
+
+# (正则, 生成函数, 选择器后缀)，生成函数返回 (组内顺序, 声明)；
+# 列表顺序即输出顺序（与 Tailwind 一致），后面的工具类可以覆盖前面的
+UTILITIES = [
+    static_utility(POSITION),
+    (
+        re.compile(
+            r"(?P<neg>-?)(?P<prop>inset-x|inset-y|inset|top|right|bottom|left)-"
+            r"(?P<key>\d+(?:\.5)?|px|auto|full|1/2)"
+        ),
+        _inset,
+        "",
+    ),
+    (
+        re.compile(r"z-(?P<key>\d+|auto)"),
+        _numeric("z-index", {"0", "10", "20", "30", "40", "50", "auto"}),
+        "",
+    ),
+    box_utility(rf"(?P<neg>-?)m{SIDE}-{SPACING}", "margin"),
+    (re.compile(r"line-clamp-(?P<key>[1-6]|none)"), _line_clamp, ""),
+    static_utility(DISPLAY),
+    (re.compile(r"(?P<prop>[hw])-(?P<key>\d+(?:\.5)?|px|1/2|1/3|2/3)"), _size, ""),
+    static_utility(SIZING),
+    lookup_utility(r"max-w-(?P<key>[\w-]+)", "max-width", MAX_WIDTHS),
+    static_utility(FLEX),
+    (
+        re.compile(
+            r"(?P<neg>-?)translate-(?P<axis>[xy])-(?P<key>\d+(?:\.5)?|px|full|1/2)"
+        ),
+        _translate,
+        "",
+    ),
+    static_utility(TRANSFORMS),
+    static_utility(INTERACTIVITY),
+    (
+        re.compile(r"grid-cols-(?P<key>\d+)"),
+        _numeric(
+            "grid-template-columns",
+            set(map(str, range(1, 13))),
+            "repeat({},minmax(0,1fr))",
+        ),
+        "",
+    ),
+    (
+        re.compile(r"col-span-(?P<key>\d+)"),
+        _numeric("grid-column", set(map(str, range(1, 13))), "span {0}/span {0}"),
+        "",
+    ),
+    static_utility(FLEX_LAYOUT),
+    (re.compile(r"gap(?P<axis>|-x|-y)-(?P<key>\d+(?:\.5)?|px)"), _gap, ""),
+    (
+        re.compile(r"space-(?P<axis>[xy])-(?P<key>\d+(?:\.5)?|px)"),
+        _space_between,
+        SPACE_BETWEEN_SUFFIX,
+    ),
+    static_utility(OVERFLOW),
+    lookup_utility(r"rounded(?:-(?P<key>\w+))?", "border-radius", RADII),
+    (re.compile(r"border(?:-(?P<side>[xytrbl]))?(?:-(?P<key>\d))?"), _border_width, ""),
+    (re.compile(r"border-(?P<key>[\w-]+)"), _color("border-color"), ""),
+    (re.compile(r"bg-(?P<key>[\w-]+)"), _color("background-color"), ""),
+    box_utility(rf"p{SIDE}-{SPACING}", "padding"),
+    static_utility(TEXT_ALIGN),
+    lookup_utility(r"font-(?P<key>sans|serif|mono)", "font-family", FONT_FAMILIES),
+    (re.compile(r"text-(?P<key>\w+)"), _font_size, ""),
+    lookup_utility(r"font-(?P<key>\w+)", "font-weight", FONT_WEIGHTS),
+    static_utility(TEXT_STYLE),
+    lookup_utility(r"leading-(?P<key>\w+)", "line-height", LEADING),
+    lookup_utility(r"tracking-(?P<key>\w+)", "letter-spacing", TRACKING),
+    (re.compile(r"text-(?P<key>[\w-]+)"), _color("color"), ""),
+    static_utility(TEXT_DECORATION),
+    (re.compile(r"opacity-(?P<key>\d+)"), _opacity, ""),
+    lookup_utility(r"shadow(?:-(?P<key>\w+))?", "box-shadow", SHADOWS),
+    static_utility(OUTLINES),
+    static_utility(TRANSITIONS),
+    (
+        re.compile(r"duration-(?P<key>\d+)"),
+        _numeric(
+            "transition-duration",
+            {"75", "100", "150", "200", "300", "500", "700", "1000"},
+            "{}ms",
+        ),
+        "",
+    ),
+]
+
+
+def escape_class(name):
+    """class 名转为 CSS 选择器（转义 : / . 等字符与开头的数字）"""
+    escaped = re.sub(r"([^\w-])", r"\\\1", name)
+    if escaped[0].isdigit():
+        escaped = f"\\3{escaped[0]} {escaped[1:]}"
+    return escaped
+
+
+def parse_variants(name):
+    """拆分变体前缀，返回 (断点, 伪类, 工具类)；包含不支持的变体时返回 None"""
+    *variants, utility = name.split(":")
+    screen, pseudo = None, ""
+    for variant in variants:
+        if variant in SCREENS and screen is None and not pseudo:
+            screen = variant
+        elif variant in PSEUDO_VARIANTS:
+            pseudo += PSEUDO_VARIANTS[variant]
+        else:
+            return None
+    return screen, pseudo, utility
+
+
+def utility_rule(utility):
+    """返回 (排序键, 声明, 选择器后缀)；不是支持的工具类时返回 None"""
+    for index, (pattern, build, suffix) in enumerate(UTILITIES):
+        match = pattern.fullmatch(utility)
+        if match:
+            result = build(match)
+            if result:
+                return (index, result[0]), result[1], suffix
+    return None
+
+
+def container_css():
+    """Tailwind 的 .container 组件：宽度 100%，各断点下限制最大宽度"""
+    return ".container{width:100%}" + "".join(
+        f"@media (min-width:{width}px){{.container{{max-width:{width}px}}}}"
+        for width in SCREENS.values()
+    )
+
+
+def tailwind_css(classes):
+    """为用到的 class 生成 Tailwind CSS：组件在前，工具类按断点分组，断点规则在后"""
+    screen_order = [None] + list(SCREENS)
+    rules = []
+    for name in classes:
+        variants = parse_variants(name)
+        if variants is None:
+            continue
+        screen, pseudo, utility = variants
+        rule = utility_rule(utility)
+        if rule is None:
+            continue
+        key, declarations, suffix = rule
+        selector = f".{escape_class(name)}{pseudo}{suffix}"
+        rules.append(
+            (
+                screen_order.index(screen),
+                bool(pseudo),
+                key,
+                name,
+                screen,
+                selector,
+                declarations,
+            )
+        )
+    rules.sort(key=lambda r: r[:4])
+
+    css = [container_css()] if "container" in classes else []
+    blocks = {}
+    for *_, screen, selector, declarations in rules:
+        blocks.setdefault(screen, []).append(f"{selector}{{{declarations}}}")
+    for screen, block in blocks.items():
+        if screen is None:
+            css.extend(block)
+        else:
+            css.append(f"@media (min-width:{SCREENS[screen]}px){{{''.join(block)}}}")
+    return "".join(css)
+
+
+# ================================
+# CSS 规则树与清理
+# ================================
+
+NOT_PATTERN = re.compile(r":not\([^()]*\)")
+ATTRIBUTE_PATTERN = re.compile(r"\[[^\]]*\]")
+CLASS_SELECTOR_PATTERN = re.compile(r"\.((?:\\[0-9a-fA-F]{1,6} ?|\\.|[\w-])+)")
+CSS_ESCAPE_PATTERN = re.compile(r"\\([0-9a-fA-F]{1,6}) ?|\\(.)")
+GROUP_AT_RULE_PATTERN = re.compile(r"@(?:media|supports|layer|container)\b", re.I)
+
+# 关键 CSS 中不需要的条件规则
+CRITICAL_SKIP_PATTERN = re.compile(r"@media\s+print\b", re.I)
+
+
+def _skip_string(css, i):
+    quote = css[i]
+    i += 1
+    while i < len(css) and css[i] != quote:
+        i += 2 if css[i] == "\\" else 1
+    return i + 1
+
+
+def _find(css, i, stops):
+    """从 i 开始查找不在字符串与括号中的 stops 字符，找不到时返回 len(css)"""
+    depth = 0
+    while i < len(css):
+        c = css[i]
+        if c in "\"'":
+            i = _skip_string(css, i)
+            continue
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif depth == 0 and c in stops:
+            return i
+        i += 1
+    return len(css)
+
+
+def _block_end(css, i):
+    """i 为 "{" 之后的位置，返回与之匹配的 "}" 的位置"""
+    depth = 1
+    while i < len(css):
+        c = css[i]
+        if c in "\"'":
+            i = _skip_string(css, i)
+            continue
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    raise ValueError("CSS 花括号不匹配")
+
+
+def parse_css(css):
+    """把压缩后的 CSS 解析为规则列表
+
+    ("rule", 选择器, 声明) / ("group", @media 等条件, 子规则) / ("raw", 原文：@keyframes、@font-face 等)
+    """
+    rules = []
+    i = 0
+    while i < len(css):
+        j = _find(css, i, "{;}")
+        prelude = css[i:j].strip()
+        if j == len(css) or css[j] != "{":
+            if prelude:
+                rules.append(("raw", prelude + ";"))
+            i = j + 1
+            continue
+        end = _block_end(css, j + 1)
+        body = css[j + 1 : end]
+        if GROUP_AT_RULE_PATTERN.match(prelude):
+            rules.append(("group", prelude, parse_css(body)))
+        elif prelude.startswith("@"):
+            rules.append(("raw", f"{prelude}{{{body}}}"))
+        else:
+            rules.append(("rule", prelude, body))
+        i = end + 1
+    return rules
+
+
+def serialize_css(rules):
+    out = []
+    for rule in rules:
+        if rule[0] == "rule":
+            out.append(f"{rule[1]}{{{rule[2]}}}")
+        elif rule[0] == "group":
+            out.append(f"{rule[1]}{{{serialize_css(rule[2])}}}")
+        else:
+            out.append(rule[1])
+    return "".join(out)
+
+
+def split_selectors(selector_list):
+    selectors = []
+    i = 0
+    while i < len(selector_list):
+        j = _find(selector_list, i, ",")
+        selectors.append(selector_list[i:j].strip())
+        i = j + 1
+    return selectors
+
+
+def selector_classes(selector):
+    """选择器要求元素具有的 class（:not() 与属性选择器中的不算）"""
+    selector = ATTRIBUTE_PATTERN.sub("", NOT_PATTERN.sub("", selector))
+    return {
+        CSS_ESCAPE_PATTERN.sub(
+            lambda m: chr(int(m.group(1), 16)) if m.group(1) else m.group(2), name
+        ).rstrip()
+        for name in CLASS_SELECTOR_PATTERN.findall(selector)
+    }
+
+
+def stylesheet_classes(rules):
+    """样式规则的选择器中出现的全部 class"""
+    names = set()
+    for rule in rules:
+        if rule[0] == "rule":
+            for selector in split_selectors(rule[1]):
+                names |= selector_classes(selector)
+        elif rule[0] == "group":
+            names |= stylesheet_classes(rule[2])
+    return names
+
+
+def purge_rules(rules, is_used, skip=None):
+    """去掉引用了未使用 class 的选择器，删空的规则与条件块一并去掉"""
+    kept = []
+    for rule in rules:
+        if rule[0] == "rule":
+            selectors = [
+                s
+                for s in split_selectors(rule[1])
+                if all(map(is_used, selector_classes(s)))
+            ]
+            if selectors:
+                kept.append(("rule", ",".join(selectors), rule[2]))
+        elif rule[0] == "group":
+            if skip and skip.match(rule[1]):
+                continue
+            children = purge_rules(rule[2], is_used, skip)
+            if children:
+                kept.append(("group", rule[1], children))
+        else:
+            kept.append(rule)
+    return kept
+
+
+# ================================
+# 页面扫描与改写
+# ================================
+
+
+def attribute_classes(text):
+    """页面 class 属性中的全部 class"""
+    classes = set()
+    for match in CLASS_ATTR_PATTERN.finditer(text):
+        classes.update((match.group(1) or match.group(2)).split())
+    return classes
+
+
+def page_tokens(text):
+    """页面中可能作为 class 使用的词：class 属性的值与内联脚本中的词"""
+    tokens = attribute_classes(text)
+    for script in SCRIPT_PATTERN.findall(text):
+        tokens.update(TOKEN_PATTERN.findall(script))
+    return tokens
+
+
+def class_matcher(tokens):
+    """判断 class 是否被使用；脚本中以 "-" 结尾的词（如 'toc-' + tag）视为动态 class 前缀"""
+    prefixes = tuple(
+        t for t in tokens if t.endswith("-") and t[0].isalpha() and len(t) > 2
+    )
+    return lambda name: name in tokens or name.startswith(prefixes)
+
+
+def normalize_page_styles(text):
+    """清空页面样式区域，构建前后的页面内容可以直接比较"""
+    return PAGE_STYLES_PATTERN.sub(lambda m: m.group("start") + m.group("end"), text)
+
+
+def scan_page(text):
+    """返回 (全页用到的词, 首屏用到的词)；页面样式区域本身不参与扫描"""
+    text = normalize_page_styles(text)
+    tokens = page_tokens(text)
+    fold = text.find(ABOVE_THE_FOLD_END)
+    above_the_fold = text if fold < 0 else text[:fold]
+    # 脚本切换的状态 class（如 .reveal.active）在首屏同样需要
+    scripts = {
+        t
+        for script in SCRIPT_PATTERN.findall(text)
+        for t in TOKEN_PATTERN.findall(script)
+    }
+    return tokens, page_tokens(above_the_fold) | scripts
+
+
+def load_page_styles_partial(path=PAGE_STYLES_PARTIAL):
+    """从局部模板中读取预连接、外部字体样式表与本地样式表"""
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    hrefs = [
+        HREF_PATTERN.search(tag).group(1) for tag in STYLESHEET_PATTERN.findall(source)
+    ]
+    remote = [h for h in hrefs if re.match(r"^https?://", h)]
+    local = [h for h in hrefs if h not in remote]
+    return PRECONNECT_PATTERN.findall(source), remote, local
+
+
+def read_css(path, out_dir):
+    with open(path, "r", encoding="utf-8") as f:
+        return minify_css(f.read(), posixpath.dirname(path), out_dir)
+
+
+def combined_css(sources, tokens, out_dir):
+    """Preflight、用到的 Tailwind 工具类与本地样式表合并后的完整 CSS"""
+    css = read_css(PREFLIGHT_PATH, out_dir) + tailwind_css(tokens)
+    return css + "".join(read_css(path, out_dir) for path in sources)
+
+
+def build_stylesheet(sources, tokens, out_dir, skip=None):
+    """合并 Preflight、Tailwind 工具类与本地样式表，并去掉未使用的规则"""
+    css = combined_css(sources, tokens, out_dir)
+    return serialize_css(purge_rules(parse_css(css), class_matcher(tokens), skip))
+
+
+def report_unstyled_classes(classes, css):
+    """列出 class 属性中没有任何样式规则的 class 并打印警告
+
+    多为 Tailwind 子集不支持的工具类或变体：页面不再加载 Tailwind CDN，
+    这些 class 不会生效，需要在 UTILITIES 中补充或改用已支持的写法。
+    """
+    unstyled = sorted(
+        name
+        for name in classes - stylesheet_classes(parse_css(css))
+        if not name.startswith(EXTERNAL_CLASS_PREFIXES)
+    )
+    if unstyled:
+        print(f"⚠️  {len(unstyled)} 个 class 没有对应的样式: {' '.join(unstyled)}")
+    return unstyled
+
+
+def page_styles_block(preconnects, stylesheets, critical, indent="    "):
+    """替换后的页面样式区域：预连接、内联关键 CSS、异步加载的完整样式表"""
+    lines = list(preconnects)
+    lines.append(f"<style>{critical}</style>")
+    lines.extend(ASYNC_STYLESHEET.format(href=href) for href in stylesheets)
+    lines.append(
+        "<noscript>"
+        + "".join(f'<link rel="stylesheet" href="{href}">' for href in stylesheets)
+        + "</noscript>"
+    )
+    return "".join(f"{indent}{line}\n" for line in lines)
+
+
+def build_page_styles(html_globs=HTML_GLOBS, dist_dir=PAGE_STYLES_DIST_DIR):
+    """生成整站样式表与各模板的关键 CSS，并改写带标记的页面，返回更新的页面数
+
+    上一次构建的样式表保留到下一次构建，更早的样式表删除。
+    """
+    pages = {}
+    for pattern in html_globs:
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            if PAGE_STYLES_PATTERN.search(text):
+                pages[path] = text
+    if not pages:
+        print("⚠️  没有找到带页面样式标记的页面")
+        return 0
+
+    # 改写前页面引用的样式表（上一次构建的）保留一个构建周期：
+    # HTTP 或 Service Worker 缓存中的旧页面仍引用它，立即删除会导致这些页面丢失样式
+    previous_pattern = re.compile(re.escape(dist_dir) + r'/[^"\s]+')
+    previous = {
+        href
+        for text in pages.values()
+        for match in PAGE_STYLES_PATTERN.finditer(text)
+        for href in previous_pattern.findall(match.group("body"))
+    }
+
+    tokens = set()
+    # class 属性中的 class 与页面内联样式，用于检查没有样式的 class
+    classes = set()
+    inline_css = []
+    for text in pages.values():
+        text = normalize_page_styles(text)
+        classes |= attribute_classes(text)
+        inline_css.extend(STYLE_PATTERN.findall(text))
+
+    critical_tokens = {}
+    for text in pages.values():
+        page, above_the_fold = scan_page(text)
+        tokens |= page
+        for match in PAGE_STYLES_PATTERN.finditer(text):
+            critical_tokens.setdefault(match.group("name"), set()).update(
+                above_the_fold
+            )
+
+    preconnects, remote, local = load_page_styles_partial()
+    report_unstyled_classes(
+        classes, combined_css(local, classes, dist_dir) + "".join(inline_css)
+    )
+    stylesheet = build_stylesheet(local, tokens, dist_dir).encode("utf-8")
+    output = posixpath.join(dist_dir, f"site.{content_hash(stylesheet)}.css")
+    write_bytes(output, stylesheet)
+    for filename in os.listdir(dist_dir):
+        path = posixpath.join(dist_dir, filename)
+        if path != output and path not in previous:
+            os.remove(path)
+            print(f"  🗑️  已删除旧样式表: {path}")
+    print(f"✅ {output} ({len(stylesheet)} 字节，{len(pages)} 个页面)")
+
+    blocks = {}
+    for name, above_the_fold in sorted(critical_tokens.items()):
+        critical = build_stylesheet(local, above_the_fold, ".", CRITICAL_SKIP_PATTERN)
+        blocks[name] = page_styles_block(preconnects, remote + [output], critical)
+        print(f"✅ 关键 CSS [{name}]: {len(critical.encode('utf-8'))} 字节")
+
+    updated = 0
+    for path, text in pages.items():
+        new_text = PAGE_STYLES_PATTERN.sub(
+            lambda m: m.group("start") + blocks[m.group("name")] + m.group("end"), text
+        )
+        if new_text != text and write_text(path, new_text):
+            updated += 1
+    print(f"✅ 已更新 {updated} 个页面")
+    return updated
+
+
+if __name__ == "__main__":
+    print("🚀 开始构建页面样式...")
+    build_page_styles()
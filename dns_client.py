@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+轻量 DNS 客户端 - 直接向指定 DNS 服务器发送查询并计时
+
+- 手工构造与解析 DNS 报文（A/AAAA，支持 CNAME 链与名称压缩），附带 EDNS0 以减少截断
+- UDP 查询，响应被截断（TC 位）时改用 TCP 重新查询
+- 基于 asyncio，多个服务器的查询并发进行，每个服务器采样 N 次，统计 p50/p95 与应答集合
+
+用法:
+    python dns_client.py www.baidu.com
+    python dns_client.py example.com --server 127.0.0.1:5353 --samples 20 --type AAAA
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import random
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+from latency_stats import percentile
+
+DNS_PORT = 53
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_SAMPLES = 5
+
+# 公共 DNS 服务器，'默认' 为系统配置的第一个服务器
+PUBLIC_RESOLVERS = {
+    '阿里DNS': '223.5.5.5',
+    '腾讯DNS': '119.29.29.29',
+    'Cloudflare': '1.1.1.1',
+    'Google': '8.8.8.8'
+}
+
+QTYPES = {'A': 1, 'CNAME': 5, 'AAAA': 28}
+QTYPE_NAMES = {value: name for name, value in QTYPES.items()}
+OPT_TYPE = 41
+EDNS_PAYLOAD_SIZE = 1232
+
+RCODES = {0: 'NOERROR', 1: 'FORMERR', 2: 'SERVFAIL', 3: 'NXDOMAIN', 4: 'NOTIMP', 5: 'REFUSED'}
+
+
+class DNSError(Exception):
+    """DNS 查询失败（超时、报文错误等）"""
+
+
+# ================================
+# 报文构造与解析
+# ================================
+
+def build_query(name: str, qtype: str = 'A', query_id: Optional[int] = None) -> Tuple[int, bytes]:
+    """构造查询报文（RD=1，带 EDNS0 OPT 记录），返回 (查询 ID, 报文)"""
+    if query_id is None:
+        query_id = random.getrandbits(16)
+    header = struct.pack('!HHHHHH', query_id, 0x0100, 1, 0, 0, 1)
+    qname = b''.join(
+        bytes([len(label)]) + label
+        for label in name.rstrip('.').encode('idna').split(b'.')
+        if label
+    ) + b'\x00'
+    question = qname + struct.pack('!HH', QTYPES[qtype], 1)
+    opt = b'\x00' + struct.pack('!HHIH', OPT_TYPE, EDNS_PAYLOAD_SIZE, 0, 0)
+    return query_id, header + question + opt
+
+
+def read_name(packet: bytes, offset: int) -> Tuple[str, int]:
+    """读取（可能被压缩的）域名，返回 (域名, 名称之后的偏移)"""
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        if offset >= len(packet):
+            raise DNSError('报文被截断')
+        length = packet[offset]
+        if length & 0xC0 == 0xC0:
+            if offset + 1 >= len(packet):
+                raise DNSError('报文被截断')
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | packet[offset + 1]
+            jumps += 1
+            if jumps > 32:
+                raise DNSError('名称压缩指针循环')
+            continue
+        if length == 0:
+            offset += 1
+            break
+        labels.append(packet[offset + 1:offset + 1 + length].decode('ascii', errors='replace'))
+        offset += 1 + length
+    return '.'.join(labels), end if end is not None else offset
+
+
+def parse_response(packet: bytes) -> Dict:
+    """解析响应报文，返回 ID、标志与应答记录 [(类型, 值, TTL)]"""
+    if len(packet) < 12:
+        raise DNSError('报文过短')
+    query_id, flags, qdcount, ancount, _, _ = struct.unpack('!HHHHHH', packet[:12])
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = read_name(packet, offset)
+        offset += 4
+
+    answers = []
+    for _ in range(ancount):
+        _, offset = read_name(packet, offset)
+        if offset + 10 > len(packet):
+            raise DNSError('报文被截断')
+        rtype, _, ttl, rdlength = struct.unpack('!HHIH', packet[offset:offset + 10])
+        offset += 10
+        rdata = packet[offset:offset + rdlength]
+        if rtype == QTYPES['A'] and rdlength == 4:
+            answers.append(('A', socket.inet_ntop(socket.AF_INET, rdata), ttl))
+        elif rtype == QTYPES['AAAA'] and rdlength == 16:
+            answers.append(('AAAA', socket.inet_ntop(socket.AF_INET6, rdata), ttl))
+        elif rtype == QTYPES['CNAME']:
+            answers.append(('CNAME', read_name(packet, offset)[0], ttl))
+        offset += rdlength
+
+    return {
+        'id': query_id,
+        'rcode': RCODES.get(flags & 0x0F, str(flags & 0x0F)),
+        'truncated': bool(flags & 0x0200),
+        'answers': answers
+    }
+
+
+# ================================
+# 查询
+# ================================
+
+class _UDPQueryProtocol(asyncio.DatagramProtocol):
+    """等待与查询 ID 匹配的第一个响应，并记录收到响应的时间"""
+
+    def __init__(self, query_id: int, future: asyncio.Future):
+        self.prefix = struct.pack('!H', query_id)
+        self.future = future
+        self.received_ns = None
+
+    def datagram_received(self, data, addr):
+        if data[:2] == self.prefix and not self.future.done():
+            self.received_ns = time.perf_counter_ns()
+            self.future.set_result(data)
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+async def _query_udp(server: str, port: int, packet: bytes, query_id: int, timeout: float) -> Tuple[bytes, int]:
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    transport, protocol = await loop.create_datagram_endpoint(
+        lambda: _UDPQueryProtocol(query_id, future),
+        remote_addr=(server, port)
+    )
+    try:
+        transport.sendto(packet)
+        data = await asyncio.wait_for(future, timeout)
+        return data, protocol.received_ns
+    finally:
+        transport.close()
+
+
+async def _query_tcp(server: str, port: int, packet: bytes, timeout: float) -> Tuple[bytes, int]:
+    async def exchange():
+        reader, writer = await asyncio.open_connection(server, port)
+        try:
+            writer.write(struct.pack('!H', len(packet)) + packet)
+            await writer.drain()
+            length = struct.unpack('!H', await reader.readexactly(2))[0]
+            data = await reader.readexactly(length)
+            return data, time.perf_counter_ns()
+        finally:
+            writer.close()
+
+    return await asyncio.wait_for(exchange(), timeout)
+
+
+async def query(server: str, name: str, qtype: str = 'A', port: int = DNS_PORT,
+                timeout: float = DEFAULT_TIMEOUT) -> Dict:
+    """向 server 查询一次，返回解析结果与耗时（UDP 响应被截断时改用 TCP）"""
+    query_id, packet = build_query(name, qtype)
+    start = time.perf_counter_ns()
+    try:
+        data, received_ns = await _query_udp(server, port, packet, query_id, timeout)
+        response = parse_response(data)
+        transport = 'udp'
+        if response['truncated']:
+            data, received_ns = await _query_tcp(server, port, packet, timeout)
+            response = parse_response(data)
+            transport = 'tcp'
+    except asyncio.TimeoutError:
+        raise DNSError(f'查询超时 ({timeout:g}s)')
+    except (OSError, asyncio.IncompleteReadError, struct.error) as e:
+        raise DNSError(str(e) or type(e).__name__)
+    if response['id'] != query_id:
+        raise DNSError('响应 ID 不匹配')
+
+    response['elapsed_ms'] = (received_ns - start) / 1e6
+    response['transport'] = transport
+    return response
+
+
+def system_resolvers(path: str = '/etc/resolv.conf') -> List[str]:
+    """系统配置的 DNS 服务器（resolv.conf 中的 nameserver）"""
+    servers = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == 'nameserver':
+                    try:
+                        ipaddress.ip_address(parts[1].split('%')[0])
+                        servers.append(parts[1])
+                    except ValueError:
+                        pass
+    except OSError:
+        pass
+    return servers
+
+
+def default_resolvers() -> Dict[str, str]:
+    """系统默认服务器（如有）与公共 DNS 服务器"""
+    resolvers = {}
+    system = system_resolvers()
+    if system:
+        resolvers['默认'] = system[0]
+    resolvers.update(PUBLIC_RESOLVERS)
+    return resolvers
+
+
+def parse_server(value: str) -> Tuple[str, int]:
+    """解析 host、host:port 或 [IPv6]:port"""
+    if value.startswith('['):
+        host, _, port = value[1:].partition(']:')
+        return host.rstrip(']'), int(port) if port else DNS_PORT
+    if value.count(':') == 1:
+        host, port = value.split(':')
+        return host, int(port)
+    return value, DNS_PORT
+
+
+async def sample_resolver(server: str, name: str, qtypes: Tuple[str, ...] = ('A',),
+                          samples: int = DEFAULT_SAMPLES, port: int = DNS_PORT,
+                          timeout: float = DEFAULT_TIMEOUT) -> Dict:
+    """对一个服务器依次查询 samples 轮（每轮查询各记录类型），统计延迟与应答集合"""
+    latencies = []
+    errors = {}
+    answers = {qtype: set() for qtype in qtypes}
+    rcodes = set()
+    transports = set()
+
+    for _ in range(samples):
+        for qtype in qtypes:
+            try:
+                response = await query(server, name, qtype, port, timeout)
+            except DNSError as e:
+                errors[str(e)] = errors.get(str(e), 0) + 1
+                continue
+            latencies.append(response['elapsed_ms'])
+            rcodes.add(response['rcode'])
+            transports.add(response['transport'])
+            for rtype, value, _ in response['answers']:
+                if rtype == qtype:
+                    answers[qtype].add(value)
+
+    result = {
+        'server': server if port == DNS_PORT else f'{server}:{port}',
+        'queries': samples * len(qtypes),
+        'failures': sum(errors.values()),
+        'answers': {qtype: sorted(values) for qtype, values in answers.items()},
+        'rcodes': sorted(rcodes),
+        'transports': sorted(transports)
+    }
+    if latencies:
+        result.update({
+            'min_ms': round(min(latencies), 2),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'max_ms': round(max(latencies), 2),
+            'avg_ms': round(sum(latencies) / len(latencies), 2)
+        })
+    if errors:
+        result['errors'] = errors
+    return result
+
+
+async def sample_resolvers(resolvers: Dict[str, str], name: str, qtypes: Tuple[str, ...] = ('A',),
+                           samples: int = DEFAULT_SAMPLES, timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Dict]:
+    """并发测试多个服务器（resolvers 为 名称 -> host[:port]），返回 名称 -> 统计结果"""
+    servers = [parse_server(server) for server in resolvers.values()]
+    results = await asyncio.gather(*(
+        sample_resolver(host, name, qtypes, samples, port, timeout)
+        for host, port in servers
+    ))
+    return dict(zip(resolvers, results))
+
+
+def fastest_resolver(results: Dict[str, Dict]) -> Optional[str]:
+    """p50 延迟最低且有应答的服务器名称"""
+    answered = {
+        name: r for name, r in results.items()
+        if 'p50_ms' in r and any(r['answers'].values())
+    }
+    if not answered:
+        return None
+    return min(answered, key=lambda name: answered[name]['p50_ms'])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="向多个 DNS 服务器并发查询并统计延迟")
+    parser.add_argument("name", help="查询的域名")
+    parser.add_argument(
+        "--server",
+        action="append",
+        help="DNS 服务器 host[:port]，可重复指定（默认为系统与公共 DNS 服务器）",
+    )
+    parser.add_argument("--type", action="append", choices=sorted(QTYPES), help="记录类型（默认 A）")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="每个服务器的查询轮数")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="单次查询超时（秒）")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    resolvers = {server: server for server in args.server} if args.server else default_resolvers()
+    qtypes = tuple(args.type or ['A'])
+    print(f"🔍 查询 {args.name} ({', '.join(qtypes)})，{len(resolvers)} 个服务器各 {args.samples} 轮...")
+    results = asyncio.run(sample_resolvers(resolvers, args.name, qtypes, args.samples, args.timeout))
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    fastest = fastest_resolver(results)
+    if fastest:
+        print(f"✅ 最快: {fastest} (p50 {results[fastest]['p50_ms']}ms)")
+    else:
+        print("❌ 没有服务器返回应答")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,12 @@
 
 import os
 import re
-import requests
 from datetime import datetime
 
+from notion_api import NotionClient
+from notion_ir import blocks_to_ir, load_ir_cache, render_markdown, save_ir_cache
+from output_writer import write_text
+
 # Notion API 配置
 NOTION_TOKEN = os.environ.get("NOTION_TOKEN", "")
 DATABASE_ID = os.environ.get("NOTION_DATABASE_ID", "")
@@ -15,12 +18,8 @@ DATABASE_ID = os.environ.get("NOTION_DATABASE_ID", "")
 # Obsidian 目录路径
 OBSIDIAN_PATH = "/Users/liran/Library/Mobile Documents/iCloud~md~obsidian/Documents/个人博客网站/Articles"
 
-NOTION_VERSION = "2022-06-28"
-HEADERS = {
-    "Authorization": f"Bearer {NOTION_TOKEN}",
-    "Notion-Version": NOTION_VERSION,
-    "Content-Type": "application/json",
-}
+# 共享的 Notion 客户端（连接池、超时、重试、限速）
+notion = NotionClient(NOTION_TOKEN)
 
 # 分类映射
 CATEGORY_MAP = {
@@ -32,44 +31,20 @@ CATEGORY_MAP = {
 }
 
 
-def query_database():
-    """查询 Notion 数据库获取所有已发布的文章"""
-    url = f"https://api.notion.com/v1/databases/{DATABASE_ID}/query"
-
-    payload = {
-        "filter": {"property": "已发布", "checkbox": {"equals": True}},
-        "sorts": [{"property": "发布日期", "direction": "descending"}],
-    }
-
-    response = requests.post(url, headers=HEADERS, json=payload)
-    response.raise_for_status()
-    return response.json()["results"]
+def query_database(page_size=100, edited_after=None):
+    """分页查询 Notion 数据库，惰性地逐条产出已发布的文章"""
+    return notion.iter_database(
+        DATABASE_ID,
+        filter={"property": "已发布", "checkbox": {"equals": True}},
+        sorts=[{"property": "发布日期", "direction": "descending"}],
+        page_size=page_size,
+        edited_after=edited_after,
+    )
 
 
 def get_page_content(page_id):
     """获取页面内容（blocks），支持分页获取"""
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-    all_blocks = []
-    start_cursor = None
-
-    while True:
-        params = {}
-        if start_cursor:
-            params["start_cursor"] = start_cursor
-
-        response = requests.get(url, headers=HEADERS, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        all_blocks.extend(data["results"])
-
-        # 检查是否还有更多内容
-        if not data.get("has_more"):
-            break
-
-        start_cursor = data.get("next_cursor")
-
-    return all_blocks
+    return list(notion.iter_block_children(page_id))
 
 
 def plain_text(rich_text):
@@ -77,94 +52,6 @@ def plain_text(rich_text):
     return "".join([text["plain_text"] for text in rich_text])
 
 
-def rich_text_to_markdown(rich_text):
-    """将 Notion rich text 转换为 Markdown"""
-    md = ""
-    for text in rich_text:
-        content = text["plain_text"]
-
-        # Markdown 特殊字符转义（但不破坏已有的 Markdown 格式）
-        # 只转义可能会干扰格式的字符
-        content = content.replace("*", "\\*")  # 转义星号（如果用于斜体/粗体）
-
-        annotations = text.get("annotations", {})
-
-        # 应用格式
-        if annotations.get("code"):
-            content = f"`{content}`"
-        else:
-            if annotations.get("bold"):
-                content = f"**{content}**"
-            if annotations.get("italic"):
-                content = f"*{content}*"
-            if annotations.get("strikethrough"):
-                content = f"~~{content}~~"
-            if annotations.get("underline"):
-                content = f"<u>{content}</u>"
-
-        # 处理链接
-        if text.get("href"):
-            content = f"[{content}]({text['href']})"
-
-        md += content
-
-    return md
-
-
-def block_to_markdown(block):
-    """将 Notion block 转换为 Markdown"""
-    block_type = block["type"]
-
-    if block_type == "paragraph":
-        text = rich_text_to_markdown(block["paragraph"]["rich_text"])
-        return f"{text}\n\n"
-
-    elif block_type == "heading_1":
-        text = rich_text_to_markdown(block["heading_1"]["rich_text"])
-        return f"# {text}\n\n"
-
-    elif block_type == "heading_2":
-        text = rich_text_to_markdown(block["heading_2"]["rich_text"])
-        return f"## {text}\n\n"
-
-    elif block_type == "heading_3":
-        text = rich_text_to_markdown(block["heading_3"]["rich_text"])
-        return f"### {text}\n\n"
-
-    elif block_type == "bulleted_list_item":
-        text = rich_text_to_markdown(block["bulleted_list_item"]["rich_text"])
-        return f"- {text}\n"
-
-    elif block_type == "numbered_list_item":
-        text = rich_text_to_markdown(block["numbered_list_item"]["rich_text"])
-        return f"1. {text}\n"
-
-    elif block_type == "quote":
-        text = rich_text_to_markdown(block["quote"]["rich_text"])
-        return f"> {text}\n\n"
-
-    elif block_type == "code":
-        text = plain_text(block["code"]["rich_text"])
-        language = block["code"].get("language", "")
-        return f"```{language}\n{text}\n```\n\n"
-
-    elif block_type == "divider":
-        return "---\n\n"
-
-    elif block_type == "callout":
-        text = rich_text_to_markdown(block["callout"]["rich_text"])
-        emoji = block["callout"].get("icon", {}).get("emoji", "💡")
-        return f"> {emoji} {text}\n\n"
-
-    elif block_type == "to_do":
-        text = rich_text_to_markdown(block["to_do"]["rich_text"])
-        checked = block["to_do"].get("checked", False)
-        checkbox = "[x]" if checked else "[ ]"
-        return f"- {checkbox} {text}\n"
-
-    return ""
-
-
 def get_property_value(properties, prop_name):
     """从 properties 中提取值"""
     prop = properties.get(prop_name, {})
@@ -220,7 +107,7 @@ def generate_markdown_frontmatter(article_data):
     return frontmatter
 
 
-def generate_markdown_content(article_data, blocks):
+def generate_markdown_content(article_data, nodes):
     """生成完整的 Markdown 内容"""
     md_content = ""
 
@@ -234,33 +121,8 @@ def generate_markdown_content(article_data, blocks):
     # 添加分割线
     md_content += "---\n\n"
 
-    # 转换 blocks 为 Markdown
-    in_list = False
-    list_type = None
-    list_content = []
-
-    for block in blocks:
-        block_type = block["type"]
-
-        # 处理列表
-        if block_type in ["bulleted_list_item", "numbered_list_item"]:
-            if not in_list:
-                list_type = "ul" if block_type == "bulleted_list_item" else "ol"
-                in_list = True
-            list_content.append(block_to_markdown(block))
-        else:
-            if in_list:
-                # 输出累积的列表内容
-                md_content += "\n".join(list_content)
-                md_content += "\n"
-                list_content = []
-                in_list = False
-            md_content += block_to_markdown(block)
-
-    # 输出最后的列表
-    if in_list:
-        md_content += "\n".join(list_content)
-        md_content += "\n"
+    # 转换 IR 为 Markdown
+    md_content += render_markdown(nodes)
 
     return md_content
 
@@ -274,9 +136,8 @@ def save_to_obsidian(filename, content):
     filename = sanitize_filename(filename)
     filepath = os.path.join(OBSIDIAN_PATH, filename)
 
-    # 写入文件
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(content)
+    # 写入文件（内容未变时跳过）
+    write_text(filepath, content)
 
     return filepath
 
@@ -309,7 +170,7 @@ def main():
 
     # 查询数据库
     try:
-        pages = query_database()
+        pages = list(query_database())
         print(f"📚 找到 {len(pages)} 篇已发布文章")
     except Exception as e:
         print(f"❌ 查询 Notion 数据库失败: {e}")
@@ -335,8 +196,13 @@ def main():
 
             print(f"📝 处理文章: {title}")
 
-            # 获取文章内容
-            blocks = get_page_content(page["id"])
+            # 获取文章内容：优先复用 sync_notion.py 缓存的 IR，页面编辑过才重新请求
+            last_edited_time = page.get("last_edited_time", "")
+            nodes = load_ir_cache(page["id"], last_edited_time)
+            if nodes is None:
+                blocks = get_page_content(page["id"])
+                nodes = blocks_to_ir(blocks, get_page_content)
+                save_ir_cache(page["id"], last_edited_time, nodes)
 
             # 格式化日期
             if date:
@@ -367,7 +233,7 @@ def main():
             }
 
             # 生成 Markdown 内容
-            markdown_content = generate_markdown_content(article_data, blocks)
+            markdown_content = generate_markdown_content(article_data, nodes)
 
             # 生成文件名
             filename = f"{formatted_date_short}-{url}.md"
@@ -385,6 +251,7 @@ def main():
 
     print(f"\n🎉 导出完成！共导出 {exported_count} 篇文章到 Obsidian")
     print(f"📂 目标目录: {OBSIDIAN_PATH}")
+    notion.print_stats()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+构建期预计算相关文章推荐，生成 related.json
+以 TF-IDF 向量的余弦相似度为文章打分：标题、分类与标签（keywords）作为加权词项参与计算，
+所有文章都有的通用标签 IDF 为 0，不影响结果。前端只需按当前页面查表，无需再打分。
+安装 NumPy 时使用矩阵运算，否则退回纯 Python 实现（结果相同）。
+"""
+
+import json
+import math
+from collections import Counter
+
+from generate_search_index import SEARCH_INDEX_PATH, tokenize
+from output_writer import write_json
+
+try:
+    import numpy as np
+except ImportError:  # requirements.txt 中包含 NumPy；未安装时（如本地环境）退回纯 Python 实现
+    np = None
+
+RELATED_PATH = "related.json"
+
+# 每篇文章推荐的相关文章数
+RELATED_TOP_K = 3
+
+# 各字段词项的权重；分类与标签以 "#" 前缀作为独立词项
+FIELD_WEIGHTS = {"title": 3, "description": 1, "content": 1}
+CATEGORY_WEIGHT = 3
+TAG_WEIGHT = 2
+
+
+def document_terms(record):
+    """文章的词频（含字段权重）"""
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(record[field]):
+            counts[token] += weight
+    if record["category"]:
+        counts["#" + record["category"].lower()] += CATEGORY_WEIGHT
+    for tag in record["keywords"].split(","):
+        tag = tag.strip().lower()
+        if tag:
+            counts["#" + tag] += TAG_WEIGHT
+    return counts
+
+
+def tfidf_vectors(documents):
+    """计算每篇文章的 TF-IDF 稀疏向量（词项 -> 权重，已归一化）"""
+    df = Counter(term for counts in documents for term in counts)
+    n = len(documents)
+    vectors = []
+    for counts in documents:
+        vector = {
+            term: (1 + math.log(tf)) * math.log(n / df[term])
+            for term, tf in counts.items()
+        }
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        vectors.append({t: w / norm for t, w in vector.items() if w} if norm else {})
+    return vectors
+
+
+def top_k_python(vectors, k):
+    """纯 Python 实现：两两计算余弦相似度"""
+    result = []
+    for i, vector in enumerate(vectors):
+        scores = []
+        for j, other in enumerate(vectors):
+            if i == j:
+                continue
+            if len(other) < len(vector):
+                score = sum(w * vector.get(t, 0.0) for t, w in other.items())
+            else:
+                score = sum(w * other.get(t, 0.0) for t, w in vector.items())
+            if score > 0:
+                scores.append((-score, j))
+        result.append([j for _, j in sorted(scores)[:k]])
+    return result
+
+
+def top_k_numpy(vectors, k):
+    """NumPy 实现：相似度矩阵一次矩阵乘法得到
+
+    只在一篇文章中出现的词项对相似度没有贡献（向量已归一化），不放入矩阵。
+    """
+    shared = Counter(term for vector in vectors for term in vector)
+    columns = {term: i for i, term in enumerate(t for t, c in shared.items() if c > 1)}
+    matrix = np.zeros((len(vectors), len(columns)), dtype=np.float32)
+    for row, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            if term in columns:
+                matrix[row, columns[term]] = weight
+
+    scores = matrix @ matrix.T
+    np.fill_diagonal(scores, 0.0)
+    # 稳定排序，分数相同时与纯 Python 实现一样按文档顺序
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return [
+        [int(j) for j in row if scores[i, j] > 1e-6] for i, row in enumerate(order)
+    ]
+
+
+def build_related(search_index, k=RELATED_TOP_K):
+    """生成相关文章推荐
+
+    返回 {"docs": [[url, 标题, 描述, 分类], ...], "related": {url: [docs 下标, ...]}}，
+    只有文章页参与推荐。
+    """
+    articles = [record for record in search_index if record.get("article")]
+    vectors = tfidf_vectors([document_terms(record) for record in articles])
+    top_k = top_k_numpy if np is not None else top_k_python
+    neighbours = top_k(vectors, k) if articles else []
+
+    return {
+        "docs": [
+            [r["url"], r["title"], r["description"], r["category"]] for r in articles
+        ],
+        "related": {
+            record["url"]: ids for record, ids in zip(articles, neighbours) if ids
+        },
+    }
+
+
+def generate_related(search_index, path=RELATED_PATH):
+    """生成并保存 related.json"""
+    related = build_related(search_index)
+    write_json(path, related, ensure_ascii=False, separators=(",", ":"))
+    backend = "NumPy" if np is not None else "纯 Python"
+    print(f"✅ {path} 已生成，{len(related['related'])} 篇文章（{backend}）")
+    return related
+
+
+if __name__ == "__main__":
+    print("🚀 开始生成相关文章推荐...")
+    with open(SEARCH_INDEX_PATH, "r", encoding="utf-8") as f:
+        generate_related(json.load(f))
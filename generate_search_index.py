@@ -1,23 +1,64 @@
 #!/usr/bin/env python3
 """
 生成全站搜索索引 JSON
+非 Notion 页面按 mtime/内容哈希缓存解析结果，只有变化的页面才重新解析，
+需要解析的页面分发到多个进程并行处理
+
+同时生成倒排索引供前端搜索使用：
+中文按相邻两字（bigram）切分，英文/数字按单词切分，
+每个词项记录出现的文档编号及所在字段，前端只需查几次表即可得到结果。
+倒排索引按词项首字符拆分为多个分片，文件名带内容哈希，
+前端先读取很小的 search/manifest.json，再只下载查询涉及的分片。
 """
 
+import argparse
+import hashlib
 import json
 import glob
+import os
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from bs4 import BeautifulSoup
 
-def extract_text_from_html(html_content):
-    """从HTML中提取纯文本"""
-    soup = BeautifulSoup(html_content, 'html.parser')
+from output_writer import write_bytes, write_json
+
+SEARCH_INDEX_PATH = 'search-index.json'
+SEARCH_MANIFEST_PATH = 'search/manifest.json'
+SEARCH_SHARD_DIR = 'search/shards'
+
+# 倒排索引分片数，修改后前端会从 manifest 中读取新的值
+SEARCH_SHARD_COUNT = 16
+PAGE_CACHE_PATH = '.cache/search-index-pages.json'
+
+# 并行解析的进程数（可通过环境变量覆盖）
+SEARCH_INDEX_WORKERS = int(os.environ.get('SEARCH_INDEX_WORKERS', os.cpu_count() or 1))
+
+# 排除不需要的文件
+EXCLUDED_FILES = {'books-preview.html', 'test.html', 'article1.html'}
 
+# 倒排索引的字段及权重（与 scripts/search.js 原有的打分规则一致），
+# 词项所在的字段以位掩码记录：第 i 个字段对应 1 << i
+INDEX_FIELDS = [
+    ('title', 10),
+    ('category', 5),
+    ('keywords', 3),
+    ('description', 2),
+    ('content', 1),
+]
+
+# 中文（CJK 统一表意文字）连续片段，或连续的英文字母/数字
+# 修改时需同步 scripts/search.js 中的 TOKEN_PATTERN
+TOKEN_PATTERN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]+|[a-z0-9]+')
+
+def extract_text(element):
+    """从已解析的元素中提取纯文本（会移除其中的 script/style 标签）"""
     # 移除script和style标签
-    for script in soup(["script", "style"]):
+    for script in element(["script", "style"]):
         script.decompose()
 
     # 获取文本
-    text = soup.get_text()
+    text = element.get_text()
 
     # 清理文本
     lines = (line.strip() for line in text.splitlines())
@@ -26,80 +67,313 @@ def extract_text_from_html(html_content):
 
     return text
 
-def generate_search_index():
-    """生成搜索索引"""
-    search_index = []
+def extract_text_from_html(html_content):
+    """从HTML中提取纯文本"""
+    return extract_text(BeautifulSoup(html_content, 'html.parser'))
 
-    # 获取所有HTML文件
-    html_files = glob.glob("*.html")
+def make_record(url, title, description, category, keywords, content_text, article=False):
+    """生成一条搜索索引记录，article 表示是否为文章页（参与相关文章推荐）"""
+    # 限制内容长度
+    content_preview = content_text[:500] if content_text else description
 
-    # 排除不需要的文件
-    excluded_files = {'books-preview.html', 'test.html', 'article1.html'}
+    return {
+        'url': url,
+        'title': title.replace(' - 计划李', '').strip(),
+        'description': description or content_preview[:200],
+        'category': category,
+        'keywords': keywords,
+        'content': content_preview,
+        'article': article
+    }
 
-    for html_file in html_files:
-        if html_file in excluded_files:
-            continue
+def index_html_page(html_file, content):
+    """解析一个 HTML 页面，生成搜索索引记录（每个页面只解析一次）"""
+    soup = BeautifulSoup(content, 'html.parser')
 
-        try:
-            with open(html_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+    # 提取标题
+    title_tag = soup.find('title')
+    title = title_tag.text if title_tag else html_file.replace('.html', '')
 
-            soup = BeautifulSoup(content, 'html.parser')
+    # 提取meta描述
+    description_tag = soup.find('meta', {'name': 'description'})
+    description = description_tag.get('content', '') if description_tag else ''
 
-            # 提取标题
-            title_tag = soup.find('title')
-            title = title_tag.text if title_tag else html_file.replace('.html', '')
+    # 提取关键词
+    keywords_tag = soup.find('meta', {'name': 'keywords'})
+    keywords = keywords_tag.get('content', '') if keywords_tag else ''
 
-            # 提取meta描述
-            description_tag = soup.find('meta', {'name': 'description'})
-            description = description_tag.get('content', '') if description_tag else ''
+    # 提取主要内容（优先从article标签）
+    article_content = soup.find('article') or soup.find('main') or soup.find('body')
+    if article_content:
+        # 移除导航栏和页脚
+        for nav in article_content.find_all(['nav', 'footer']):
+            nav.decompose()
 
-            # 提取关键词
-            keywords_tag = soup.find('meta', {'name': 'keywords'})
-            keywords = keywords_tag.get('content', '') if keywords_tag else ''
+    # 提取分类（如果有）
+    category = ''
+    category_tag = soup.find(class_=['blog-tag', 'article-tag'])
+    if category_tag:
+        category = category_tag.text.strip()
 
-            # 提取主要内容（优先从article标签）
-            article_content = soup.find('article') or soup.find('main') or soup.find('body')
-            if article_content:
-                # 移除导航栏和页脚
-                for nav in article_content.find_all(['nav', 'footer']):
-                    nav.decompose()
+    # 直接在已解析的树上取文本，不再序列化后重新解析
+    content_text = extract_text(article_content or soup)
 
-                content_text = extract_text_from_html(str(article_content))
-            else:
-                content_text = extract_text_from_html(content)
+    is_article = soup.find(class_='article-content') is not None
+
+    return make_record(
+        html_file, title, description, category, keywords, content_text, is_article
+    )
+
+def parser_fingerprint():
+    """解析代码的指纹，提取逻辑变化后旧的缓存结果不再可信"""
+    with open(__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_page_cache(path=PAGE_CACHE_PATH):
+    """读取页面解析缓存：文件名 -> {mtime, size, hash, record}"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('parser') != parser_fingerprint():
+        return {}
+    return data.get('pages', {})
+
+def save_page_cache(cache, path=PAGE_CACHE_PATH):
+    """保存页面解析缓存"""
+    write_json(
+        path,
+        {'parser': parser_fingerprint(), 'pages': cache},
+        ensure_ascii=False, separators=(',', ':')
+    )
+
+def parse_page(html_file):
+    """读取并解析一个页面（在子进程中执行），返回 (记录, 耗时秒数)"""
+    start = time.perf_counter()
+    with open(html_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    record = index_html_page(html_file, content)
+    return record, time.perf_counter() - start
 
-            # 限制内容长度
-            content_preview = content_text[:500] if content_text else description
+def parse_pages(html_files, max_workers=SEARCH_INDEX_WORKERS):
+    """解析一组页面，按输入顺序产出 (文件名, 记录, 耗时)，失败时记录为 None"""
+    if max_workers > 1 and len(html_files) > 1:
+        workers = min(max_workers, len(html_files))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(parse_page, f) for f in html_files]
+            for html_file, future in zip(html_files, futures):
+                try:
+                    yield (html_file, *future.result())
+                except Exception as e:
+                    print(f"❌ 处理 {html_file} 失败: {e}")
+                    yield html_file, None, 0.0
+    else:
+        for html_file in html_files:
+            try:
+                yield (html_file, *parse_page(html_file))
+            except Exception as e:
+                print(f"❌ 处理 {html_file} 失败: {e}")
+                yield html_file, None, 0.0
 
-            # 提取分类（如果有）
-            category = ''
-            category_tag = soup.find(class_=['blog-tag', 'article-tag'])
-            if category_tag:
-                category = category_tag.text.strip()
+def index_static_pages(html_files, cache, full=False, max_workers=SEARCH_INDEX_WORKERS):
+    """为一组页面生成索引记录
 
-            # 添加到索引
-            search_index.append({
-                'url': html_file,
-                'title': title.replace(' - 计划李', '').strip(),
-                'description': description or content_preview[:200],
-                'category': category,
-                'keywords': keywords,
-                'content': content_preview
-            })
+    mtime 与大小未变、或内容哈希未变的页面直接复用缓存，
+    其余页面并行解析；full=True 时忽略缓存全部重新解析。
+    """
+    records = {}
+    to_parse = {}
 
-            print(f"✅ 已索引: {html_file} - {title}")
+    for html_file in html_files:
+        try:
+            stat = os.stat(html_file)
+            entry = None if full else cache.get(html_file)
+
+            if entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+                records[html_file] = entry['record']
+                continue
+
+            with open(html_file, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+
+            meta = {'mtime': stat.st_mtime, 'size': stat.st_size, 'hash': digest}
+            if entry and entry['hash'] == digest:
+                # 仅 mtime 变化（如被重新写入相同内容），无需重新解析
+                records[html_file] = entry['record']
+                cache[html_file] = dict(meta, record=entry['record'])
+            else:
+                to_parse[html_file] = meta
 
         except Exception as e:
             print(f"❌ 处理 {html_file} 失败: {e}")
             continue
 
-    # 保存索引
-    with open('search-index.json', 'w', encoding='utf-8') as f:
-        json.dump(search_index, f, ensure_ascii=False, indent=2)
+    timings = []
+    start = time.perf_counter()
+    for html_file, record, elapsed in parse_pages(list(to_parse), max_workers):
+        if record is None:
+            cache.pop(html_file, None)
+            continue
+        records[html_file] = record
+        cache[html_file] = dict(to_parse[html_file], record=record)
+        timings.append((elapsed, html_file))
+        print(f"✅ 已索引: {html_file} - {record['title']} ({elapsed * 1000:.0f}ms)")
+    wall = time.perf_counter() - start
+
+    print(f"📋 静态页面 {len(records)} 个，重新解析 {len(timings)} 个")
+    if timings:
+        total = sum(elapsed for elapsed, _ in timings)
+        print(f"⏱️  解析耗时 {wall:.2f}s（单页合计 {total:.2f}s），最慢的页面：")
+        for elapsed, html_file in sorted(timings, reverse=True)[:5]:
+            print(f"   {elapsed * 1000:6.0f}ms  {html_file}")
+
+    return [records[f] for f in html_files if f in records]
+
+def tokenize(text):
+    """切分词项：中文片段切成相邻两字，单个汉字与英文单词原样保留"""
+    tokens = []
+    for run in TOKEN_PATTERN.findall(text.lower()):
+        if len(run) > 1 and not run[0].isascii():
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+def build_inverted_index(search_index):
+    """由搜索索引记录生成倒排索引
+
+    docs 以列表下标作为文档编号，只保留展示结果所需的字段；
+    terms 为「词项 -> [文档编号, 字段掩码, 文档编号, 字段掩码, ...]」。
+    """
+    postings = {}
+    for doc_id, record in enumerate(search_index):
+        masks = {}
+        for bit, (field, _) in enumerate(INDEX_FIELDS):
+            for token in tokenize(record[field]):
+                masks[token] = masks.get(token, 0) | (1 << bit)
+        for token, mask in masks.items():
+            postings.setdefault(token, []).extend((doc_id, mask))
+
+    return {
+        'fields': [field for field, _ in INDEX_FIELDS],
+        'weights': [weight for _, weight in INDEX_FIELDS],
+        'docs': [
+            [record['url'], record['title'], record['description'], record['category']]
+            for record in search_index
+        ],
+        'terms': dict(sorted(postings.items())),
+    }
+
+def shard_of(token, shard_count=SEARCH_SHARD_COUNT):
+    """词项所在的分片（与 scripts/search.js 中的 shardOf 一致）"""
+    return ord(token[0]) % shard_count
+
+def write_hashed_json(data, directory, stem):
+    """以内容哈希命名写入 JSON 文件（内容不变时文件名不变），返回文件名"""
+    content = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    filename = f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}.json"
+    path = os.path.join(directory, filename)
+    write_bytes(path, content)
+    return filename
+
+def write_sharded_index(
+    inverted_index,
+    manifest_path=SEARCH_MANIFEST_PATH,
+    shard_dir=SEARCH_SHARD_DIR,
+    shard_count=SEARCH_SHARD_COUNT,
+):
+    """将倒排索引拆分为文档表与若干词项分片，写入 manifest 并删除上上一次构建的旧分片"""
+    os.makedirs(shard_dir, exist_ok=True)
+
+    # 上一次构建的 manifest 引用的分片保留一个构建周期：部署后仍持有旧 manifest 的页面
+    # 会按需加载分片，立即删除会导致这些页面下一次搜索时 404
+    previous_files = set()
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        previous_files = {
+            os.path.basename(path) for path in [previous['docs']] + previous['shards']
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    shards = [{} for _ in range(shard_count)]
+    for token, postings in inverted_index['terms'].items():
+        shards[shard_of(token, shard_count)][token] = postings
+
+    shard_prefix = os.path.relpath(shard_dir, os.path.dirname(manifest_path))
+    docs_file = write_hashed_json(inverted_index['docs'], shard_dir, 'docs')
+    shard_files = [
+        write_hashed_json(terms, shard_dir, f"terms-{i}") for i, terms in enumerate(shards)
+    ]
+
+    manifest = {
+        'fields': inverted_index['fields'],
+        'weights': inverted_index['weights'],
+        'shard_count': shard_count,
+        'docs': f"{shard_prefix}/{docs_file}",
+        'shards': [f"{shard_prefix}/{name}" for name in shard_files],
+    }
+    write_json(manifest_path, manifest, ensure_ascii=False, indent=2)
+
+    in_use = set(shard_files) | {docs_file} | previous_files
+    for filename in os.listdir(shard_dir):
+        if filename not in in_use:
+            os.remove(os.path.join(shard_dir, filename))
+
+    return manifest
+
+def write_search_index(search_index, path=SEARCH_INDEX_PATH):
+    """保存索引"""
+    write_json(path, search_index, ensure_ascii=False, indent=2)
+
+def generate_search_index(records=None, full=False, max_workers=SEARCH_INDEX_WORKERS):
+    """生成搜索索引
+
+    records 为调用方已在内存中生成的记录（如 Notion 文章），
+    对应的页面不再从磁盘解析，其余页面增量解析。
+    """
+    records = list(records or [])
+    known_urls = {record['url'] for record in records}
+
+    # 获取所有HTML文件
+    html_files = sorted(
+        f for f in glob.glob("*.html")
+        if f not in EXCLUDED_FILES and f not in known_urls
+    )
+
+    cache = load_page_cache()
+    records.extend(index_static_pages(html_files, cache, full, max_workers))
+
+    # 删除已不存在页面的缓存
+    for html_file in [f for f in cache if f not in html_files]:
+        del cache[html_file]
+    save_page_cache(cache)
+
+    search_index = sorted(records, key=lambda record: record['url'])
+    write_search_index(search_index)
+
+    inverted_index = build_inverted_index(search_index)
+    write_sharded_index(inverted_index)
+    print(
+        f"📋 倒排索引包含 {len(inverted_index['terms'])} 个词项，"
+        f"拆分为 {SEARCH_SHARD_COUNT} 个分片"
+    )
 
     print(f"\n🎉 搜索索引已生成，包含 {len(search_index)} 个页面")
+    return search_index
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="生成全站搜索索引")
+    parser.add_argument('--full', action='store_true', help="忽略解析缓存，重新解析所有页面")
+    parser.add_argument(
+        '--workers', type=int, default=SEARCH_INDEX_WORKERS,
+        help=f"并行解析的进程数（默认 {SEARCH_INDEX_WORKERS}）"
+    )
+    return parser.parse_args()
 
 if __name__ == '__main__':
+    args = parse_args()
     print("🚀 开始生成搜索索引...")
-    generate_search_index()
+    generate_search_index(full=args.full, max_workers=args.workers)
@@ -4,14 +4,58 @@
 """
 
 import os
+import subprocess
 from datetime import datetime
 import glob
+from urllib.parse import quote
+
+from output_writer import stats as write_stats
+from output_writer import write_text
 
 BASE_URL = "https://kev1nl33.github.io/personal-blog"
 
 
-def generate_sitemap():
-    """生成 sitemap.xml"""
+def git_lastmods():
+    """每个 HTML 文件最后一次提交的日期（一次 git log 取全部文件），不在 git 仓库中时返回空字典"""
+    try:
+        output = subprocess.run(
+            [
+                "git",
+                "-c",
+                "core.quotePath=false",
+                "log",
+                "--format=%x00%cs",
+                "--name-only",
+                "--",
+                "*.html",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    dates = {}
+    date = None
+    for line in output.splitlines():
+        if line.startswith("\0"):
+            date = line[1:]
+        elif line and line not in dates:
+            dates[line] = date
+    return dates
+
+
+def generate_sitemap(lastmods=None):
+    """生成 sitemap.xml
+
+    lastmods 为「文件名 -> YYYY-MM-DD」，用于 Notion 文章等已知编辑时间的页面。
+    其余页面：本次构建写入过的取当天，否则取最后一次提交的日期，都没有时才用文件修改时间
+    （CI 检出的文件 mtime 都是检出时间，直接使用会让 sitemap 每天都变）。
+    """
+    lastmods = lastmods or {}
+    committed = git_lastmods()
+    today = datetime.now().strftime("%Y-%m-%d")
+
     # 获取所有 HTML 文件
     html_files = glob.glob("*.html")
 
@@ -29,6 +73,12 @@ def generate_sitemap():
 
     # 获取文件修改时间
     def get_lastmod(filepath):
+        if filepath in lastmods:
+            return lastmods[filepath]
+        if write_stats.was_written(filepath):
+            return today
+        if committed.get(filepath):
+            return committed[filepath]
         timestamp = os.path.getmtime(filepath)
         return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
 
@@ -68,13 +118,25 @@ def generate_sitemap():
         sitemap.append(f"    <priority>{priority}</priority>")
         sitemap.append("  </url>")
 
+    # 分页、分类与标签列表页（见 blog_pages.py）
+    listing_files = sorted(glob.glob("blog/**/*.html", recursive=True))
+    for html_file in listing_files:
+        sitemap.append("  <url>")
+        sitemap.append(f"    <loc>{BASE_URL}/{quote(html_file)}</loc>")
+        sitemap.append(f"    <lastmod>{get_lastmod(html_file)}</lastmod>")
+        sitemap.append("    <changefreq>weekly</changefreq>")
+        sitemap.append("    <priority>0.5</priority>")
+        sitemap.append("  </url>")
+
     sitemap.append("</urlset>")
 
     # 写入文件
-    with open("sitemap.xml", "w", encoding="utf-8") as f:
-        f.write("\n".join(sitemap))
+    written = write_text("sitemap.xml", "\n".join(sitemap))
 
-    print(f"✅ sitemap.xml 已生成，包含 {len(html_files) + len(main_pages)} 个页面")
+    page_count = len(html_files) + len(main_pages) + len(listing_files)
+    print(
+        f"✅ sitemap.xml {'已生成' if written else '内容未变化'}，包含 {page_count} 个页面"
+    )
 
 
 def generate_robots():
@@ -92,10 +154,10 @@ Disallow: /scripts/
 Disallow: /*.json$
 """
 
-    with open("robots.txt", "w", encoding="utf-8") as f:
-        f.write(robots_content)
-
-    print("✅ robots.txt 已生成")
+    if write_text("robots.txt", robots_content):
+        print("✅ robots.txt 已生成")
+    else:
+        print("✅ robots.txt 内容未变化")
 
 
 if __name__ == "__main__":
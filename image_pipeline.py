@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+响应式图片：为文章图片（Notion 正文图片与封面）和相册照片生成多尺寸 WebP/AVIF 版本
+
+- 引用的图片只下载一次，按内容 SHA-256 缓存在 .cache/images/ 中
+- 各尺寸、各格式的版本以多进程并行编码，输出到 images/responsive/<hash>-<宽度>.<格式>，已存在的不再重复生成
+- 页面中的 <img> 改写为带 srcset/sizes 的 <picture>，并写入 width/height，避免布局偏移
+- gallery/gallery-data.json 中的照片补充 width、height 与 srcset 字段
+
+Pillow 为可选依赖：未安装时跳过这一步，页面保持原样。
+"""
+
+import argparse
+import hashlib
+import html
+import io
+import json
+import os
+import posixpath
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+from output_writer import stats as write_stats
+from output_writer import write_bytes, write_json
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 为可选依赖
+    Image = None
+
+IMAGE_CACHE_DIR = ".cache/images"
+IMAGE_OUTPUT_DIR = "images/responsive"
+GALLERY_DATA_PATH = "gallery/gallery-data.json"
+
+# 生成的宽度（不超过原图宽度）与格式，按优先级排列
+IMAGE_WIDTHS = (480, 960, 1600)
+IMAGE_FORMATS = ("avif", "webp")
+IMAGE_QUALITY = {"avif": 55, "webp": 80}
+IMAGE_MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+# 文章正文最宽 960px
+ARTICLE_IMAGE_SIZES = "(max-width: 960px) 100vw, 960px"
+
+# 编码进程数，默认使用全部 CPU 核心
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "0")) or os.cpu_count() or 1
+IMAGE_DOWNLOAD_WORKERS = 4
+IMAGE_DOWNLOAD_TIMEOUT = 30
+
+SOURCE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+IMG_TAG_PATTERN = re.compile(r"<img\b[^>]*>", re.I)
+ATTR_PATTERN = re.compile(r"""([\w-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+
+
+# ================================
+# 源图片缓存
+# ================================
+
+
+def is_remote(url):
+    return url.startswith(("http://", "https://"))
+
+
+def source_key(url):
+    """源图片的缓存键：远程图片去掉查询串（Notion 文件链接的签名参数每次都会变化）"""
+    if is_remote(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}{parts.path}"
+    return url
+
+
+def source_extension(url):
+    ext = posixpath.splitext(urlsplit(url).path)[1].lower()
+    return ext if ext in SOURCE_EXTENSIONS else None
+
+
+def load_source_index(cache_dir=IMAGE_CACHE_DIR):
+    """源图片索引：缓存键 -> {"sha256", "ext"}；图片信息：sha256 -> 尺寸与各版本"""
+    try:
+        with open(os.path.join(cache_dir, "index.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("sources", {}), data.get("images", {})
+    except (OSError, ValueError):
+        return {}, {}
+
+
+def save_source_index(sources, images, cache_dir=IMAGE_CACHE_DIR):
+    write_json(
+        os.path.join(cache_dir, "index.json"),
+        {"sources": sources, "images": images},
+        ensure_ascii=False,
+        indent=2,
+    )
+
+
+def cached_source_path(entry, cache_dir=IMAGE_CACHE_DIR):
+    return os.path.join(cache_dir, "sources", f"{entry['sha256']}{entry['ext']}")
+
+
+def read_source(url):
+    """读取源图片内容：本地路径直接读取，远程图片下载"""
+    if not is_remote(url):
+        with open(url, "rb") as f:
+            return f.read()
+    response = requests.get(url, timeout=IMAGE_DOWNLOAD_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+
+def fetch_source(url, sources, cache_dir=IMAGE_CACHE_DIR):
+    """返回源图片的缓存条目；远程图片只在缓存中没有时下载，本地图片按内容哈希判断变化"""
+    key = source_key(url)
+    entry = sources.get(key)
+    if (
+        entry
+        and is_remote(url)
+        and os.path.exists(cached_source_path(entry, cache_dir))
+    ):
+        return entry
+
+    data = read_source(url)
+    entry = {"sha256": hashlib.sha256(data).hexdigest(), "ext": source_extension(url)}
+    write_bytes(cached_source_path(entry, cache_dir), data)
+    return entry
+
+
+# ================================
+# 编码
+# ================================
+
+
+def avif_supported():
+    """Pillow 11.2 起内置 AVIF；更早的版本需要 pillow-avif-plugin"""
+    if Image is None:
+        return False
+    try:
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        pass
+    Image.init()
+    return "AVIF" in Image.SAVE
+
+
+def variant_path(sha256, width, fmt, out_dir=IMAGE_OUTPUT_DIR):
+    return posixpath.join(out_dir, f"{sha256[:16]}-{width}.{fmt}")
+
+
+def target_widths(width):
+    """不放大图片：超过原图宽度的尺寸以原图宽度代替"""
+    return sorted({min(w, width) for w in IMAGE_WIDTHS})
+
+
+def encode_image(source_path, sha256, formats, out_dir=IMAGE_OUTPUT_DIR):
+    """生成一张图片的全部版本（在子进程中运行）
+
+    返回图片信息（尺寸与各格式的 [宽度, 路径] 列表）和新写入的 (路径, 字节数)，
+    子进程中的写入统计由主进程汇总。
+    """
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        width, height = image.size
+
+        variants = {fmt: [] for fmt in formats}
+        written = []
+        for target in target_widths(width):
+            resized = None
+            for fmt in formats:
+                path = variant_path(sha256, target, fmt, out_dir)
+                if not os.path.exists(path):
+                    if resized is None:
+                        size = (target, max(1, round(height * target / width)))
+                        resized = (
+                            image.resize(size, Image.LANCZOS)
+                            if target < width
+                            else image
+                        )
+                    buffer = io.BytesIO()
+                    resized.save(buffer, fmt.upper(), quality=IMAGE_QUALITY[fmt])
+                    if write_bytes(path, buffer.getvalue()):
+                        written.append((path, buffer.tell()))
+                variants[fmt].append([target, path])
+
+    return {"width": width, "height": height, "variants": variants}, written
+
+
+def process_images(urls, max_workers=IMAGE_WORKERS, cache_dir=IMAGE_CACHE_DIR):
+    """下载并生成图片的响应式版本，返回 {url: 图片信息}；无法处理的图片不在结果中"""
+    urls = [url for url in dict.fromkeys(urls) if source_extension(url)]
+    if not urls:
+        return {}
+    if Image is None:
+        print("⚠️  未安装 Pillow，跳过响应式图片生成")
+        return {}
+
+    formats = tuple(f for f in IMAGE_FORMATS if f != "avif" or avif_supported())
+    sources, images = load_source_index(cache_dir)
+
+    entries = {}
+    with ThreadPoolExecutor(max_workers=IMAGE_DOWNLOAD_WORKERS) as executor:
+        futures = {
+            url: executor.submit(fetch_source, url, sources, cache_dir) for url in urls
+        }
+        for url, future in futures.items():
+            try:
+                entries[url] = future.result()
+                sources[source_key(url)] = entries[url]
+            except (OSError, requests.RequestException) as e:
+                print(f"  ❌ 获取图片失败: {url[:80]} ({e})")
+
+    # 只有版本文件缺失（或格式配置变化）的图片需要编码
+    pending = {}
+    for entry in entries.values():
+        sha256 = entry["sha256"]
+        info = images.get(sha256)
+        complete = (
+            info
+            and set(info["variants"]) == set(formats)
+            and all(
+                os.path.exists(path)
+                for fmt in formats
+                for _, path in info["variants"][fmt]
+            )
+        )
+        if not complete:
+            pending[sha256] = cached_source_path(entry, cache_dir)
+
+    if pending:
+        print(
+            f"🖼️  编码 {len(pending)} 张图片（{', '.join(formats)}，{max_workers} 进程）"
+        )
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                sha256: executor.submit(encode_image, path, sha256, formats)
+                for sha256, path in pending.items()
+            }
+            for sha256, future in futures.items():
+                try:
+                    images[sha256], written = future.result()
+                    for path, size in written:
+                        write_stats.record_write(path, size)
+                except Exception as e:
+                    print(f"  ❌ 图片编码失败: {pending[sha256]} ({e})")
+                    images.pop(sha256, None)
+
+    save_source_index(sources, images, cache_dir)
+    return {
+        url: images[entry["sha256"]]
+        for url, entry in entries.items()
+        if entry["sha256"] in images
+    }
+
+
+# ================================
+# 标记改写
+# ================================
+
+
+def srcset(info, fmt):
+    return ", ".join(f"{path} {width}w" for width, path in info["variants"][fmt])
+
+
+def parse_attrs(tag):
+    """解析 <img> 标签的属性，保持原有顺序"""
+    inner = tag[4:-1].rstrip("/ ")
+    return [
+        (m.group(1), next((v for v in m.groups()[1:] if v is not None), None))
+        for m in ATTR_PATTERN.finditer(inner)
+    ]
+
+
+def picture_html(tag, info, sizes=ARTICLE_IMAGE_SIZES):
+    """把 <img> 改写为 <picture>：各格式一个 <source>，<img> 回退到最大的 WebP 版本"""
+    attrs = [
+        (name, value)
+        for name, value in parse_attrs(tag)
+        if name.lower() not in ("src", "srcset", "sizes", "width", "height")
+    ]
+    fallback = info["variants"]["webp"][-1][1]
+    attrs = (
+        [("src", fallback)]
+        + attrs
+        + [("width", str(info["width"])), ("height", str(info["height"]))]
+    )
+    img = (
+        "<img"
+        + "".join(
+            (
+                f" {name}"
+                if value is None
+                else f' {name}="{html.escape(html.unescape(value))}"'
+            )
+            for name, value in attrs
+        )
+        + ">"
+    )
+    sources = "".join(
+        f'<source type="{IMAGE_MIME_TYPES[fmt]}" srcset="{srcset(info, fmt)}" sizes="{sizes}">'
+        for fmt in IMAGE_FORMATS
+        if fmt in info["variants"]
+    )
+    return f"<picture>{sources}{img}</picture>"
+
+
+def image_sources(text):
+    """页面中尚未处理的 <img> 的 src"""
+    urls = []
+    for tag in IMG_TAG_PATTERN.findall(text):
+        attrs = dict(parse_attrs(tag))
+        if attrs.get("src") and "srcset" not in attrs:
+            urls.append(html.unescape(attrs["src"]))
+    return urls
+
+
+def responsive_images(text, images, sizes=ARTICLE_IMAGE_SIZES):
+    """将页面中已生成响应式版本的 <img> 改写为 <picture>"""
+
+    def replace(match):
+        attrs = dict(parse_attrs(match.group(0)))
+        info = images.get(html.unescape(attrs.get("src") or ""))
+        if info is None or "srcset" in attrs:
+            return match.group(0)
+        return picture_html(match.group(0), info, sizes)
+
+    return IMG_TAG_PATTERN.sub(replace, text)
+
+
+# ================================
+# 相册
+# ================================
+
+
+def process_gallery(path=GALLERY_DATA_PATH, max_workers=IMAGE_WORKERS):
+    """为相册照片补充 width、height 与各格式的 srcset，内容变化时才写回"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    photos = data.get("photos", [])
+
+    # 照片 URL 相对于站点根目录；本地文件不存在的照片跳过
+    urls = [p["url"] for p in photos if is_remote(p["url"]) or os.path.exists(p["url"])]
+    missing = len(photos) - len(urls)
+    if missing:
+        print(f"⚠️  相册中 {missing} 张照片的文件不存在，跳过")
+    images = process_images(urls, max_workers)
+
+    before = json.dumps(photos, sort_keys=True)
+    for photo in photos:
+        info = images.get(photo["url"])
+        if info is None:
+            continue
+        photo["width"] = info["width"]
+        photo["height"] = info["height"]
+        photo["srcset"] = {fmt: srcset(info, fmt) for fmt in info["variants"]}
+
+    if json.dumps(photos, sort_keys=True) != before:
+        write_json(path, data, trailing_newline=True, ensure_ascii=False, indent=4)
+    print(f"✅ 相册照片已处理 {len(images)}/{len(photos)} 张")
+    return images
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="生成响应式图片")
+    parser.add_argument("--workers", type=int, default=IMAGE_WORKERS, help="编码进程数")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("🚀 开始处理相册图片...")
+    process_gallery(max_workers=args.workers)
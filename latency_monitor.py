@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+持续监测（--watch 模式）- 定时采样、滚动统计与时间序列存储
+
+单次诊断只能看到运行那一刻的网络状况，偶发的延迟尖峰与丢包很难被发现。--watch 模式下：
+- 每隔 INTERVAL 秒调用一次采样函数，得到一组测量值 (指标, 毫秒或 None, 发送数, 丢失数)
+- 每个指标保留最近 window 个测量值（环形缓冲区，内存占用固定），
+  增量维护有序列表以计算滚动 p50/p95/p99，并累计窗口内的丢包率
+- 所有测量值追加写入 SQLite 时间序列文件（每轮一个事务，中断也不会丢失已采样的数据）
+- 可选地每轮重新生成一个静态 HTML 趋势页（内联 SVG，无外部依赖）
+
+也可以单独从已有的时间序列文件生成趋势页:
+    python latency_monitor.py network_watch.db --html network_trend.html --hours 6
+"""
+
+import argparse
+import asyncio
+import html
+import os
+import sqlite3
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from latency_stats import percentile, percentile_sorted
+from output_writer import write_text
+
+# 测量值：(指标名称, 延迟毫秒（失败为 None）, 发送数, 丢失数)
+Measurement = Tuple[str, Optional[float], int, int]
+
+DEFAULT_WINDOW = 300
+DEFAULT_TREND_HOURS = 24
+# 趋势图横轴的分桶数：每个桶画出中位数与最大值，长时间的数据也不会丢掉尖峰
+TREND_BUCKETS = 360
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS metrics (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS samples (
+    ts INTEGER NOT NULL,
+    metric_id INTEGER NOT NULL REFERENCES metrics(id),
+    value REAL,
+    sent INTEGER NOT NULL,
+    lost INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_metric_ts ON samples (metric_id, ts);
+'''
+
+
+def measurement(metric: str, value: Optional[float], sent: int = 1, lost: Optional[int] = None) -> Measurement:
+    """构造测量值；未指定 lost 时，value 为 None 即视为全部丢失"""
+    if lost is None:
+        lost = sent if value is None else 0
+    return metric, value, sent, lost
+
+
+class RollingWindow:
+    """最近 size 个测量值的滚动统计"""
+
+    def __init__(self, size: int = DEFAULT_WINDOW):
+        self.samples = deque(maxlen=size)
+        self.ordered = []
+        self.sent = 0
+        self.lost = 0
+
+    def add(self, value: Optional[float], sent: int = 1, lost: int = 0):
+        if len(self.samples) == self.samples.maxlen:
+            old_value, old_sent, old_lost = self.samples[0]
+            if old_value is not None:
+                del self.ordered[bisect_left(self.ordered, old_value)]
+            self.sent -= old_sent
+            self.lost -= old_lost
+        self.samples.append((value, sent, lost))
+        if value is not None:
+            insort(self.ordered, value)
+        self.sent += sent
+        self.lost += lost
+
+    def percentile(self, pct: float) -> Optional[float]:
+        return percentile_sorted(self.ordered, pct)
+
+    @property
+    def loss_pct(self) -> float:
+        return self.lost / self.sent * 100 if self.sent else 0
+
+    def summary(self) -> Dict:
+        return {
+            'samples': len(self.samples),
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'loss_pct': round(self.loss_pct, 2)
+        }
+
+
+class TimeSeriesStore:
+    """SQLite 时间序列文件：指标名称单独成表，样本只存整数时间戳（毫秒）与数值"""
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        self.metric_ids = dict(self.conn.execute('SELECT name, id FROM metrics'))
+
+    def _metric_id(self, name: str) -> int:
+        if name not in self.metric_ids:
+            cursor = self.conn.execute('INSERT INTO metrics (name) VALUES (?)', (name,))
+            self.metric_ids[name] = cursor.lastrowid
+        return self.metric_ids[name]
+
+    def append(self, ts_ms: int, measurements: List[Measurement]):
+        """在一个事务中追加一轮测量值"""
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO samples (ts, metric_id, value, sent, lost) VALUES (?, ?, ?, ?, ?)',
+                [(ts_ms, self._metric_id(metric), value, sent, lost)
+                 for metric, value, sent, lost in measurements]
+            )
+
+    def read(self, since_ms: int = 0) -> Dict[str, List[Tuple[int, Optional[float], int, int]]]:
+        """since_ms 之后的样本，按指标登记顺序返回 指标 -> [(时间戳, 数值, 发送数, 丢失数)]"""
+        series = {}
+        rows = self.conn.execute(
+            'SELECT m.name, s.ts, s.value, s.sent, s.lost FROM samples s '
+            'JOIN metrics m ON m.id = s.metric_id WHERE s.ts >= ? ORDER BY m.id, s.ts',
+            (since_ms,)
+        )
+        for name, ts, value, sent, lost in rows:
+            series.setdefault(name, []).append((ts, value, sent, lost))
+        return series
+
+    def close(self):
+        self.conn.close()
+
+
+# ================================
+# 趋势页
+# ================================
+
+def _format_ms(value: Optional[float]) -> str:
+    return '-' if value is None else f'{value:.1f}'
+
+
+def _trend_chart(points, start_ms: int, end_ms: int, width: int = 960, height: int = 160) -> str:
+    """一个指标的 SVG 趋势图：每个时间桶的中位数（实线）、最大值（浅色）与丢包（红色）"""
+    span = max(end_ms - start_ms, 1)
+    buckets = [[] for _ in range(TREND_BUCKETS)]
+    lost = [0] * TREND_BUCKETS
+    for ts, value, _, lost_count in points:
+        i = min(int((ts - start_ms) / span * TREND_BUCKETS), TREND_BUCKETS - 1)
+        if value is not None:
+            buckets[i].append(value)
+        lost[i] += lost_count
+
+    peak = max((max(b) for b in buckets if b), default=1) or 1
+    step = width / TREND_BUCKETS
+
+    def polyline(values, css_class):
+        coords = ' '.join(
+            f'{(i + 0.5) * step:.1f},{height - value / peak * (height - 10):.1f}'
+            for i, value in enumerate(values) if value is not None
+        )
+        return f'<polyline class="{css_class}" points="{coords}"/>' if coords else ''
+
+    medians = [percentile(b, 50) if b else None for b in buckets]
+    maxima = [max(b) if b else None for b in buckets]
+    loss_marks = ''.join(
+        f'<rect class="loss" x="{i * step:.1f}" y="{height - 6}" width="{max(step, 1):.1f}" height="6"/>'
+        for i, count in enumerate(lost) if count
+    )
+    return (
+        f'<svg viewBox="0 0 {width} {height}" preserveAspectRatio="none">'
+        f'<text x="4" y="12">{peak:.1f}ms</text>'
+        f'{polyline(maxima, "max")}{polyline(medians, "p50")}{loss_marks}</svg>'
+    )
+
+
+def render_trend_page(series: Dict[str, List], title: str, start_ms: int, end_ms: int) -> str:
+    """趋势页 HTML：每个指标一张图，附整段时间的 p50/p95/p99 与丢包率"""
+    sections = []
+    for metric, points in series.items():
+        values = [value for _, value, _, _ in points if value is not None]
+        sent = sum(p[2] for p in points)
+        lost = sum(p[3] for p in points)
+        sections.append(
+            f'<section><h2>{html.escape(metric)}</h2>'
+            f'<p>{len(points)} 个样本 · p50 {_format_ms(percentile(values, 50))}ms · '
+            f'p95 {_format_ms(percentile(values, 95))}ms · p99 {_format_ms(percentile(values, 99))}ms · '
+            f'丢包 {lost / sent * 100 if sent else 0:.2f}%</p>'
+            f'{_trend_chart(points, start_ms, end_ms)}</section>'
+        )
+
+    def fmt(ts_ms):
+        return datetime.fromtimestamp(ts_ms / 1000).strftime('%Y-%m-%d %H:%M:%S')
+
+    return f'''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{html.escape(title)}</title>
+<style>
+body {{ font-family: -apple-system, "PingFang SC", sans-serif; margin: 2rem auto; max-width: 1000px; color: #222; }}
+section {{ margin-bottom: 2rem; }}
+h2 {{ font-size: 1rem; margin-bottom: .25rem; }}
+p {{ font-size: .85rem; color: #555; margin: 0 0 .5rem; }}
+svg {{ width: 100%; height: 160px; background: #fafafa; border: 1px solid #eee; }}
+svg text {{ font-size: 11px; fill: #888; }}
+.p50 {{ fill: none; stroke: #2563eb; stroke-width: 1.5; }}
+.max {{ fill: none; stroke: #93c5fd; stroke-width: 1; }}
+.loss {{ fill: #dc2626; }}
+</style>
+</head>
+<body>
+<h1>{html.escape(title)}</h1>
+<p>{fmt(start_ms)} — {fmt(end_ms)} · 深色为每个时间段的中位数，浅色为最大值，红色为丢包或失败</p>
+{''.join(sections) or '<p>暂无数据</p>'}
+</body>
+</html>
+'''
+
+
+def write_trend_page(store: TimeSeriesStore, path: str, title: str, hours: float = DEFAULT_TREND_HOURS):
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - int(hours * 3600 * 1000)
+    series = store.read(start_ms)
+    if series:
+        # 横轴从最早的样本开始，刚开始监测时图表不会挤在右侧
+        start_ms = max(start_ms, min(points[0][0] for points in series.values()))
+    write_text(path, render_trend_page(series, title, start_ms, end_ms))
+
+
+# ================================
+# 监测循环
+# ================================
+
+class Monitor:
+    """每隔 interval 秒执行一轮采样，更新滚动窗口并写入时间序列文件"""
+
+    def __init__(self, title: str, interval: float, store_path: str, window: int = DEFAULT_WINDOW,
+                 html_path: Optional[str] = None, rounds: int = 0):
+        self.title = title
+        self.interval = interval
+        self.store_path = store_path
+        self.window = window
+        self.html_path = html_path
+        # 0 表示一直运行，直到被中断
+        self.rounds = rounds
+        self.windows = {}
+
+    def record(self, measurements: List[Measurement]):
+        for metric, value, sent, lost in measurements:
+            if metric not in self.windows:
+                self.windows[metric] = RollingWindow(self.window)
+            self.windows[metric].add(value, sent, lost)
+
+    def print_status(self, round_no: int, elapsed: float):
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] 第 {round_no} 轮（{elapsed:.1f}s）")
+        for metric, window in self.windows.items():
+            s = window.summary()
+            loss = f"丢包 {s['loss_pct']:.1f}%"
+            if s['loss_pct']:
+                loss = f"⚠️ {loss}"
+            print(
+                f"  {metric:<36} p50 {_format_ms(s['p50_ms']):>7}  p95 {_format_ms(s['p95_ms']):>7}  "
+                f"p99 {_format_ms(s['p99_ms']):>7}  {loss}（最近 {s['samples']} 个）"
+            )
+
+    async def run(self, collect: Callable[[], Awaitable[List[Measurement]]]):
+        """持续采样；采样函数出错时记录并继续下一轮"""
+        store = TimeSeriesStore(self.store_path)
+        loop = asyncio.get_running_loop()
+        print(f"👀 持续监测中，每 {self.interval:g}s 采样一次，数据写入 {self.store_path}（Ctrl+C 停止）")
+        if self.html_path:
+            print(f"📈 趋势页: {self.html_path}")
+        try:
+            round_no = 0
+            while not self.rounds or round_no < self.rounds:
+                round_no += 1
+                started = loop.time()
+                try:
+                    measurements = await collect()
+                except Exception as e:
+                    print(f"❌ 第 {round_no} 轮采样失败: {e}")
+                    measurements = []
+                store.append(int(time.time() * 1000), measurements)
+                self.record(measurements)
+                self.print_status(round_no, loop.time() - started)
+                if self.html_path:
+                    write_trend_page(store, self.html_path, self.title)
+                if self.rounds and round_no >= self.rounds:
+                    break
+                await asyncio.sleep(max(0, self.interval - (loop.time() - started)))
+        finally:
+            store.close()
+
+
+def add_watch_arguments(parser: argparse.ArgumentParser, default_store: str):
+    """诊断工具共用的 --watch 相关参数"""
+    parser.add_argument(
+        "--watch",
+        type=float,
+        metavar="INTERVAL",
+        help="持续监测模式：每 INTERVAL 秒采样一次",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=DEFAULT_WINDOW,
+        help=f"滚动统计的窗口大小（每个指标最近的样本数，默认 {DEFAULT_WINDOW}）",
+    )
+    parser.add_argument(
+        "--store",
+        default=default_store,
+        help=f"时间序列文件（SQLite，默认 {default_store}）",
+    )
+    parser.add_argument("--html", help="每轮采样后更新的静态趋势页路径")
+    parser.add_argument("--rounds", type=int, default=0, help="采样轮数后退出（默认一直运行）")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="从时间序列文件生成趋势页")
+    parser.add_argument("store", help="--watch 模式写入的时间序列文件")
+    parser.add_argument("--html", required=True, help="输出的趋势页路径")
+    parser.add_argument("--hours", type=float, default=DEFAULT_TREND_HOURS, help="时间范围（小时）")
+    parser.add_argument("--title", default="网络延迟趋势", help="页面标题")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists(args.store):
+        print(f"❌ 时间序列文件不存在: {args.store}")
+        return
+    store = TimeSeriesStore(args.store)
+    try:
+        write_trend_page(store, args.html, args.title, args.hours)
+    finally:
+        store.close()
+    print(f"✅ 趋势页已生成: {args.html}")
+
+
+if __name__ == "__main__":
+    main()
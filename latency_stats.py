@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+延迟统计 - 百分位数、抖动与分桶直方图
+
+诊断工具中的各类延迟样本（DNS 查询、TCP/TLS/HTTP 各阶段）都用这里的函数汇总，
+报告中的字段名与单位（毫秒）保持一致。
+"""
+
+from typing import Dict, List, Optional
+
+# 直方图分桶上限（毫秒），最后一个桶收纳所有更大的值
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """百分位数（线性插值），values 为空时返回 None"""
+    return percentile_sorted(sorted(values), pct)
+
+
+def percentile_sorted(ordered: List[float], pct: float) -> Optional[float]:
+    """已排序数据的百分位数（滚动窗口维护有序列表，避免每次重新排序）"""
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def stddev(values: List[float]) -> float:
+    """样本标准差，用作抖动（与 ping 的 mdev/stddev 含义一致）"""
+    if len(values) < 2:
+        return 0
+    mean = sum(values) / len(values)
+    variance = sum((x - mean) ** 2 for x in values) / (len(values) - 1)
+    return variance ** 0.5
+
+
+def summarize(values: List[float]) -> Dict:
+    """min/p50/p90/p95/p99/max/平均值/抖动（毫秒，保留两位小数）"""
+    if not values:
+        return {'count': 0}
+    summary = {'count': len(values), 'min_ms': min(values)}
+    for pct in (50, 90, 95, 99):
+        summary[f'p{pct}_ms'] = percentile(values, pct)
+    summary.update({
+        'max_ms': max(values),
+        'avg_ms': sum(values) / len(values),
+        'jitter_ms': stddev(values)
+    })
+    return {key: round(value, 2) if key != 'count' else value for key, value in summary.items()}
+
+
+def histogram(values: List[float], buckets: List[float] = HISTOGRAM_BUCKETS_MS) -> List[Dict]:
+    """按 buckets 分桶计数，返回 [{'le': 上限, 'count': 数量}]，省略首尾的空桶"""
+    counts = [0] * (len(buckets) + 1)
+    for value in values:
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+
+    rows = [
+        {'le': bound, 'count': count}
+        for bound, count in zip(buckets + ['+Inf'], counts)
+    ]
+    used = [i for i, row in enumerate(rows) if row['count']]
+    return rows[used[0]:used[-1] + 1] if used else []
+
+
+def format_histogram(rows: List[Dict], width: int = 40) -> List[str]:
+    """直方图的文本形式，每个桶一行"""
+    peak = max((row['count'] for row in rows), default=0)
+    lines = []
+    for row in rows:
+        label = f"≤{row['le']}ms" if row['le'] != '+Inf' else f">{HISTOGRAM_BUCKETS_MS[-1]}ms"
+        bar = '█' * max(1, round(row['count'] / peak * width)) if row['count'] else ''
+        lines.append(f"{label:>9} {bar} {row['count']}")
+    return lines
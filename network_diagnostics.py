@@ -2,114 +2,142 @@
 """
 网络诊断工具 - 检测家庭网络性能问题
 支持 macOS/Linux 系统
+
+用法:
+    python network_diagnostics.py                               # 单次诊断
+    python network_diagnostics.py --watch 10 --html trend.html  # 持续监测
 """
 
-import subprocess
+import argparse
+import asyncio
 import platform
 import json
+import re
+import shutil
 import statistics
-import socket
 import time
 from datetime import datetime
 from typing import Dict, List, Tuple
 
+from dns_client import (
+    DEFAULT_SAMPLES, DNSError, default_resolvers, fastest_resolver, parse_server, query,
+    sample_resolvers
+)
+from latency_monitor import Monitor, add_watch_arguments, measurement
+from probe_scheduler import DEFAULT_DEADLINE, ProbeScheduler, run_command
+
+# 各探测的超时（秒）：ping 10 次约 2 秒，带宽测试约 30 秒
+PROBE_TIMEOUTS = {
+    '网关连接': 15,
+    'MESH节点': 15,
+    'DNS解析': 20,
+    '互联网延迟': 20,
+    '路由器管理界面': 10,
+    '带宽测试': 90,
+}
+
+DNS_TEST_DOMAIN = 'www.baidu.com'
+
+INTERNET_TARGETS = {
+    '百度': 'www.baidu.com',
+    '阿里': 'www.aliyun.com',
+    'Cloudflare': '1.1.1.1'
+}
+
+# --watch 模式每轮每个目标 ping 的次数
+WATCH_PING_COUNT = 5
+
+
+def parse_ping_output(output: str) -> Dict:
+    """解析 ping 的统计行：丢包率与 min/avg/max/抖动（macOS 为 stddev，Linux 为 mdev）"""
+    stats = {'packet_loss': None, 'min': None, 'avg': None, 'max': None, 'jitter': None}
+    for line in output.split('\n'):
+        # macOS: 10 packets transmitted, 10 packets received, 0.0% packet loss
+        # Linux: 10 packets transmitted, 10 received, 0% packet loss, time 1809ms
+        if 'loss' in line.lower():
+            match = re.search(r'([\d.]+)%', line)
+            if match:
+                stats['packet_loss'] = match.group(1) + '%'
+
+        # macOS: round-trip min/avg/max/stddev = 1.234/5.678/9.012/1.234 ms
+        # Linux: rtt min/avg/max/mdev = 1.234/5.678/9.012/1.234 ms
+        if '=' in line and ('min/avg/max' in line or 'round-trip' in line):
+            try:
+                parts = line.split('=')[1].replace('ms', '').strip().split('/')
+                stats['min'], stats['avg'], stats['max'] = (float(p) for p in parts[:3])
+                if len(parts) > 3:
+                    stats['jitter'] = float(parts[3])
+            except (IndexError, ValueError):
+                pass
+    return stats
+
+
 class NetworkDiagnostics:
-    def __init__(self):
+    def __init__(self, deadline: float = DEFAULT_DEADLINE, dns_servers: Dict[str, str] = None,
+                 dns_samples: int = DEFAULT_SAMPLES):
+        self.deadline = deadline
+        # DNS 服务器：名称 -> host[:port]
+        self.dns_servers = dns_servers or default_resolvers()
+        self.dns_samples = dns_samples
         self.results = {
             'timestamp': datetime.now().isoformat(),
             'system': platform.system(),
             'tests': {}
         }
-
-    def run_command(self, command: str) -> Tuple[str, str, int]:
-        """执行 shell 命令并返回结果"""
-        try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            return result.stdout.strip(), result.stderr.strip(), result.returncode
-        except subprocess.TimeoutExpired:
-            return "", "命令超时", -1
-        except Exception as e:
-            return "", str(e), -1
-
-    def check_gateway(self) -> Dict:
+        # 默认网关只查询一次，网关、MESH 节点与路由器检测共用
+        self._gateway_task = None
+
+    async def ping(self, target: str, count: int = 10, interval: float = 0.2) -> Tuple[str, str, int]:
+        """ping 目标主机"""
+        args = ['ping', '-c', str(count), '-i', str(interval), target]
+        return await run_command(args, timeout=count * interval + 10)
+
+    async def _discover_gateway(self) -> str:
+        if platform.system() == "Darwin":  # macOS: route -n get default 中的 gateway 行
+            stdout, _, _ = await run_command(['route', '-n', 'get', 'default'], timeout=5)
+            for line in stdout.split('\n'):
+                if line.strip().startswith('gateway:'):
+                    return line.split(':', 1)[1].strip()
+        else:  # Linux: ip route 中的 default via <网关>
+            stdout, _, _ = await run_command(['ip', 'route'], timeout=5)
+            for line in stdout.split('\n'):
+                parts = line.split()
+                if parts[:1] == ['default'] and 'via' in parts:
+                    return parts[parts.index('via') + 1]
+        return ''
+
+    async def get_gateway(self) -> str:
+        """获取默认网关（并发的检测共享同一次查询）"""
+        if self._gateway_task is None:
+            self._gateway_task = asyncio.ensure_future(self._discover_gateway())
+        # shield：某个检测超时被取消时，不影响其他检测等待同一次查询
+        return await asyncio.shield(self._gateway_task)
+
+    async def check_gateway(self) -> Dict:
         """检查默认网关连接状态"""
         print("🔍 检测网关连接...")
 
-        # 获取默认网关
-        if platform.system() == "Darwin":  # macOS
-            gateway_cmd = "route -n get default | grep gateway | awk '{print $2}'"
-        else:  # Linux
-            gateway_cmd = "ip route | grep default | awk '{print $3}'"
-
-        gateway, _, _ = self.run_command(gateway_cmd)
+        gateway = await self.get_gateway()
 
         if not gateway:
             return {'status': 'ERROR', 'message': '无法获取默认网关'}
 
         # Ping 网关
-        ping_cmd = f"ping -c 10 -i 0.2 {gateway}"
-        stdout, stderr, _ = self.run_command(ping_cmd)
+        stdout, stderr, _ = await self.ping(gateway)
 
-        # 解析 ping 结果
         if not stdout:
             return {'status': 'ERROR', 'message': 'Ping 无响应'}
 
-        lines = stdout.split('\n')
-        avg_time = None
-        packet_loss = "0%"
-        min_time = None
-        max_time = None
-
-        for line in lines:
-            # 检测丢包率
-            if 'packet loss' in line or 'loss' in line.lower():
-                parts = line.split()
-                for i, part in enumerate(parts):
-                    if '%' in part:
-                        packet_loss = part.replace('%', '') + '%'
-
-            # 检测延迟数据
-            # macOS: min/avg/max/stddev = 1.234/5.678/9.012/1.234 ms
-            # Linux: rtt min/avg/max/mdev = 1.234/5.678/9.012/1.234 ms
-            if '=' in line and ('min' in line or 'round-trip' in line):
-                try:
-                    data_part = line.split('=')[1].strip()
-                    # 移除 "ms" 单位
-                    data_part = data_part.replace('ms', '').strip()
-                    parts = data_part.split('/')
-                    if len(parts) >= 4:
-                        min_time = float(parts[0])
-                        avg_time = float(parts[1])
-                        max_time = float(parts[2])
-                except Exception as e:
-                    # 尝试从每行 ping 结果中提取
-                    pass
-
-            # 从单个 ping 结果提取时间 (macOS 格式: 64 bytes from ...: icmp_seq=0 ttl=64 time=1.234 ms)
-            if 'time=' in line and avg_time is None:
-                try:
-                    time_part = line.split('time=')[1].split()[0]
-                    return {
-                        'status': 'PARTIAL',
-                        'latency_ms': float(time_part),
-                        'note': '单次采样',
-                        'packet_loss': packet_loss
-                    }
-                except:
-                    pass
+        stats = parse_ping_output(stdout)
+        avg_time = stats['avg']
+        packet_loss = stats['packet_loss'] or "0%"
 
         return {
             'status': 'OK',
             'gateway': gateway,
-            'min_latency_ms': min_time,
+            'min_latency_ms': stats['min'],
             'avg_latency_ms': avg_time,
-            'max_latency_ms': max_time,
+            'max_latency_ms': stats['max'],
             'packet_loss': packet_loss,
             'analysis': self._analyze_gateway_latency(avg_time, packet_loss) if avg_time else "⚠️ 无法解析延迟数据"
         }
@@ -130,82 +158,47 @@ class NetworkDiagnostics:
         else:
             return f"🔴 较高 ({latency:.2f}ms) - 检查 MESH 节点连接"
 
-    def check_dns(self) -> Dict:
-        """测试 DNS 解析速度"""
+    async def check_dns(self) -> Dict:
+        """测试 DNS 解析速度：直接向各服务器发送查询（并发），每个服务器采样多次"""
         print("🔍 测试 DNS 解析...")
 
-        dns_servers = {
-            '默认': None,  # 使用系统默认
-            '阿里DNS': '223.5.5.5',
-            '腾讯DNS': '119.29.29.29',
-            'Cloudflare': '1.1.1.1',
-            'Google': '8.8.8.8'
-        }
-
-        results = {}
+        results = await sample_resolvers(self.dns_servers, DNS_TEST_DOMAIN, ('A',), self.dns_samples)
 
-        for name, server in dns_servers.items():
-            times = []
-            test_domain = "www.baidu.com"
-
-            for _ in range(5):
-                start = time.time()
-                try:
-                    if server:
-                        socket.setdefaulttimeout(2)
-                        socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((server, 53))
-                    resolver = socket.getaddrinfo(test_domain, 80)
-                    elapsed = (time.time() - start) * 1000
-                    times.append(elapsed)
-                except:
-                    times.append(2000)  # 超时
-
-            avg_time = statistics.mean(times) if times else 0
-            results[name] = {
-                'avg_ms': round(avg_time, 2),
-                'server': server or '系统默认'
+        fastest = fastest_resolver(results)
+        if fastest is None:
+            return {
+                'status': 'ERROR',
+                'message': '所有 DNS 服务器均未返回应答',
+                'results': results
             }
 
-        # 找出最快的 DNS
-        fastest = min(results.items(), key=lambda x: x[1]['avg_ms'])
-
         return {
             'status': 'OK',
+            'domain': DNS_TEST_DOMAIN,
             'results': results,
-            'recommendation': f"推荐使用 {fastest[0]} ({fastest[1]['server']})"
+            'recommendation': f"推荐使用 {fastest} ({results[fastest]['server']}，p50 {results[fastest]['p50_ms']}ms)"
         }
 
-    def check_internet_latency(self) -> Dict:
-        """测试到互联网的延迟"""
+    async def check_internet_latency(self) -> Dict:
+        """测试到互联网的延迟（各目标并发 ping）"""
         print("🔍 测试互联网连接...")
 
-        targets = {
-            '百度': 'www.baidu.com',
-            '阿里': 'www.aliyun.com',
-            'Cloudflare': '1.1.1.1'
-        }
+        outputs = await asyncio.gather(*(self.ping(target) for target in INTERNET_TARGETS.values()))
 
         results = {}
-
-        for name, target in targets.items():
-            ping_cmd = f"ping -c 10 -i 0.2 {target}"
-            stdout, stderr, _ = self.run_command(ping_cmd)
-
-            if not stderr:
-                lines = stdout.split('\n')
-                for line in lines:
-                    if 'min/avg/max' in line or 'round-trip' in line:
-                        try:
-                            parts = line.split('=')[1].strip().split('/')
-                            results[name] = {
-                                'min_ms': float(parts[0]),
-                                'avg_ms': float(parts[1]),
-                                'max_ms': float(parts[2]),
-                                'jitter_ms': float(parts[3]) if len(parts) > 3 else None
-                            }
-                            break
-                        except:
-                            results[name] = {'error': '解析失败'}
+        for name, (stdout, stderr, _) in zip(INTERNET_TARGETS, outputs):
+            if stderr:
+                continue
+            stats = parse_ping_output(stdout)
+            if stats['avg'] is not None:
+                results[name] = {
+                    'min_ms': stats['min'],
+                    'avg_ms': stats['avg'],
+                    'max_ms': stats['max'],
+                    'jitter_ms': stats['jitter']
+                }
+            elif stdout:
+                results[name] = {'error': '解析失败'}
 
         # 计算平均延迟
         avg_latencies = [r['avg_ms'] for r in results.values() if isinstance(r, dict) and 'avg_ms' in r]
@@ -232,23 +225,21 @@ class NetworkDiagnostics:
         else:
             return f"🔴 较高 ({latency:.2f}ms) - 建议检查带宽或联系运营商"
 
-    def check_bandwidth(self) -> Dict:
+    async def check_bandwidth(self) -> Dict:
         """测试带宽（需要安装 speedtest-cli）"""
         print("🔍 测试带宽...")
 
         # 检查是否安装 speedtest-cli
-        check_cmd = "which speedtest-cli || which speedtest"
-        stdout, _, returncode = self.run_command(check_cmd)
+        speedtest = shutil.which('speedtest-cli') or shutil.which('speedtest')
 
-        if returncode != 0:
+        if not speedtest:
             return {
                 'status': 'SKIP',
                 'message': '未安装 speedtest-cli，请运行: pip install speedtest-cli'
             }
 
         print("   带宽测试需要约30秒，请稍候...")
-        speedtest_cmd = "speedtest --simple --secure"
-        stdout, stderr, _ = self.run_command(speedtest_cmd)
+        stdout, stderr, _ = await run_command([speedtest, '--simple', '--secure'], timeout=PROBE_TIMEOUTS['带宽测试'])
 
         if stderr:
             return {'status': 'ERROR', 'message': stderr}
@@ -269,28 +260,29 @@ class NetworkDiagnostics:
             'results': results
         }
 
-    def check_mesh_nodes(self) -> Dict:
+    async def check_mesh_nodes(self) -> Dict:
         """检测本地网络中的 MESH 节点"""
         print("🔍 扫描 MESH 节点...")
 
         # 尝试常见的 ASUS 路由器 IP
         common_ips = ['192.168.1.1', '192.168.0.1', '192.168.50.1']
 
-        # 扫描本地网段
-        gateway, _, _ = self.run_command("route -n get default | grep gateway | awk '{print $2}'")
+        gateway = await self.get_gateway()
 
         if not gateway:
             return {'status': 'ERROR', 'message': '无法获取网关'}
 
-        # 扫描网段
-        network = '.'.join(gateway.split('.')[:3]) + '.0/24'
-
-        # 使用 nmap 或 arp-scan（如果可用）
-        scan_cmd = f"arp -a | grep -v incomplete"
-        stdout, _, _ = self.run_command(scan_cmd)
+        # ARP 表与常见路由器地址同时探测（macOS 的 -W 单位为毫秒，Linux 为秒）
+        wait = '1000' if platform.system() == "Darwin" else '1'
+        (arp_output, _, _), *pings = await asyncio.gather(
+            run_command(['arp', '-a'], timeout=10),
+            *(run_command(['ping', '-c', '1', '-W', wait, ip], timeout=5) for ip in common_ips)
+        )
 
         devices = []
-        for line in stdout.split('\n'):
+        for line in arp_output.split('\n'):
+            if 'incomplete' in line:
+                continue
             if 'asus' in line.lower() or 'router' in line.lower():
                 parts = line.split()
                 if len(parts) > 1:
@@ -298,9 +290,7 @@ class NetworkDiagnostics:
                     devices.append({'ip': ip, 'type': '可能的MESH节点'})
 
         # 检查路由器管理页面
-        for ip in common_ips:
-            ping_cmd = f"ping -c 1 -W 1000 {ip}"
-            stdout, stderr, _ = self.run_command(ping_cmd)
+        for ip, (stdout, stderr, _) in zip(common_ips, pings):
             if not stderr and 'time=' in stdout:
                 if ip not in [d['ip'] for d in devices]:
                     devices.append({'ip': ip, 'type': '网关/主路由'})
@@ -312,11 +302,11 @@ class NetworkDiagnostics:
             'count': len(devices)
         }
 
-    def check_router_web_interface(self) -> Dict:
+    async def check_router_web_interface(self) -> Dict:
         """尝试获取路由器信息"""
         print("🔍 检测路由器管理界面...")
 
-        gateway, _, _ = self.run_command("route -n get default | grep gateway | awk '{print $2}'")
+        gateway = await self.get_gateway()
 
         if not gateway:
             return {'status': 'ERROR', 'message': '无法获取网关地址'}
@@ -327,11 +317,10 @@ class NetworkDiagnostics:
             'gateway_url': f'http://{gateway}'
         }
 
-    def run_all_tests(self) -> Dict:
-        """运行所有诊断测试"""
-        print("=" * 50)
-        print("🚀 开始网络诊断...")
-        print("=" * 50)
+    async def run_all_tests_async(self) -> Dict:
+        """并发运行所有诊断测试，结果按固定顺序写入 self.results['tests']"""
+        self._gateway_task = None
+        scheduler = ProbeScheduler(deadline=self.deadline)
 
         tests = [
             ('网关连接', self.check_gateway),
@@ -341,19 +330,60 @@ class NetworkDiagnostics:
             ('路由器管理界面', self.check_router_web_interface),
             ('带宽测试', self.check_bandwidth),
         ]
-
         for test_name, test_func in tests:
-            print()
-            try:
-                self.results['tests'][test_name] = test_func()
-            except Exception as e:
-                self.results['tests'][test_name] = {
-                    'status': 'ERROR',
-                    'message': str(e)
-                }
+            scheduler.add(test_name, test_func, PROBE_TIMEOUTS[test_name])
+
+        start = time.perf_counter()
+        self.results['tests'].update(await scheduler.run())
+        elapsed_ms = (time.perf_counter() - start) * 1000
 
+        self.results['probe_timings_ms'] = scheduler.timings
+        self.results['duration_ms'] = round(elapsed_ms, 1)
+        print()
+        print(f"⏱️ 诊断耗时 {elapsed_ms / 1000:.1f}s（各项测试耗时之和 {sum(scheduler.timings.values()) / 1000:.1f}s）")
         return self.results
 
+    async def watch_sample(self) -> List[Tuple]:
+        """--watch 模式的一轮采样：并发 ping 网关与互联网目标，并向各 DNS 服务器查询一次"""
+        gateway = await self.get_gateway()
+        targets = {'网关': gateway} if gateway else {}
+        targets.update(INTERNET_TARGETS)
+        servers = [parse_server(server) for server in self.dns_servers.values()]
+
+        outputs, responses = await asyncio.gather(
+            asyncio.gather(*(self.ping(target, count=WATCH_PING_COUNT) for target in targets.values())),
+            asyncio.gather(
+                *(query(host, DNS_TEST_DOMAIN, 'A', port) for host, port in servers),
+                return_exceptions=True
+            )
+        )
+
+        measurements = []
+        for name, (stdout, _, _) in zip(targets, outputs):
+            stats = parse_ping_output(stdout)
+            if stats['packet_loss'] is None:
+                measurements.append(measurement(f'ping {name}', None, WATCH_PING_COUNT))
+                continue
+            lost = round(WATCH_PING_COUNT * float(stats['packet_loss'].rstrip('%')) / 100)
+            measurements.append(measurement(f'ping {name}', stats['avg'], WATCH_PING_COUNT, lost))
+        for name, response in zip(self.dns_servers, responses):
+            if isinstance(response, DNSError):
+                measurements.append(measurement(f'dns {name}', None))
+            elif isinstance(response, BaseException):
+                raise response
+            else:
+                measurements.append(measurement(f'dns {name}', response['elapsed_ms']))
+        return measurements
+
+    def run_all_tests(self) -> Dict:
+        """运行所有诊断测试"""
+        print("=" * 50)
+        print("🚀 开始网络诊断...")
+        print("=" * 50)
+        print()
+
+        return asyncio.run(self.run_all_tests_async())
+
     def print_report(self):
         """打印诊断报告"""
         print()
@@ -426,10 +456,50 @@ class NetworkDiagnostics:
         print("=" * 50)
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="家庭网络诊断")
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=DEFAULT_DEADLINE,
+        help=f"全部测试的截止时间（秒，默认 {DEFAULT_DEADLINE}）",
+    )
+    parser.add_argument(
+        "--dns-server",
+        action="append",
+        help="要测试的 DNS 服务器 host[:port]，可重复指定（默认为系统与公共 DNS 服务器）",
+    )
+    parser.add_argument(
+        "--dns-samples",
+        type=int,
+        default=DEFAULT_SAMPLES,
+        help=f"每个 DNS 服务器的查询次数（默认 {DEFAULT_SAMPLES}）",
+    )
+    add_watch_arguments(parser, default_store="network_watch.db")
+    return parser.parse_args()
+
+
 def main():
-    diagnostics = NetworkDiagnostics()
+    args = parse_args()
+    diagnostics = NetworkDiagnostics(
+        deadline=args.deadline,
+        dns_servers={server: server for server in args.dns_server} if args.dns_server else None,
+        dns_samples=args.dns_samples
+    )
 
     try:
+        if args.watch:
+            monitor = Monitor(
+                "家庭网络延迟趋势",
+                args.watch,
+                args.store,
+                window=args.window,
+                html_path=args.html,
+                rounds=args.rounds
+            )
+            asyncio.run(monitor.run(diagnostics.watch_sample))
+            return
+
         results = diagnostics.run_all_tests()
         diagnostics.print_report()
 
@@ -0,0 +1,273 @@
+"""
+Notion API 客户端
+sync_notion.py 与 export_to_obsidian.py 共用的 HTTP 会话层：
+连接池复用、请求超时、429/5xx 指数退避重试、全局限速与请求统计
+"""
+
+import os
+import random
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+from notion_cache import OfflineCacheMiss
+
+NOTION_API_BASE = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
+# 网络配置（可通过环境变量覆盖）
+NOTION_TIMEOUT = float(os.environ.get("NOTION_TIMEOUT", "30"))
+NOTION_MAX_RETRIES = int(os.environ.get("NOTION_MAX_RETRIES", "5"))
+
+# 需要重试的状态码：限流与服务端临时错误
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """线程安全的限速器，保证请求间隔不小于 1/rate 秒"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def acquire(self):
+        """阻塞直到允许发出下一个请求"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class NotionClient:
+    """带连接池、重试与统计的 Notion API 客户端（线程安全）"""
+
+    def __init__(
+        self,
+        token,
+        rate_limit=3,
+        pool_size=10,
+        timeout=NOTION_TIMEOUT,
+        max_retries=NOTION_MAX_RETRIES,
+        backoff_base=0.5,
+        backoff_max=30.0,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = RateLimiter(rate_limit)
+
+        # 复用 TCP/TLS 连接，连接池大小需不小于并发线程数
+        self.session = requests.Session()
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {token}",
+                "Notion-Version": NOTION_VERSION,
+                "Content-Type": "application/json",
+            }
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+
+        # 可选的磁盘响应缓存，见 enable_cache()
+        self.cache = None
+        self.offline = False
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "cache_hits": 0,
+            "latency": 0.0,
+            "max_latency": 0.0,
+        }
+
+    def enable_cache(self, cache, offline=False):
+        """启用响应缓存；offline=True 时只从缓存读取，缓存未命中即报错"""
+        self.cache = cache
+        self.offline = offline
+
+    def _record(self, latency=None, retry=False, error=False, cache_hit=False):
+        """更新请求统计"""
+        with self._stats_lock:
+            if cache_hit:
+                self.stats["cache_hits"] += 1
+            if latency is not None:
+                self.stats["requests"] += 1
+                self.stats["latency"] += latency
+                self.stats["max_latency"] = max(self.stats["max_latency"], latency)
+            if retry:
+                self.stats["retries"] += 1
+            if error:
+                self.stats["errors"] += 1
+
+    def _backoff_delay(self, attempt, response=None):
+        """计算重试等待时间：优先使用 Retry-After，否则指数退避加全抖动"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        ceiling = min(self.backoff_max, self.backoff_base * (2**attempt))
+        return random.uniform(0, ceiling)
+
+    def request(self, method, path, params=None, json=None):
+        """发送请求并返回 JSON，遇到 429/5xx 或网络错误时自动重试
+
+        启用缓存时，未过期的响应直接从缓存返回；过期但带 ETag 的响应
+        使用 If-None-Match 条件请求，服务端返回 304 时沿用缓存。
+        """
+        url = path if path.startswith("http") else f"{NOTION_API_BASE}{path}"
+
+        cached = None
+        headers = {}
+        if self.cache is not None:
+            cache_key = self.cache.make_key(method, url, params, json)
+            cached = self.cache.get(cache_key)
+            if cached is not None and (cached.fresh or self.offline):
+                self._record(cache_hit=True)
+                return cached.data
+            if self.offline:
+                raise OfflineCacheMiss(f"离线模式下缓存未命中: {method} {url}")
+            if cached is not None and cached.etag:
+                headers["If-None-Match"] = cached.etag
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    params=params,
+                    json=json,
+                    headers=headers,
+                    timeout=self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(latency=time.perf_counter() - start, error=True)
+                if attempt >= self.max_retries:
+                    raise
+                self._record(retry=True)
+                time.sleep(self._backoff_delay(attempt))
+                continue
+
+            self._record(latency=time.perf_counter() - start)
+
+            if (
+                response.status_code in RETRY_STATUS_CODES
+                and attempt < self.max_retries
+            ):
+                self._record(retry=True)
+                delay = self._backoff_delay(attempt, response)
+                print(
+                    f"  ⏳ Notion 返回 {response.status_code}，{delay:.1f} 秒后重试 "
+                    f"({attempt + 1}/{self.max_retries})"
+                )
+                time.sleep(delay)
+                continue
+
+            if response.status_code == 304 and cached is not None:
+                self._record(cache_hit=True)
+                self.cache.touch(cache_key)
+                return cached.data
+
+            if not response.ok:
+                self._record(error=True)
+            response.raise_for_status()
+            data = response.json()
+            if self.cache is not None:
+                self.cache.put(cache_key, url, data, response.headers.get("ETag"))
+            return data
+
+    def get(self, path, params=None):
+        return self.request("GET", path, params=params)
+
+    def post(self, path, json=None):
+        return self.request("POST", path, json=json)
+
+    def _iter_paginated(self, fetch_page):
+        """逐条产出分页结果；产出当前批次时，下一批已在后台线程请求中
+
+        fetch_page(cursor) 返回 Notion 的分页响应（results/has_more/next_cursor）。
+        """
+        with ThreadPoolExecutor(max_workers=1) as prefetch:
+            future = prefetch.submit(fetch_page, None)
+            while future is not None:
+                data = future.result()
+                future = None
+                if data.get("has_more") and data.get("next_cursor"):
+                    future = prefetch.submit(fetch_page, data["next_cursor"])
+                yield from data["results"]
+
+    def iter_database(
+        self, database_id, filter=None, sorts=None, page_size=100, edited_after=None
+    ):
+        """分页查询数据库，惰性地逐条产出页面
+
+        edited_after 为 ISO 8601 时间字符串时，只返回此后编辑过的页面，
+        与 filter 以 and 组合。
+        """
+        conditions = [filter] if filter else []
+        if edited_after:
+            conditions.append(
+                {
+                    "timestamp": "last_edited_time",
+                    "last_edited_time": {"on_or_after": edited_after},
+                }
+            )
+
+        payload = {"page_size": page_size}
+        if len(conditions) == 1:
+            payload["filter"] = conditions[0]
+        elif conditions:
+            payload["filter"] = {"and": conditions}
+        if sorts:
+            payload["sorts"] = sorts
+
+        path = f"/databases/{database_id}/query"
+
+        def fetch_page(cursor):
+            body = dict(payload)
+            if cursor:
+                body["start_cursor"] = cursor
+            return self.post(path, json=body)
+
+        return self._iter_paginated(fetch_page)
+
+    def iter_block_children(self, block_id, page_size=100):
+        """分页获取 block 的子 block，惰性地逐条产出"""
+        path = f"/blocks/{block_id}/children"
+
+        def fetch_page(cursor):
+            params = {"page_size": page_size}
+            if cursor:
+                params["start_cursor"] = cursor
+            return self.get(path, params=params)
+
+        return self._iter_paginated(fetch_page)
+
+    def summary(self):
+        """返回请求统计摘要"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        avg = stats["latency"] / stats["requests"] if stats["requests"] else 0.0
+        return (
+            f"请求 {stats['requests']} 次 | 重试 {stats['retries']} 次 | "
+            f"错误 {stats['errors']} 次 | 缓存命中 {stats['cache_hits']} 次 | "
+            f"平均耗时 {avg * 1000:.0f}ms | "
+            f"最长耗时 {stats['max_latency'] * 1000:.0f}ms"
+        )
+
+    def print_stats(self):
+        print(f"\n📡 Notion API 统计: {self.summary()}")
@@ -0,0 +1,133 @@
+"""
+Notion API 响应的本地磁盘缓存
+以请求内容的哈希为键存入 SQLite，支持 TTL 过期、ETag 条件请求、
+按总大小的 LRU 淘汰，以及完全不联网的离线模式
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# 缓存配置（可通过环境变量覆盖）
+NOTION_CACHE_PATH = os.environ.get("NOTION_CACHE_PATH", ".cache/notion-cache.sqlite")
+NOTION_CACHE_TTL = float(os.environ.get("NOTION_CACHE_TTL", "3600"))
+NOTION_CACHE_MAX_MB = float(os.environ.get("NOTION_CACHE_MAX_MB", "200"))
+
+
+class OfflineCacheMiss(Exception):
+    """离线模式下请求的数据不在缓存中"""
+
+
+class CachedResponse:
+    """缓存命中的结果"""
+
+    __slots__ = ("data", "etag", "fresh")
+
+    def __init__(self, data, etag, fresh):
+        self.data = data
+        self.etag = etag
+        self.fresh = fresh
+
+
+class ResponseCache:
+    """基于 SQLite 的响应缓存（线程安全）"""
+
+    def __init__(
+        self,
+        path=NOTION_CACHE_PATH,
+        ttl=NOTION_CACHE_TTL,
+        max_bytes=int(NOTION_CACHE_MAX_MB * 1024 * 1024),
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(method, url, params=None, body=None):
+        """根据请求方法、URL 与参数计算缓存键"""
+        payload = json.dumps(
+            [method.upper(), url, params or {}, body or {}],
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """读取缓存，未命中返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+        body, etag, stored_at = row
+        fresh = time.time() - stored_at < self.ttl
+        return CachedResponse(json.loads(body), etag, fresh)
+
+    def put(self, key, url, data, etag=None):
+        """写入缓存，超过容量上限时按最近最少使用淘汰"""
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO responses
+                   (key, url, body, etag, size, stored_at, accessed_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (key, url, body, etag, len(body), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, key):
+        """条件请求返回 304 时刷新缓存的存储时间"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        """删除最久未访问的条目，直到总大小不超过上限（需持有锁）"""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
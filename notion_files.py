@@ -0,0 +1,165 @@
+"""
+Notion 托管文件的本地镜像
+
+Notion 返回的 file 类型链接约一小时后失效，页面中直接引用会在之后失效。
+同步时把这些文件下载到按内容寻址的本地目录 images/notion/<sha256>.<ext>，页面引用本地副本：
+
+- 内容相同的文件只保存一份（跨页面去重）
+- 每个文件以来源（正文图片 block 的 ID、文章封面）为键记录版本，
+  版本未变且本地副本存在时不再下载；需要下载的文件并发获取
+- 页面重建或取消发布后不再被引用的文件会被清理
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlsplit
+
+import requests
+
+from output_writer import write_bytes, write_json
+
+NOTION_FILES_DIR = "images/notion"
+NOTION_FILES_MANIFEST_PATH = "data/notion-files.json"
+
+# 文件托管在 S3 上，不受 Notion API 限速约束
+NOTION_FILES_WORKERS = int(os.environ.get("NOTION_FILES_WORKERS", "8"))
+NOTION_FILES_TIMEOUT = 60
+
+
+def stable_url(url):
+    """去掉签名查询串后的链接：同一个上传文件的路径不变"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def file_extension(url):
+    ext = posixpath.splitext(unquote(urlsplit(url).path))[1].lower()
+    return ext if 1 < len(ext) <= 6 else ""
+
+
+def load_files_manifest(path=NOTION_FILES_MANIFEST_PATH):
+    """镜像状态：files 为 来源键 -> {"version", "path"}，pages 为 页面 ID -> 该页面引用的来源键"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {"files": data.get("files", {}), "pages": data.get("pages", {})}
+    except (OSError, ValueError):
+        return {"files": {}, "pages": {}}
+
+
+def save_files_manifest(manifest, path=NOTION_FILES_MANIFEST_PATH):
+    write_json(
+        path,
+        manifest,
+        trailing_newline=True,
+        ensure_ascii=False,
+        indent=2,
+        sort_keys=True,
+    )
+
+
+def store_file(data, ext, files_dir=NOTION_FILES_DIR):
+    """按内容哈希保存文件，已存在相同内容时不会重写"""
+    path = posixpath.join(files_dir, f"{hashlib.sha256(data).hexdigest()}{ext}")
+    write_bytes(path, data)
+    return path
+
+
+class NotionFileMirror:
+    """一次同步中的文件镜像：先登记所有引用，再统一并发下载"""
+
+    def __init__(
+        self, manifest_path=NOTION_FILES_MANIFEST_PATH, files_dir=NOTION_FILES_DIR
+    ):
+        self.manifest_path = manifest_path
+        self.files_dir = files_dir
+        self.manifest = load_files_manifest(manifest_path)
+        # 来源键 -> (版本, 当前链接)
+        self.pending = {}
+        self.page_keys = {}
+
+    def add(self, page_id, key, version, url):
+        """登记页面引用的一个 Notion 文件"""
+        self.pending[key] = (version, url)
+        self.page_keys.setdefault(page_id, []).append(key)
+
+    def _needs_download(self, key, version):
+        entry = self.manifest["files"].get(key)
+        return not (
+            entry and entry["version"] == version and os.path.exists(entry["path"])
+        )
+
+    def mirror(self, max_workers=NOTION_FILES_WORKERS):
+        """下载版本变化或本地缺失的文件，返回 来源键 -> 本地路径；下载失败的文件不在结果中"""
+        files = self.manifest["files"]
+        todo = {k: v for k, v in self.pending.items() if self._needs_download(k, v[0])}
+
+        # 同一个上传文件被多处引用时只下载一次
+        downloads = {}
+        for key, (_, url) in todo.items():
+            downloads.setdefault(stable_url(url), url)
+
+        if downloads:
+            print(
+                f"📥 镜像 Notion 文件 {len(downloads)} 个"
+                f"（复用 {len(self.pending) - len(todo)} 个，{max_workers} 线程）"
+            )
+        stored = {}
+        with requests.Session() as session, ThreadPoolExecutor(
+            max_workers=max(1, max_workers)
+        ) as executor:
+
+            def download(url):
+                response = session.get(url, timeout=NOTION_FILES_TIMEOUT)
+                response.raise_for_status()
+                return store_file(response.content, file_extension(url), self.files_dir)
+
+            futures = {
+                stable: executor.submit(download, url)
+                for stable, url in downloads.items()
+            }
+            for stable, future in futures.items():
+                try:
+                    stored[stable] = future.result()
+                except (OSError, requests.RequestException) as e:
+                    print(f"  ❌ 下载 Notion 文件失败: {stable} ({e})")
+
+        for key, (version, url) in todo.items():
+            path = stored.get(stable_url(url))
+            if path:
+                files[key] = {"version": version, "path": path}
+
+        # 下载失败时沿用已有的本地副本（即使版本较旧），仍好过失效的链接
+        return {
+            key: files[key]["path"]
+            for key in self.pending
+            if key in files and os.path.exists(files[key]["path"])
+        }
+
+    def commit(self, rebuilt_ids, published_ids):
+        """记录重建页面的引用，清理已取消发布页面与不再被引用的文件，保存状态"""
+        pages = self.manifest["pages"]
+        for page_id in rebuilt_ids:
+            pages[page_id] = self.page_keys.get(page_id, [])
+        for page_id in [
+            pid for pid in pages if pid not in published_ids or not pages[pid]
+        ]:
+            del pages[page_id]
+
+        files = self.manifest["files"]
+        in_use = {key for keys in pages.values() for key in keys}
+        for key in [k for k in files if k not in in_use]:
+            del files[key]
+
+        paths = {entry["path"] for entry in files.values()}
+        if os.path.isdir(self.files_dir):
+            for filename in sorted(os.listdir(self.files_dir)):
+                path = posixpath.join(self.files_dir, filename)
+                if path not in paths:
+                    os.remove(path)
+                    print(f"  🗑️  已删除不再引用的文件: {path}")
+
+        save_files_manifest(self.manifest, self.manifest_path)
@@ -0,0 +1,509 @@
+"""
+Notion block 的中间表示（IR）
+一次遍历把 block JSON 转换为紧凑的节点树，HTML（网站）、Markdown（Obsidian 导出）
+与纯文本（搜索索引）三个后端都从同一份 IR 渲染；IR 可序列化后缓存到磁盘
+"""
+
+import json
+import os
+
+from output_writer import write_json
+
+# IR 磁盘缓存目录：每个页面一个 JSON 文件，按 last_edited_time 判断是否可用
+IR_CACHE_DIR = os.environ.get("NOTION_IR_CACHE_DIR", ".cache/notion-ir")
+
+# 富文本样式位标记
+BOLD = 1
+ITALIC = 2
+CODE = 4
+STRIKETHROUGH = 8
+UNDERLINE = 16
+
+ANNOTATION_FLAGS = {
+    "bold": BOLD,
+    "italic": ITALIC,
+    "code": CODE,
+    "strikethrough": STRIKETHROUGH,
+    "underline": UNDERLINE,
+}
+
+# 列表项 block 类型 -> 列表节点类型
+LIST_KINDS = {
+    "bulleted_list_item": "bulleted_list",
+    "numbered_list_item": "numbered_list",
+    "to_do": "to_do_list",
+}
+
+# 这些 block 的子内容是独立页面/数据库，不展开
+SKIP_CHILDREN_TYPES = {"child_page", "child_database"}
+
+
+class Span:
+    """一段带样式的文本"""
+
+    __slots__ = ("text", "flags", "href")
+
+    def __init__(self, text, flags=0, href=None):
+        self.text = text
+        self.flags = flags
+        self.href = href
+
+
+class Node:
+    """IR 节点
+
+    kind 取值：paragraph、heading、bulleted_list、numbered_list、to_do_list、
+    list_item、quote、code、divider、callout、toggle、image。
+    列表节点的 children 是 list_item；其余节点的 children 是嵌套内容。
+    """
+
+    __slots__ = ("kind", "spans", "children", "attrs")
+
+    def __init__(self, kind, spans=(), children=(), attrs=None):
+        self.kind = kind
+        self.spans = list(spans)
+        self.children = list(children)
+        self.attrs = attrs or {}
+
+
+# ================================
+# block JSON -> IR
+# ================================
+
+
+def rich_text_to_spans(rich_text):
+    """将 Notion rich text 转换为 Span 列表"""
+    spans = []
+    for text in rich_text:
+        annotations = text.get("annotations", {})
+        flags = 0
+        for name, flag in ANNOTATION_FLAGS.items():
+            if annotations.get(name):
+                flags |= flag
+        spans.append(Span(text["plain_text"], flags, text.get("href")))
+    return spans
+
+
+def file_object_url(file):
+    """Notion 文件对象（外部链接或 Notion 托管文件）的 URL"""
+    if not file:
+        return ""
+    if file.get("type") == "external":
+        return file.get("external", {}).get("url", "")
+    if file.get("type") == "file":
+        return file.get("file", {}).get("url", "")
+    return ""
+
+
+def is_notion_file(file):
+    """是否为 Notion 托管的文件（链接约一小时后失效）"""
+    return bool(file) and file.get("type") == "file"
+
+
+def iter_nodes(nodes, kind):
+    """递归产出指定类型的节点"""
+    for node in nodes:
+        if node.kind == kind:
+            yield node
+        yield from iter_nodes(node.children, kind)
+
+
+def _prefetch_children(blocks, load_children, executor):
+    """为同一层中带子 block 的 block 准备子内容的获取函数
+
+    有线程池时立即并发提交请求，转换到该 block 时再等待结果；
+    没有线程池时在转换到该 block 时才同步请求。
+    """
+    loaders = {}
+    if load_children is None:
+        return loaders
+    for block in blocks:
+        if not block.get("has_children") or block["type"] in SKIP_CHILDREN_TYPES:
+            continue
+        block_id = block["id"]
+        if executor is not None:
+            loaders[block_id] = executor.submit(load_children, block_id).result
+        else:
+            loaders[block_id] = lambda block_id=block_id: load_children(block_id)
+    return loaders
+
+
+def block_to_node(block, children=()):
+    """将单个 block 转换为 IR 节点，不支持的类型返回 None"""
+    block_type = block["type"]
+    data = block.get(block_type, {})
+
+    if block_type == "paragraph":
+        return Node("paragraph", rich_text_to_spans(data["rich_text"]), children)
+
+    elif block_type in ("heading_1", "heading_2", "heading_3"):
+        level = int(block_type[-1])
+        return Node(
+            "heading", rich_text_to_spans(data["rich_text"]), children, {"level": level}
+        )
+
+    elif block_type in LIST_KINDS:
+        attrs = {"checked": bool(data.get("checked"))} if block_type == "to_do" else {}
+        return Node("list_item", rich_text_to_spans(data["rich_text"]), children, attrs)
+
+    elif block_type == "quote":
+        return Node("quote", rich_text_to_spans(data["rich_text"]), children)
+
+    elif block_type == "code":
+        text = "".join(t["plain_text"] for t in data["rich_text"])
+        return Node(
+            "code", attrs={"text": text, "language": data.get("language", "")}
+        )
+
+    elif block_type == "divider":
+        return Node("divider")
+
+    elif block_type == "callout":
+        icon = (data.get("icon") or {}).get("emoji", "💡")
+        return Node(
+            "callout", rich_text_to_spans(data["rich_text"]), children, {"icon": icon}
+        )
+
+    elif block_type == "toggle":
+        return Node("toggle", rich_text_to_spans(data["rich_text"]), children)
+
+    elif block_type == "image":
+        url = file_object_url(data)
+        if not url:
+            return None
+        # 图片说明作为 spans，纯文本后端可直接索引；
+        # Notion 托管的文件链接会过期，记录 block 的 ID 与编辑时间供本地镜像使用
+        attrs = {"url": url}
+        if is_notion_file(data):
+            attrs["notion_file"] = {
+                "key": block["id"],
+                "version": block.get("last_edited_time", ""),
+            }
+        return Node("image", rich_text_to_spans(data.get("caption", [])), attrs=attrs)
+
+    return None
+
+
+def blocks_to_ir(blocks, load_children=None, executor=None):
+    """将 block 列表（及其子 block）转换为 IR 节点列表
+
+    连续的同类列表项合并为一个列表节点。load_children(block_id) 用于获取
+    has_children 的子 block；传入 executor 时同一层的子 block 会并发获取。
+    """
+    loaders = _prefetch_children(blocks, load_children, executor)
+    nodes = []
+    current_list = None
+
+    for block in blocks:
+        loader = loaders.get(block["id"])
+        children = (
+            blocks_to_ir(loader(), load_children, executor) if loader else []
+        )
+        node = block_to_node(block, children)
+        if node is None:
+            current_list = None
+            continue
+
+        list_kind = LIST_KINDS.get(block["type"])
+        if list_kind:
+            if current_list is None or current_list.kind != list_kind:
+                current_list = Node(list_kind)
+                nodes.append(current_list)
+            current_list.children.append(node)
+        else:
+            current_list = None
+            nodes.append(node)
+
+    return nodes
+
+
+# ================================
+# 序列化与磁盘缓存
+# ================================
+
+
+def dump_ir(nodes):
+    """将 IR 转换为紧凑的 JSON 兼容结构"""
+    return [
+        [
+            node.kind,
+            [[span.text, span.flags, span.href] for span in node.spans],
+            dump_ir(node.children),
+            node.attrs,
+        ]
+        for node in nodes
+    ]
+
+
+def load_ir(data):
+    """从 dump_ir 的结果还原 IR"""
+    return [
+        Node(kind, [Span(*span) for span in spans], load_ir(children), attrs)
+        for kind, spans, children, attrs in data
+    ]
+
+
+def _ir_cache_path(page_id, cache_dir):
+    return os.path.join(cache_dir, f"{page_id}.json")
+
+
+def save_ir_cache(page_id, last_edited_time, nodes, cache_dir=IR_CACHE_DIR):
+    """缓存页面的 IR"""
+    write_json(
+        _ir_cache_path(page_id, cache_dir),
+        {"last_edited_time": last_edited_time, "nodes": dump_ir(nodes)},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def load_ir_cache(page_id, last_edited_time, cache_dir=IR_CACHE_DIR):
+    """读取页面的 IR 缓存，页面已被编辑或缓存不存在时返回 None"""
+    try:
+        with open(_ir_cache_path(page_id, cache_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("last_edited_time") != last_edited_time:
+        return None
+    return load_ir(data["nodes"])
+
+
+# ================================
+# HTML 后端
+# ================================
+
+
+def escape_html(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def escape_attr(text):
+    return escape_html(text).replace('"', "&quot;")
+
+
+def spans_to_html(spans):
+    """将 Span 列表渲染为 HTML"""
+    parts = []
+    for span in spans:
+        content = escape_html(span.text)
+
+        if span.flags & BOLD:
+            content = f"<strong>{content}</strong>"
+        if span.flags & ITALIC:
+            content = f"<em>{content}</em>"
+        if span.flags & STRIKETHROUGH:
+            content = f"<s>{content}</s>"
+        if span.flags & UNDERLINE:
+            content = f"<u>{content}</u>"
+        if span.flags & CODE:
+            content = f"<code>{content}</code>"
+
+        if span.href:
+            content = f'<a href="{span.href}">{content}</a>'
+
+        parts.append(content)
+
+    return "".join(parts)
+
+
+HTML_LIST_TAGS = {
+    "bulleted_list": "<ul>\n",
+    "numbered_list": "<ol>\n",
+    "to_do_list": '<ul class="todo-list">\n',
+}
+
+
+def iter_html(nodes):
+    """逐个产出 IR 的 HTML 片段"""
+    for node in nodes:
+        kind = node.kind
+        text = spans_to_html(node.spans)
+
+        if kind == "paragraph":
+            yield f"<p>{text}</p>\n"
+            yield from iter_html(node.children)
+
+        elif kind == "heading":
+            # 页面标题占用 h1，正文标题从 h2 开始
+            tag = f"h{node.attrs['level'] + 1}"
+            yield f"<{tag}>{text}</{tag}>\n"
+            yield from iter_html(node.children)
+
+        elif kind in HTML_LIST_TAGS:
+            yield HTML_LIST_TAGS[kind]
+            for item in node.children:
+                item_text = spans_to_html(item.spans)
+                if kind == "to_do_list":
+                    checked = " checked" if item.attrs.get("checked") else ""
+                    item_text = f'<input type="checkbox" disabled{checked}> {item_text}'
+                if item.children:
+                    yield f"<li>{item_text}\n"
+                    yield from iter_html(item.children)
+                    yield "</li>\n"
+                else:
+                    yield f"<li>{item_text}</li>\n"
+            yield "</ol>\n" if kind == "numbered_list" else "</ul>\n"
+
+        elif kind == "quote":
+            yield f"<blockquote><p>{text}</p></blockquote>\n"
+            yield from iter_html(node.children)
+
+        elif kind == "code":
+            yield f"<pre><code>{escape_html(node.attrs['text'])}</code></pre>\n"
+
+        elif kind == "divider":
+            yield "<hr>\n"
+
+        elif kind == "callout":
+            yield (
+                f'<div class="callout"><span class="callout-icon">{node.attrs["icon"]}</span>'
+                f'<div class="callout-content"><p>{text}</p>'
+            )
+            if node.children:
+                yield "\n"
+                yield from iter_html(node.children)
+            yield "</div></div>\n"
+
+        elif kind == "toggle":
+            yield f"<details><summary>{text}</summary>"
+            if node.children:
+                yield "\n"
+                yield from iter_html(node.children)
+            yield "</details>\n"
+
+        elif kind == "image":
+            alt = escape_attr("".join(span.text for span in node.spans))
+            yield (
+                f'<figure class="article-image"><img src="{escape_attr(node.attrs["url"])}"'
+                f' alt="{alt}" loading="lazy" decoding="async">'
+            )
+            if node.spans:
+                yield f"<figcaption>{text}</figcaption>"
+            yield "</figure>\n"
+
+
+def render_html(nodes):
+    """将 IR 渲染为 HTML（片段一次性拼接，耗时与长度成线性）"""
+    return "".join(iter_html(nodes))
+
+
+# ================================
+# Markdown 后端
+# ================================
+
+
+def spans_to_markdown(spans):
+    """将 Span 列表渲染为 Markdown"""
+    parts = []
+    for span in spans:
+        # 只转义可能会干扰格式的星号
+        content = span.text.replace("*", "\\*")
+
+        if span.flags & CODE:
+            content = f"`{content}`"
+        else:
+            if span.flags & BOLD:
+                content = f"**{content}**"
+            if span.flags & ITALIC:
+                content = f"*{content}*"
+            if span.flags & STRIKETHROUGH:
+                content = f"~~{content}~~"
+            if span.flags & UNDERLINE:
+                content = f"<u>{content}</u>"
+
+        if span.href:
+            content = f"[{content}]({span.href})"
+
+        parts.append(content)
+
+    return "".join(parts)
+
+
+def _prefix_lines(text, prefix):
+    """给每一行加前缀（空行只加去掉尾部空格的前缀）"""
+    return "".join(
+        (prefix + line if line.strip() else prefix.rstrip() + line)
+        for line in text.splitlines(keepends=True)
+    )
+
+
+def iter_markdown(nodes):
+    """逐个产出 IR 的 Markdown 片段"""
+    for node in nodes:
+        kind = node.kind
+        text = spans_to_markdown(node.spans)
+
+        if kind == "paragraph":
+            yield f"{text}\n\n"
+            yield from iter_markdown(node.children)
+
+        elif kind == "heading":
+            yield f"{'#' * node.attrs['level']} {text}\n\n"
+            yield from iter_markdown(node.children)
+
+        elif kind in ("bulleted_list", "numbered_list", "to_do_list"):
+            for item in node.children:
+                if kind == "numbered_list":
+                    marker = "1."
+                elif kind == "to_do_list":
+                    marker = "- [x]" if item.attrs.get("checked") else "- [ ]"
+                else:
+                    marker = "-"
+                yield f"{marker} {spans_to_markdown(item.spans)}\n"
+                if item.children:
+                    nested = render_markdown(item.children).rstrip("\n") + "\n"
+                    yield _prefix_lines(nested, "    ")
+            yield "\n"
+
+        elif kind == "quote":
+            yield f"> {text}\n\n"
+            yield from iter_markdown(node.children)
+
+        elif kind == "code":
+            yield f"```{node.attrs['language']}\n{node.attrs['text']}\n```\n\n"
+
+        elif kind == "divider":
+            yield "---\n\n"
+
+        elif kind == "callout":
+            body = f"{node.attrs['icon']} {text}\n"
+            if node.children:
+                body += "\n" + render_markdown(node.children).rstrip("\n") + "\n"
+            yield _prefix_lines(body, "> ") + "\n"
+
+        elif kind == "toggle":
+            # Obsidian 可折叠 callout
+            body = f"[!note]- {text}\n"
+            if node.children:
+                body += render_markdown(node.children).rstrip("\n") + "\n"
+            yield _prefix_lines(body, "> ") + "\n"
+
+        elif kind == "image":
+            alt = "".join(span.text for span in node.spans)
+            yield f"![{alt}]({node.attrs['url']})\n\n"
+
+
+def render_markdown(nodes):
+    """将 IR 渲染为 Markdown"""
+    return "".join(iter_markdown(nodes))
+
+
+# ================================
+# 纯文本后端（搜索索引）
+# ================================
+
+
+def iter_text(nodes):
+    """逐个产出 IR 中的文本，每个节点一段"""
+    for node in nodes:
+        if node.kind == "code":
+            yield node.attrs["text"]
+        elif node.spans:
+            yield "".join(span.text for span in node.spans)
+        yield from iter_text(node.children)
+
+
+def render_text(nodes):
+    """将 IR 渲染为以空格分隔的纯文本"""
+    return " ".join(text.strip() for text in iter_text(nodes) if text.strip())
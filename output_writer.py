@@ -0,0 +1,105 @@
+"""
+生成文件的写入层：内容未变时跳过，变化时经临时文件 + os.replace 原子替换
+
+构建产物（页面、索引、清单）都先在内存中生成，再经这里写入磁盘：
+- 与磁盘上的现有文件比较（先比大小，再逐字节比较），内容相同则不写，
+  文件的 mtime 不变，git 与部署也不会看到无意义的变更
+- 写入先落到同目录下的临时文件，再用 os.replace 替换，任务中途被终止也不会留下写了一半的文件
+- 记录本次运行写入与跳过的文件数和字节数，构建结束时打印
+"""
+
+import json
+import os
+import threading
+
+
+class WriteStats:
+    """本次运行的写入统计（线程安全：图片与文件镜像会在线程池中写入）"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.written = {}
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+
+    def record_write(self, path, size):
+        with self.lock:
+            self.written[os.path.normpath(path)] = size
+
+    def record_skip(self, size):
+        with self.lock:
+            self.skipped_files += 1
+            self.skipped_bytes += size
+
+    def was_written(self, path):
+        """文件是否在本次运行中被写入"""
+        with self.lock:
+            return os.path.normpath(path) in self.written
+
+
+stats = WriteStats()
+
+
+def is_unchanged(path, data):
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def write_bytes(path, data):
+    """内容变化时原子写入文件，返回是否实际写入"""
+    if is_unchanged(path, data):
+        stats.record_skip(len(data))
+        return False
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(
+        directory,
+        f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp",
+    )
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    stats.record_write(path, len(data))
+    return True
+
+
+def write_text(path, text):
+    """以 UTF-8 写入文本，返回是否实际写入"""
+    return write_bytes(path, text.encode("utf-8"))
+
+
+def write_json(path, data, trailing_newline=False, **kwargs):
+    """序列化为 JSON 后写入（参数同 json.dumps），返回是否实际写入"""
+    text = json.dumps(data, **kwargs)
+    return write_text(path, text + "\n" if trailing_newline else text)
+
+
+def format_size(size):
+    return f"{size / 1024:.1f} KB" if size >= 1024 else f"{size} B"
+
+
+def print_write_stats():
+    with stats.lock:
+        written_files = len(stats.written)
+        written_bytes = sum(stats.written.values())
+        skipped_files, skipped_bytes = stats.skipped_files, stats.skipped_bytes
+    print(
+        f"\n💾 文件写入: 写入 {written_files} 个 ({format_size(written_bytes)})"
+        f" | 内容未变跳过 {skipped_files} 个 ({format_size(skipped_bytes)})"
+    )
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+异步探测调度器 - 并发执行相互独立的网络探测
+
+- 外部命令（ping、arp、speedtest 等）通过 asyncio.create_subprocess_exec 执行，不经过 shell
+- 每个探测有单独的超时，全部探测共享一个全局截止时间
+- 同时运行的探测数量有上限，超时或出错的探测以 TIMEOUT/ERROR 结果返回，不影响其他探测
+
+一次诊断的耗时约等于最慢的探测，而不是所有探测耗时之和。
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+# 单个探测的默认超时与全部探测的默认截止时间（秒）
+DEFAULT_PROBE_TIMEOUT = 30
+DEFAULT_DEADLINE = 120
+DEFAULT_MAX_CONCURRENCY = 16
+
+
+async def run_command(args: List[str], timeout: float = DEFAULT_PROBE_TIMEOUT) -> Tuple[str, str, int]:
+    """执行外部命令（参数列表，不经过 shell），返回 (stdout, stderr, 返回码)；超时后终止进程"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    except FileNotFoundError:
+        return "", f"未找到命令: {args[0]}", -1
+    except OSError as e:
+        return "", str(e), -1
+
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return "", "命令超时", -1
+    except asyncio.CancelledError:
+        # 所属探测超时被取消时同样不留下子进程
+        process.kill()
+        raise
+    return (
+        stdout.decode('utf-8', errors='replace').strip(),
+        stderr.decode('utf-8', errors='replace').strip(),
+        process.returncode
+    )
+
+
+class SharedLookups:
+    """按键共享的异步查询：相同的键只执行一次，并发的调用方等待同一个结果
+
+    键的第一项为查询类型（如 ('whois', ip)），按类型统计实际执行与复用的次数。
+    """
+
+    def __init__(self):
+        self.tasks = {}
+        self.stats = {}
+
+    async def get(self, key: Tuple, lookup: Callable[[], Awaitable]):
+        stats = self.stats.setdefault(key[0], {'executed': 0, 'reused': 0})
+        if key in self.tasks:
+            stats['reused'] += 1
+        else:
+            stats['executed'] += 1
+            self.tasks[key] = asyncio.ensure_future(lookup())
+        # shield：某个调用方超时被取消时，不影响其他等待同一查询的调用方
+        return await asyncio.shield(self.tasks[key])
+
+
+class ProbeScheduler:
+    """按名称登记探测，并发执行并按登记顺序返回结果"""
+
+    def __init__(self, deadline: float = DEFAULT_DEADLINE, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.deadline = deadline
+        self.max_concurrency = max_concurrency
+        self.probes = []
+        # 探测名称 -> 实际耗时（毫秒）
+        self.timings = {}
+
+    def add(self, name: str, probe: Callable[[], Awaitable[Dict]], timeout: float = DEFAULT_PROBE_TIMEOUT):
+        """登记一个探测：probe 为返回结果字典的协程函数"""
+        self.probes.append((name, probe, timeout))
+
+    async def _run_probe(self, name, probe, timeout, deadline_at, semaphore) -> Dict:
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                return {'status': 'TIMEOUT', 'message': '超过全局截止时间，未执行'}
+
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(probe(), min(timeout, remaining))
+            except asyncio.TimeoutError:
+                if timeout <= remaining:
+                    message = f'探测超时 ({timeout:g}s)'
+                else:
+                    message = f'超过全局截止时间 ({self.deadline:g}s)'
+                result = {'status': 'TIMEOUT', 'message': message}
+            except Exception as e:
+                result = {'status': 'ERROR', 'message': str(e)}
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 1)
+            return result
+
+    async def run(self) -> Dict[str, Dict]:
+        """并发执行所有探测，返回 {探测名称: 结果}"""
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(
+            self._run_probe(name, probe, timeout, deadline_at, semaphore)
+            for name, probe, timeout in self.probes
+        ))
+        return {name: result for (name, _, _), result in zip(self.probes, results)}
@@ -1,72 +1,107 @@
-// 博客筛选和搜索功能
+// 文章列表：搜索已加载的文章，滚动到底部时从 JSON feed 加载下一页
+// 分类与标签筛选是独立的列表页（blog/category/、blog/tag/，由 blog_pages.py 生成）
 document.addEventListener('DOMContentLoaded', function() {
-    const categoryBtns = document.querySelectorAll('.category-btn');
-    const tagBtns = document.querySelectorAll('.tag-btn');
-    const blogCards = document.querySelectorAll('.blog-card');
+    const blogGrid = document.getElementById('blogGrid');
+    const pagination = document.getElementById('pagination');
     const searchInput = document.getElementById('searchInput');
 
-    // 当前筛选状态
-    let currentCategory = 'all';
-    let currentTag = 'all';
+    let nextFeed = blogGrid.dataset.nextFeed;
+    let loading = false;
 
-    // 应用筛选
-    function applyFilters() {
-        blogCards.forEach(card => {
-            const categoryMatch = currentCategory === 'all' || card.dataset.category === currentCategory;
-            const cardTags = card.dataset.tags || '';
-            const tagMatch = currentTag === 'all' || cardTags.includes(currentTag);
-
-            if (categoryMatch && tagMatch) {
-                card.classList.remove('hidden');
-                card.style.animation = 'fadeIn 0.5s ease-in-out';
-            } else {
-                card.classList.add('hidden');
-            }
-        });
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text == null ? '' : String(text);
+        return div.innerHTML;
     }
 
-    // 分类筛选功能
-    categoryBtns.forEach(btn => {
-        btn.addEventListener('click', function() {
-            categoryBtns.forEach(b => b.classList.remove('active'));
-            this.classList.add('active');
-            currentCategory = this.dataset.category;
-            applyFilters();
-        });
-    });
-
-    // 标签筛选功能
-    tagBtns.forEach(btn => {
-        btn.addEventListener('click', function() {
-            tagBtns.forEach(b => b.classList.remove('active'));
-            this.classList.add('active');
-            currentTag = this.dataset.tag;
-            applyFilters();
-        });
-    });
-
-    // 搜索功能
-    searchInput.addEventListener('input', function() {
-        const searchTerm = this.value.toLowerCase();
+    // 与 blog_pages.py 中的 blog_card 保持一致
+    function renderCard(item) {
+        const article = document.createElement('article');
+        article.className = 'bento-card p-6 blog-card';
+        article.dataset.category = item.category_en;
+        article.dataset.tags = item.tags.join(',');
+        article.innerHTML = `
+                    <div class="mb-3">
+                        <span class="tag tag--${escapeHtml(item.category_en)}">${escapeHtml(item.category)}</span>
+                    </div>
+                    <h3 class="text-xl font-bold mb-3 leading-tight">
+                        ${escapeHtml(item.title)}
+                    </h3>
+                    <p class="text-sm text-gray-600 mb-4 font-serif line-clamp-3">
+                        ${escapeHtml(item.excerpt)}
+                    </p>
+                    <div class="flex justify-between items-center">
+                        <div class="text-xs text-gray-500 font-mono">${escapeHtml(item.date)}${item.read_time ? ` · ${escapeHtml(item.read_time)}分钟` : ''}</div>
+                        <a href="${encodeURI(item.url)}" class="font-mono font-bold text-xs hover:text-brand-accent transition-colors">
+                            阅读 →
+                        </a>
+                    </div>`;
+        article.style.animation = 'fadeIn 0.5s ease-in-out';
+        return article;
+    }
 
-        blogCards.forEach(card => {
-            const title = card.querySelector('.blog-title').textContent.toLowerCase();
-            const excerpt = card.querySelector('.blog-excerpt').textContent.toLowerCase();
-            const tag = card.querySelector('.blog-tag').textContent.toLowerCase();
-            const itemTags = card.dataset.tags ? card.dataset.tags.toLowerCase() : '';
+    function matchesSearch(card, searchTerm) {
+        const title = card.querySelector('h3').textContent.toLowerCase();
+        const excerpt = card.querySelector('p').textContent.toLowerCase();
+        const tag = card.querySelector('.tag').textContent.toLowerCase();
+        const itemTags = card.dataset.tags ? card.dataset.tags.toLowerCase() : '';
+        return title.includes(searchTerm) || excerpt.includes(searchTerm) ||
+            tag.includes(searchTerm) || itemTags.includes(searchTerm);
+    }
 
-            if (title.includes(searchTerm) || excerpt.includes(searchTerm) || tag.includes(searchTerm) || itemTags.includes(searchTerm)) {
+    function applySearch(cards) {
+        const searchTerm = searchInput.value.trim().toLowerCase();
+        cards.forEach(card => {
+            if (searchTerm === '' || matchesSearch(card, searchTerm)) {
                 card.classList.remove('hidden');
-                card.style.animation = 'fadeIn 0.5s ease-in-out';
             } else {
                 card.classList.add('hidden');
             }
         });
+    }
 
-        // 如果搜索框清空，恢复当前筛选
-        if (searchTerm === '') {
-            applyFilters();
+    // 加载下一页 feed 并追加卡片
+    async function loadNextPage() {
+        if (!nextFeed || loading) return;
+        loading = true;
+        try {
+            const response = await fetch(nextFeed);
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const feed = await response.json();
+            const cards = feed.items.map(renderCard);
+            cards.forEach(card => blogGrid.appendChild(card));
+            applySearch(cards);
+            nextFeed = feed.next;
+        } catch (error) {
+            // 加载失败时恢复分页导航，仍可逐页浏览
+            console.error('加载文章列表失败:', error);
+            nextFeed = null;
+            pagination.classList.remove('is-infinite');
+        } finally {
+            loading = false;
         }
+        sentinelObserver.unobserve(sentinel);
+        // 重新观察：追加后哨兵仍在视口内时会立即继续加载
+        if (nextFeed) sentinelObserver.observe(sentinel);
+    }
+
+    // 分页导航之前的哨兵元素进入视口时加载下一页
+    const sentinel = document.createElement('div');
+    blogGrid.after(sentinel);
+    const sentinelObserver = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadNextPage();
+        }
+    }, { rootMargin: '600px 0px' });
+
+    if (nextFeed) {
+        pagination.classList.add('is-infinite');
+        sentinelObserver.observe(sentinel);
+    }
+
+    // 搜索功能（在已加载的文章中筛选）
+    searchInput.addEventListener('input', function() {
+        applySearch(blogGrid.querySelectorAll('.blog-card'));
     });
 });
 
@@ -98,8 +98,7 @@
         grid.innerHTML = sized.map((photo, i) => `
             <div class="gallery-item ${photo._bentoClass} reveal"
                  data-index="${i}" data-id="${photo.id}">
-                <img src="${photo.url}" alt="${photo.caption || photo.originalName}"
-                     loading="lazy">
+                ${photoImage(photo)}
                 <div class="gallery-item-overlay">
                     <div class="gallery-item-caption">${photo.caption || ''}</div>
                     <div class="gallery-item-meta">${photo.album}${photo.tags?.length ? ' · ' + photo.tags.join(' · ') : ''}</div>
@@ -114,6 +113,21 @@
         requestAnimationFrame(triggerReveal);
     }
 
+    // 构建期生成了响应式版本的照片（image_pipeline.py）使用 <picture>，并带上原图尺寸避免布局偏移
+    const GALLERY_IMAGE_SIZES = '(max-width: 768px) 100vw, 50vw';
+    const IMAGE_MIME_TYPES = { avif: 'image/avif', webp: 'image/webp' };
+
+    function photoImage(photo) {
+        const alt = photo.caption || photo.originalName;
+        if (!photo.srcset) {
+            return `<img src="${photo.url}" alt="${alt}" loading="lazy">`;
+        }
+        const sources = Object.entries(photo.srcset)
+            .map(([format, srcset]) => `<source type="${IMAGE_MIME_TYPES[format]}" srcset="${srcset}" sizes="${GALLERY_IMAGE_SIZES}">`)
+            .join('');
+        return `<picture>${sources}<img src="${photo.url}" alt="${alt}" width="${photo.width}" height="${photo.height}" loading="lazy" decoding="async"></picture>`;
+    }
+
     function assignBentoSizes(list) {
         return list.map((photo, i) => {
             let cls = '';
@@ -1,109 +1,50 @@
 // 相关文章推荐系统
+// 推荐结果由 generate_related.py 在构建时预先计算（related.json），页面只需查表
 class ArticleRecommendations {
     constructor() {
-        this.searchIndex = [];
-        this.currentArticle = null;
+        this.related = null;
+        this.currentURL = null;
         this.init();
     }
 
     async init() {
-        // 加载搜索索引
-        await this.loadSearchIndex();
+        // 获取当前文章地址
+        this.currentURL = window.location.pathname.split('/').pop();
+        if (!this.currentURL || !this.currentURL.endsWith('.html')) {
+            return;
+        }
 
-        // 获取当前文章信息
-        this.getCurrentArticleInfo();
+        // 加载预计算的推荐结果
+        await this.loadRelated();
 
         // 生成推荐
-        if (this.currentArticle) {
+        if (this.related) {
             this.generateRecommendations();
         }
     }
 
-    async loadSearchIndex() {
+    async loadRelated() {
         try {
-            const response = await fetch('search-index.json');
-            this.searchIndex = await response.json();
+            const response = await fetch('related.json');
+            this.related = await response.json();
         } catch (error) {
-            console.error('加载搜索索引失败:', error);
-        }
-    }
-
-    getCurrentArticleInfo() {
-        // 从页面中提取当前文章信息
-        const currentURL = window.location.pathname.split('/').pop();
-
-        // 从页面标签提取分类
-        const categoryTag = document.querySelector('.article-tag');
-        const category = categoryTag ? categoryTag.textContent.trim() : '';
-
-        // 从页面标题提取
-        const titleElement = document.querySelector('.article-title');
-        const title = titleElement ? titleElement.textContent.trim() : '';
-
-        if (currentURL && currentURL.endsWith('.html')) {
-            this.currentArticle = {
-                url: currentURL,
-                category: category,
-                title: title
-            };
+            console.error('加载相关文章失败:', error);
         }
     }
 
     generateRecommendations() {
-        const recommendations = this.findRelatedArticles();
+        const ids = this.related.related[this.currentURL] || [];
 
-        if (recommendations.length === 0) {
+        if (ids.length === 0) {
             return; // 没有推荐文章
         }
 
-        this.createRecommendationsSection(recommendations);
-    }
-
-    findRelatedArticles() {
-        if (!this.currentArticle || this.searchIndex.length === 0) {
-            return [];
-        }
+        const recommendations = ids.map(id => {
+            const [url, title, description, category] = this.related.docs[id];
+            return { url, title, description, category };
+        });
 
-        // 评分系统：根据相似度打分
-        const scoredArticles = this.searchIndex
-            .filter(article => article.url !== this.currentArticle.url) // 排除当前文章
-            .map(article => {
-                let score = 0;
-
-                // 相同分类：+10分
-                if (article.category === this.currentArticle.category) {
-                    score += 10;
-                }
-
-                // 标题相似度（简单实现：共同关键词）
-                const currentKeywords = this.extractKeywords(this.currentArticle.title);
-                const articleKeywords = this.extractKeywords(article.title);
-                const commonKeywords = currentKeywords.filter(k => articleKeywords.includes(k));
-                score += commonKeywords.length * 3;
-
-                // 关键词匹配
-                if (article.keywords && this.currentArticle.category) {
-                    if (article.keywords.toLowerCase().includes(this.currentArticle.category.toLowerCase())) {
-                        score += 5;
-                    }
-                }
-
-                return { ...article, score };
-            })
-            .filter(article => article.score > 0) // 只保留有分数的
-            .sort((a, b) => b.score - a.score) // 按分数排序
-            .slice(0, 3); // 最多3篇推荐
-
-        return scoredArticles;
-    }
-
-    extractKeywords(text) {
-        // 简单的关键词提取：分词 + 过滤停用词
-        const stopWords = ['的', '了', '和', '是', '在', '有', '我', '你', '他', '她', '这', '那', '与', '：', '、'];
-        return text
-            .split(/[\s\-:：、]/)
-            .filter(word => word.length > 1 && !stopWords.includes(word))
-            .map(word => word.toLowerCase());
+        this.createRecommendationsSection(recommendations);
     }
 
     createRecommendationsSection(recommendations) {
@@ -1,7 +1,16 @@
 // 全站搜索功能
+// 倒排索引由 generate_search_index.py 生成，词项切分规则须与其中的 TOKEN_PATTERN 一致：
+// 中文按相邻两字切分，英文/数字按单词切分。
+// 索引按词项首字符拆分为多个分片，启动时只加载清单，查询时按需下载涉及的分片
+const TOKEN_PATTERN = /[\u3400-\u4dbf\u4e00-\u9fff]+|[a-z0-9]+/g;
+
 class GlobalSearch {
     constructor() {
-        this.searchIndex = [];
+        this.manifest = null;
+        this.docs = null;
+        this.files = new Map();   // 文件路径 -> Promise
+        this.shards = new Map();  // 分片编号 -> { terms, keys }
+        this.searchSeq = 0;
         this.searchModal = null;
         this.searchInput = null;
         this.searchResults = null;
@@ -31,9 +40,9 @@ class GlobalSearch {
 
     async loadSearchIndex() {
         try {
-            const response = await fetch('search-index.json');
-            this.searchIndex = await response.json();
-            console.log(`✅ 搜索索引已加载: ${this.searchIndex.length} 个页面`);
+            const response = await fetch('search/manifest.json');
+            this.manifest = await response.json();
+            console.log(`✅ 搜索索引清单已加载: ${this.manifest.shards.length} 个分片`);
         } catch (error) {
             console.error('❌ 加载搜索索引失败:', error);
         }
@@ -124,7 +133,8 @@ class GlobalSearch {
         });
     }
 
-    handleSearch() {
+    async handleSearch() {
+        const seq = ++this.searchSeq;
         const query = this.searchInput.value.trim().toLowerCase();
 
         if (!query) {
@@ -140,8 +150,9 @@ class GlobalSearch {
             return;
         }
 
-        // 执行搜索
-        const results = this.search(query);
+        // 执行搜索（可能需要先下载分片），期间输入已变化则丢弃结果
+        const results = await this.search(query);
+        if (seq !== this.searchSeq) return;
 
         if (results.length === 0) {
             this.searchResults.innerHTML = `
@@ -171,46 +182,161 @@ class GlobalSearch {
         `;
     }
 
-    search(query) {
+    tokenize(text) {
+        const tokens = [];
+        (text.toLowerCase().match(TOKEN_PATTERN) || []).forEach(run => {
+            if (run.length > 1 && run.charCodeAt(0) > 127) {
+                for (let i = 0; i < run.length - 1; i++) {
+                    tokens.push(run.slice(i, i + 2));
+                }
+            } else {
+                tokens.push(run);
+            }
+        });
+        return tokens;
+    }
+
+    shardOf(token) {
+        return token.charCodeAt(0) % this.manifest.shard_count;
+    }
+
+    loadFile(path) {
+        // 分片文件名带内容哈希，每个文件只请求一次
+        if (!this.files.has(path)) {
+            const promise = fetch(`search/${path}`)
+                .then(response => response.json())
+                .catch(error => {
+                    this.files.delete(path);
+                    throw error;
+                });
+            this.files.set(path, promise);
+        }
+        return this.files.get(path);
+    }
+
+    async loadShards(tokens) {
+        const ids = new Set();
+        tokens.forEach(token => {
+            if (token.length === 1 && token.charCodeAt(0) > 127) {
+                // 单个汉字也可能是词项的第二个字，需要所有分片
+                this.manifest.shards.forEach((_, i) => ids.add(i));
+            } else {
+                ids.add(this.shardOf(token));
+            }
+        });
+
+        const [docs, ...shards] = await Promise.all([
+            this.loadFile(this.manifest.docs),
+            ...[...ids].map(i => this.loadFile(this.manifest.shards[i]))
+        ]);
+        this.docs = docs;
+        [...ids].forEach((id, i) => {
+            if (!this.shards.has(id)) {
+                // 排好序的词项列表，用于英文前缀匹配
+                this.shards.set(id, { terms: shards[i], keys: Object.keys(shards[i]).sort() });
+            }
+        });
+    }
+
+    lowerBound(keys, prefix) {
+        let lo = 0;
+        let hi = keys.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (keys[mid] < prefix) {
+                lo = mid + 1;
+            } else {
+                hi = mid;
+            }
+        }
+        return lo;
+    }
+
+    lookup(token) {
+        // 返回 文档编号 -> 字段掩码
+        const matches = new Map();
+        const add = (postings) => {
+            for (let i = 0; i < postings.length; i += 2) {
+                matches.set(postings[i], (matches.get(postings[i]) || 0) | postings[i + 1]);
+            }
+        };
+
+        if (token.charCodeAt(0) < 128) {
+            // 英文单词按前缀匹配，输入到一半也能搜到
+            const { terms, keys } = this.shards.get(this.shardOf(token));
+            for (let i = this.lowerBound(keys, token); i < keys.length && keys[i].startsWith(token); i++) {
+                add(terms[keys[i]]);
+            }
+        } else if (token.length === 1) {
+            // 单个汉字：匹配包含该字的所有词项
+            this.shards.forEach(({ terms, keys }) => {
+                keys.forEach(key => {
+                    if (key.includes(token)) add(terms[key]);
+                });
+            });
+        } else {
+            const { terms } = this.shards.get(this.shardOf(token));
+            if (terms[token]) add(terms[token]);
+        }
+
+        return matches;
+    }
+
+    async search(query) {
+        if (!this.manifest) return [];
+
         const keywords = query.split(/\s+/).filter(k => k.length > 0);
+        const keywordTokens = keywords.map(keyword => this.tokenize(keyword));
+
+        try {
+            await this.loadShards(keywordTokens.flat());
+        } catch (error) {
+            console.error('❌ 加载搜索分片失败:', error);
+            return [];
+        }
 
-        return this.searchIndex
-            .map(item => {
+        const { weights } = this.manifest;
+        const scores = new Map();
+
+        keywordTokens.forEach(tokens => {
+            if (tokens.length === 0) return;
+
+            // 关键词的所有词项须出现在同一字段中，字段掩码取交集
+            let matched = null;
+            for (const token of tokens) {
+                const postings = this.lookup(token);
+                if (matched === null) {
+                    matched = postings;
+                } else {
+                    matched.forEach((mask, doc) => {
+                        const other = postings.get(doc);
+                        if (other === undefined || (mask & other) === 0) {
+                            matched.delete(doc);
+                        } else {
+                            matched.set(doc, mask & other);
+                        }
+                    });
+                }
+                if (matched.size === 0) return;
+            }
+
+            // 标题 10、分类 5、关键词 3、描述 2、内容 1
+            matched.forEach((mask, doc) => {
                 let score = 0;
-                const searchText = `${item.title} ${item.description} ${item.content} ${item.category} ${item.keywords}`.toLowerCase();
-
-                keywords.forEach(keyword => {
-                    // 标题匹配权重最高
-                    if (item.title.toLowerCase().includes(keyword)) {
-                        score += 10;
-                    }
-
-                    // 分类匹配
-                    if (item.category.toLowerCase().includes(keyword)) {
-                        score += 5;
-                    }
-
-                    // 关键词匹配
-                    if (item.keywords.toLowerCase().includes(keyword)) {
-                        score += 3;
-                    }
-
-                    // 描述匹配
-                    if (item.description.toLowerCase().includes(keyword)) {
-                        score += 2;
-                    }
-
-                    // 内容匹配
-                    if (item.content.toLowerCase().includes(keyword)) {
-                        score += 1;
-                    }
+                weights.forEach((weight, bit) => {
+                    if (mask & (1 << bit)) score += weight;
                 });
+                scores.set(doc, (scores.get(doc) || 0) + score);
+            });
+        });
 
-                return { ...item, score };
-            })
-            .filter(item => item.score > 0)
-            .sort((a, b) => b.score - a.score)
-            .slice(0, 10); // 最多显示10个结果
+        return [...scores]
+            .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+            .slice(0, 10) // 最多显示10个结果
+            .map(([doc, score]) => {
+                const [url, title, description, category] = this.docs[doc];
+                return { url, title, description, category, score };
+            });
     }
 
     highlightText(text, query) {
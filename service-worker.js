@@ -2,6 +2,15 @@
 const CACHE_VERSION = 'v1.0.0';
 const CACHE_NAME = `personal-blog-${CACHE_VERSION}`;
 
+// 文件名带内容哈希的资源（dist/ 中的样式与脚本、搜索索引分片）内容永不变化，
+// 单独缓存且不随版本清理，命中后不再访问网络
+const IMMUTABLE_CACHE_NAME = 'personal-blog-immutable';
+const SEARCH_SHARD_PATTERN = /\/search\/shards\/[\w-]+\.[0-9a-f]{10}\.json$/;
+const IMMUTABLE_PATTERN = /(\/dist\/(styles|scripts|page-styles)\/[\w-]+\.[0-9a-f]{10}\.(css|js)|\/search\/shards\/[\w-]+\.[0-9a-f]{10}\.json)$/;
+
+// 搜索索引清单内容会变化，优先使用网络，离线时才用缓存
+const SEARCH_MANIFEST_PATTERN = /\/search\/manifest\.json$/;
+
 // 需要缓存的核心资源
 const CORE_ASSETS = [
     '/',
@@ -12,7 +21,7 @@ const CORE_ASSETS = [
     '/scripts/main.js',
     '/scripts/search.js',
     '/scripts/theme.js',
-    '/search-index.json'
+    '/search/manifest.json'
 ];
 
 // 安装Service Worker
@@ -30,6 +39,7 @@ self.addEventListener('install', (event) => {
 });
 
 // 激活Service Worker
+// CACHE_VERSION 由 asset_pipeline.py 根据资源 manifest 生成，资源变化时旧缓存随之清理
 self.addEventListener('activate', (event) => {
     console.log('[SW] 激活中...');
 
@@ -38,7 +48,7 @@ self.addEventListener('activate', (event) => {
             .then((cacheNames) => {
                 return Promise.all(
                     cacheNames
-                        .filter((name) => name !== CACHE_NAME)
+                        .filter((name) => name !== CACHE_NAME && name !== IMMUTABLE_CACHE_NAME)
                         .map((name) => {
                             console.log('[SW] 删除旧缓存:', name);
                             return caches.delete(name);
@@ -63,6 +73,27 @@ self.addEventListener('fetch', (event) => {
         return;
     }
 
+    const { pathname } = new URL(request.url);
+
+    if (IMMUTABLE_PATTERN.test(pathname)) {
+        event.respondWith(cacheFirst(request, IMMUTABLE_CACHE_NAME));
+        return;
+    }
+
+    if (SEARCH_MANIFEST_PATTERN.test(pathname)) {
+        event.respondWith(
+            fetchAndCache(request)
+                .then((response) => {
+                    if (response && response.status === 200) {
+                        event.waitUntil(pruneSearchShards(request.url, response.clone()));
+                    }
+                    return response;
+                })
+                .catch(() => caches.match(request))
+        );
+        return;
+    }
+
     event.respondWith(
         caches.match(request)
             .then((cachedResponse) => {
@@ -105,6 +136,38 @@ function fetchAndCache(request) {
         });
 }
 
+// 只读缓存，未命中时从网络获取并写入
+function cacheFirst(request, cacheName) {
+    return caches.open(cacheName)
+        .then((cache) => cache.match(request)
+            .then((cachedResponse) => cachedResponse || fetch(request)
+                .then((response) => {
+                    if (response && response.status === 200) {
+                        cache.put(request, response.clone());
+                    }
+                    return response;
+                })));
+}
+
+// 删除新清单不再引用的旧搜索分片
+function pruneSearchShards(manifestUrl, manifestResponse) {
+    return manifestResponse.json()
+        .then((manifest) => {
+            const inUse = new Set(
+                [manifest.docs, ...manifest.shards].map((path) => new URL(path, manifestUrl).href)
+            );
+            return caches.open(IMMUTABLE_CACHE_NAME)
+                .then((cache) => cache.keys()
+                    .then((requests) => Promise.all(
+                        requests
+                            .filter((cached) => SEARCH_SHARD_PATTERN.test(new URL(cached.url).pathname))
+                            .filter((cached) => !inUse.has(cached.url))
+                            .map((cached) => cache.delete(cached))
+                    )));
+        })
+        .catch(() => {});
+}
+
 // 监听消息
 self.addEventListener('message', (event) => {
     if (event.data.action === 'skipWaiting') {
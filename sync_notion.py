@@ -4,11 +4,37 @@ Notion 博客同步脚本（完整版）
 从 Notion Database 读取文章并生成 HTML，同时更新文章列表
 """
 
+import argparse
+import hashlib
+import json
 import os
 import re
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from asset_pipeline import normalize_asset_urls
+from blog_pages import build_blog_pages
+from critical_css import normalize_page_styles
+from image_pipeline import image_sources, process_images, responsive_images
+from notion_api import NotionClient
+from notion_cache import ResponseCache
+from notion_files import NotionFileMirror, stable_url
+from notion_ir import (
+    blocks_to_ir,
+    escape_attr,
+    file_object_url,
+    is_notion_file,
+    iter_nodes,
+    load_ir_cache,
+    render_html,
+    render_text,
+    rich_text_to_spans,
+    save_ir_cache,
+    spans_to_html,
+)
+from output_writer import print_write_stats, write_json, write_text
+from templating import render_template, template_files
+
 # Notion API 配置
 NOTION_TOKEN = os.environ.get("NOTION_TOKEN", "")
 DATABASE_ID = os.environ.get("NOTION_DATABASE_ID", "")
@@ -24,12 +50,24 @@ BREWING_NOTES_DB_ID = os.environ.get(
     "BREWING_NOTES_DB_ID", "5a158f1d0cb54aed8414c426133e03da"
 )
 
-NOTION_VERSION = "2022-06-28"
-HEADERS = {
-    "Authorization": f"Bearer {NOTION_TOKEN}",
-    "Notion-Version": NOTION_VERSION,
-    "Content-Type": "application/json",
-}
+# 并发抓取配置：Notion API 平均限速约 3 次/秒
+NOTION_MAX_WORKERS = int(os.environ.get("NOTION_MAX_WORKERS", "4"))
+NOTION_RATE_LIMIT = float(os.environ.get("NOTION_RATE_LIMIT", "3"))
+
+# 共享的 Notion 客户端（连接池、超时、重试、限速）
+notion = NotionClient(
+    NOTION_TOKEN, rate_limit=NOTION_RATE_LIMIT, pool_size=NOTION_MAX_WORKERS
+)
+
+# 增量同步状态：页面 ID -> last_edited_time、生成内容哈希与输出路径
+SYNC_MANIFEST_PATH = "data/notion-sync-manifest.json"
+
+# 影响文章渲染结果的源文件，变化时自动触发全量重建
+RENDERER_FILES = [
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "notion_ir.py"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_pipeline.py"),
+] + template_files()
 
 # 分类映射
 CATEGORY_MAP = {
@@ -41,110 +79,28 @@ CATEGORY_MAP = {
 }
 
 
-def query_database():
-    """查询 Notion 数据库获取所有已发布的文章"""
-    url = f"https://api.notion.com/v1/databases/{DATABASE_ID}/query"
-
-    payload = {
-        "filter": {"property": "已发布", "checkbox": {"equals": True}},
-        "sorts": [{"property": "发布日期", "direction": "descending"}],
-    }
+def query_database(page_size=100, edited_after=None):
+    """分页查询 Notion 数据库，惰性地逐条产出已发布的文章
 
-    response = requests.post(url, headers=HEADERS, json=payload)
-    response.raise_for_status()
-    return response.json()["results"]
+    edited_after 可限定只返回此后编辑过的页面。
+    """
+    return notion.iter_database(
+        DATABASE_ID,
+        filter={"property": "已发布", "checkbox": {"equals": True}},
+        sorts=[{"property": "发布日期", "direction": "descending"}],
+        page_size=page_size,
+        edited_after=edited_after,
+    )
 
 
 def get_page_content(page_id):
     """获取页面内容（blocks），支持分页获取"""
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-    all_blocks = []
-    start_cursor = None
-
-    while True:
-        params = {}
-        if start_cursor:
-            params["start_cursor"] = start_cursor
-
-        response = requests.get(url, headers=HEADERS, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        all_blocks.extend(data["results"])
-
-        # 检查是否还有更多内容
-        if not data.get("has_more"):
-            break
-
-        start_cursor = data.get("next_cursor")
-
-    return all_blocks
-
-
-def block_to_html(block):
-    """将 Notion block 转换为 HTML"""
-    block_type = block["type"]
-
-    if block_type == "paragraph":
-        text = rich_text_to_html(block["paragraph"]["rich_text"])
-        return f"<p>{text}</p>\n"
-
-    elif block_type == "heading_1":
-        text = rich_text_to_html(block["heading_1"]["rich_text"])
-        return f"<h2>{text}</h2>\n"
-
-    elif block_type == "heading_2":
-        text = rich_text_to_html(block["heading_2"]["rich_text"])
-        return f"<h3>{text}</h3>\n"
-
-    elif block_type == "heading_3":
-        text = rich_text_to_html(block["heading_3"]["rich_text"])
-        return f"<h4>{text}</h4>\n"
-
-    elif block_type == "bulleted_list_item":
-        text = rich_text_to_html(block["bulleted_list_item"]["rich_text"])
-        return f"<li>{text}</li>\n"
-
-    elif block_type == "numbered_list_item":
-        text = rich_text_to_html(block["numbered_list_item"]["rich_text"])
-        return f"<li>{text}</li>\n"
-
-    elif block_type == "quote":
-        text = rich_text_to_html(block["quote"]["rich_text"])
-        return f"<blockquote><p>{text}</p></blockquote>\n"
-
-    elif block_type == "code":
-        text = plain_text(block["code"]["rich_text"])
-        return f"<pre><code>{text}</code></pre>\n"
-
-    return ""
+    return list(notion.iter_block_children(page_id))
 
 
 def rich_text_to_html(rich_text):
     """将 Notion rich text 转换为 HTML"""
-    html = ""
-    for text in rich_text:
-        content = text["plain_text"]
-        # HTML 转义
-        content = (
-            content.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        )
-
-        annotations = text.get("annotations", {})
-
-        if annotations.get("bold"):
-            content = f"<strong>{content}</strong>"
-        if annotations.get("italic"):
-            content = f"<em>{content}</em>"
-        if annotations.get("code"):
-            content = f"<code>{content}</code>"
-
-        if text.get("href"):
-            content = f'<a href="{text["href"]}">{content}</a>'
-
-        html += content
-
-    return html
+    return spans_to_html(rich_text_to_spans(rich_text))
 
 
 def plain_text(rich_text):
@@ -176,20 +132,14 @@ def get_property_value(properties, prop_name):
     elif prop_type == "files":
         # 处理文件类型（如封面图）
         files = prop.get("files", [])
-        if files and len(files) > 0:
-            # 返回第一个文件的URL
-            file = files[0]
-            if file.get("type") == "external":
-                return file.get("external", {}).get("url", "")
-            elif file.get("type") == "file":
-                return file.get("file", {}).get("url", "")
-        return ""
+        # 返回第一个文件的URL
+        return file_object_url(files[0]) if files else ""
 
     return ""
 
 
 def generate_article_html(article_data):
-    """生成文章 HTML（Neo-Brutalism 设计）"""
+    """生成文章 HTML（Neo-Brutalism 设计，模板见 templates/article.html）"""
     # 生成分类标签的CSS类
     category_class_map = {
         "career": "tag--teal",
@@ -201,706 +151,32 @@ def generate_article_html(article_data):
     category_en = article_data.get("category_en", "personal")
     tag_class = category_class_map.get(category_en, "tag--personal")
 
-    template = """<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title} - 计划李</title>
-
-    <!-- SEO Meta Tags -->
-    <meta name="description" content="{description}">
-    <meta name="keywords" content="{keywords}">
-    <meta name="author" content="计划李 (Kevin)">
-    <meta name="robots" content="index, follow">
-    <meta name="language" content="zh-CN">
-
-    <!-- Open Graph Meta Tags -->
-    <meta property="og:type" content="article">
-    <meta property="og:title" content="{title}">
-    <meta property="og:description" content="{description}">
-    <meta property="og:url" content="{article_url}">
-    <meta property="og:site_name" content="计划李的个人博客">
-    <meta property="og:locale" content="zh_CN">
-    <meta property="article:author" content="计划李">
-    <meta property="article:published_time" content="{date_short}">
-    <meta property="article:section" content="{category}">
-
-    <!-- Twitter Card Meta Tags -->
-    <meta name="twitter:card" content="summary">
-    <meta name="twitter:title" content="{title}">
-    <meta name="twitter:description" content="{description}">
-    <meta name="twitter:creator" content="@计划李">
-
-    <!-- Canonical URL -->
-    <link rel="canonical" href="{article_url}">
-
-    <!-- Google Fonts -->
-    <link rel="preconnect" href="https://fonts.googleapis.com">
-    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-    <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@300;400;500;700;900&family=Noto+Serif+SC:wght@400;700&family=Inter:wght@300;400;600;800&family=JetBrains+Mono:wght@400;700&display=swap" rel="stylesheet">
-
-    <!-- Tailwind CSS -->
-    <script src="https://cdn.tailwindcss.com"></script>
-
-    <script>
-        tailwind.config = {{
-            theme: {{
-                extend: {{
-                    colors: {{
-                        brand: {{
-                            black: '#0a0a0a',
-                            white: '#f4f4f0',
-                            accent: '#FF4D00',
-                            blue: '#0047AB',
-                            green: '#059669',
-                            gray: '#8a8a8a'
-                        }}
-                    }},
-                    fontFamily: {{
-                        sans: ['"Noto Sans SC"', 'Inter', 'sans-serif'],
-                        serif: ['"Noto Serif SC"', 'serif'],
-                        mono: ['"JetBrains Mono"', 'monospace'],
-                    }}
-                }}
-            }}
-        }}
-    </script>
-
-    <link rel="stylesheet" href="styles/main.css">
-    <link rel="stylesheet" href="styles/neo-brutalism.css">
-
-    <style>
-        /* 文章页面专用样式 */
-        .article-wrapper {{
-            max-width: 960px;
-            margin: 0 auto;
-            padding: 0 1rem;
-        }}
-
-        @media (min-width: 768px) {{
-            .article-wrapper {{
-                padding: 0 2rem;
-            }}
-        }}
-
-        .article-content p {{
-            font-family: 'Noto Serif SC', Georgia, serif;
-            font-size: 1.175rem;
-            line-height: 2;
-            margin-bottom: 1.75rem;
-            color: #1f2937;
-            letter-spacing: 0.01em;
-        }}
-
-        .article-content h2 {{
-            font-size: 1.75rem;
-            font-weight: 700;
-            margin-top: 3rem;
-            margin-bottom: 1rem;
-            color: #0a0a0a;
-            padding-left: 1rem;
-            border-left: 4px solid #FF4D00;
-        }}
-
-        .article-content h3 {{
-            font-size: 1.5rem;
-            font-weight: 700;
-            margin-top: 2.5rem;
-            margin-bottom: 1rem;
-            color: #0a0a0a;
-            padding-left: 1rem;
-            border-left: 4px solid #0a0a0a;
-        }}
-
-        .article-content h4 {{
-            font-size: 1.25rem;
-            font-weight: 700;
-            margin-top: 2rem;
-            margin-bottom: 0.75rem;
-            color: #0a0a0a;
-        }}
-
-        .article-content blockquote {{
-            background: white;
-            border: 1px solid #0a0a0a;
-            border-left: 4px solid #FF4D00;
-            padding: 1.5rem;
-            margin: 2rem 0;
-            font-family: 'Noto Serif SC', serif;
-            font-style: italic;
-        }}
-
-        .article-content ul,
-        .article-content ol {{
-            margin-bottom: 1.5rem;
-            padding-left: 1.5rem;
-        }}
-
-        .article-content li {{
-            font-family: 'Noto Serif SC', Georgia, serif;
-            margin-bottom: 0.75rem;
-            font-size: 1.175rem;
-            line-height: 2;
-            color: #1f2937;
-        }}
-
-        .article-content a {{
-            color: #FF4D00;
-            text-decoration: underline;
-            text-underline-offset: 2px;
-        }}
-
-        .article-content a:hover {{
-            background: #FF4D00;
-            color: white;
-            text-decoration: none;
-            padding: 0 0.25rem;
-        }}
-
-        .article-content code {{
-            background: #f4f4f0;
-            border: 1px solid #0a0a0a;
-            padding: 0.125rem 0.375rem;
-            font-family: 'JetBrains Mono', monospace;
-            font-size: 0.9em;
-        }}
-
-        .article-content pre {{
-            background: #0a0a0a;
-            color: #f4f4f0;
-            padding: 1.5rem;
-            border: 2px solid #0a0a0a;
-            overflow-x: auto;
-            margin: 2rem 0;
-        }}
-
-        .article-content pre code {{
-            background: none;
-            border: none;
-            padding: 0;
-            color: inherit;
-        }}
-
-        .article-content strong {{
-            font-weight: 700;
-            color: #0a0a0a;
-        }}
-
-        /* 目录导航样式 */
-        .toc-container {{
-            position: fixed;
-            top: 120px;
-            /* 居中定位：左右边距相等
-               计算：正文右边缘 = 50vw + 480px
-                    右侧空白中点 = 75vw + 240px
-                    使用 translateX(-50%) 实现目录自身居中 */
-            left: calc(75vw + 240px);
-            transform: translateX(-50%);
-            max-height: calc(100vh - 160px);
-            overflow-y: auto;
-            z-index: 100;
-            padding: 0 1rem;
-            /* 自定义滚动条 */
-            scrollbar-width: thin;
-            scrollbar-color: #d1d5db transparent;
-        }}
-
-        .toc-container::-webkit-scrollbar {{
-            width: 4px;
-        }}
-
-        .toc-container::-webkit-scrollbar-track {{
-            background: transparent;
-        }}
-
-        .toc-container::-webkit-scrollbar-thumb {{
-            background-color: #d1d5db;
-            border-radius: 2px;
-        }}
-
-        .toc-container::-webkit-scrollbar-thumb:hover {{
-            background-color: #9ca3af;
-        }}
-
-        /* 当屏幕宽度不足以容纳正文+目录时，隐藏目录 */
-        @media (max-width: 1300px) {{
-            .toc-container {{
-                display: none;
-            }}
-        }}
-
-        .toc-card {{
-            background: rgba(255, 255, 255, 0.95);
-            backdrop-filter: blur(10px);
-            border: 2px solid #0a0a0a;
-            padding: 1rem 1.25rem;
-            box-shadow: 4px 4px 0px rgba(10, 10, 10, 0.1);
-            border-radius: 8px;
-            width: max-content;
-            max-width: 100%;
-        }}
-
-        .toc-header {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 1rem;
-            padding-bottom: 0.75rem;
-            border-bottom: 1px solid #e5e7eb;
-        }}
-
-        .toc-title {{
-            font-family: 'JetBrains Mono', monospace;
-            font-size: 0.7rem;
-            font-weight: 700;
-            text-transform: uppercase;
-            letter-spacing: 0.15em;
-            color: #0a0a0a;
-            margin-bottom: 1rem;
-            padding-bottom: 0.75rem;
-            border-bottom: 2px solid #0a0a0a;
-            display: flex;
-            align-items: center;
-            gap: 0.5rem;
-        }}
-
-        .toc-title::before {{
-            content: '▸';
-            font-size: 0.9rem;
-            color: #FF4D00;
-        }}
-
-        .toc-list {{
-            list-style: none;
-            margin: 0;
-            padding: 0;
-        }}
-
-        .toc-item {{
-            margin: 0.25rem 0;
-        }}
-
-        .toc-link {{
-            display: flex;
-            align-items: center;
-            gap: 0.5rem;
-            padding: 0.4rem 0.75rem;
-            margin: 0.15rem 0;
-            color: #4b5563;
-            text-decoration: none;
-            border-radius: 0 4px 4px 0;
-            transition: all 0.2s ease;
-            font-size: 0.825rem;
-            font-weight: 500;
-            white-space: nowrap;
-            line-height: 1.5;
-        }}
-
-        .toc-link:hover {{
-            color: #0a0a0a;
-            background: rgba(255, 77, 0, 0.05);
-        }}
-
-        .toc-link.active {{
-            color: #FF4D00;
-            background: rgba(255, 77, 0, 0.08);
-            font-weight: 600;
-        }}
-
-        .toc-link.active .toc-bullet {{
-            background: #FF4D00;
-        }}
-
-        .toc-bullet {{
-            width: 6px;
-            height: 6px;
-            border-radius: 50%;
-            background: #666;
-            flex-shrink: 0;
-            transition: background 0.2s;
-        }}
-
-        .toc-text {{
-            flex: 1;
-            min-width: 0;
-            overflow: hidden;
-            text-overflow: ellipsis;
-        }}
-
-        .toc-nav {{
-            max-height: 500px;
-            overflow-y: auto;
-            overflow-x: hidden;
-            transition: max-height 0.3s ease;
-        }}
-
-        .toc-nav::-webkit-scrollbar {{
-            width: 4px;
-        }}
-
-        .toc-nav::-webkit-scrollbar-track {{
-            background: #f9fafb;
-        }}
-
-        .toc-nav::-webkit-scrollbar-thumb {{
-            background: #d1d5db;
-            border-radius: 2px;
-        }}
-
-        .toc-container.collapsed .toc-nav {{
-            max-height: 0 !important;
-        }}
-
-        /* 中等屏幕适配 */
-        @media (max-width: 1200px) {{
-            .toc-container {{
-                right: calc((100% - 960px) / 2);
-            }}
-        }}
-
-        /* 移动端适配 */
-        @media (max-width: 768px) {{
-            .toc-container {{
-                position: static;
-                margin-bottom: 1.5rem;
-            }}
-
-            .toc-nav {{
-                max-height: 300px;
-            }}
-        }}
-
-        /* 阅读进度条 */
-
-        /* 阅读进度条 */
-        .reading-progress {{
-            position: fixed;
-            top: 0;
-            left: 0;
-            width: 0%;
-            height: 3px;
-            background: #FF4D00;
-            z-index: 9999;
-            transition: width 0.1s ease-out;
-        }}
-
-        /* 返回顶部按钮 */
-        .back-to-top {{
-            position: fixed;
-            bottom: 2rem;
-            right: 2rem;
-            width: 48px;
-            height: 48px;
-            background: #0a0a0a;
-            color: white;
-            border: 2px solid #0a0a0a;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            cursor: pointer;
-            opacity: 0;
-            visibility: hidden;
-            transform: translateY(20px);
-            transition: all 0.3s ease;
-            z-index: 1000;
-            font-size: 1.25rem;
-        }}
-
-        .back-to-top:hover {{
-            background: #FF4D00;
-            border-color: #FF4D00;
-            transform: translateY(-4px);
-            box-shadow: 4px 4px 0px #0a0a0a;
-        }}
-
-        .back-to-top.visible {{
-            opacity: 1;
-            visibility: visible;
-            transform: translateY(0);
-        }}
-
-        @media (max-width: 768px) {{
-            .back-to-top {{
-                bottom: 1rem;
-                right: 1rem;
-                width: 40px;
-                height: 40px;
-            }}
-        }}
-    </style>
-</head>
-<body class="bg-grid min-h-screen">
-    <!-- 阅读进度条 -->
-    <div class="reading-progress" id="reading-progress"></div>
-
-    <!-- 返回顶部按钮 -->
-    <button class="back-to-top" id="back-to-top" title="返回顶部">↑</button>
-
-    <!-- 导航栏 -->
-    <nav class="nav">
-        <div class="container">
-            <div class="nav-content">
-                <a href="index.html" class="logo">计划李</a>
-                <ul class="nav-links">
-                    <li><a href="index.html">首页</a></li>
-                    <li><a href="blog.html">文章</a></li>
-                    <li><a href="visual-design.html">认知武器</a></li>
-                    <li><a href="coffee.html">咖啡角</a></li>
-                    <li><a href="about.html">关于</a></li>
-                </ul>
-            </div>
-        </div>
-    </nav>
-
-    <!-- 目录导航 -->
-    <aside class="toc-container" id="toc">
-        <div class="toc-card">
-            <div class="toc-title">目录</div>
-            <ul class="toc-list" id="toc-list">
-                <!-- 由 JavaScript 动态生成 -->
-            </ul>
-        </div>
-    </aside>
-
-    <!-- 文章内容 -->
-    <article class="py-12 md:py-16">
-        <div class="article-wrapper">
-            <!-- 文章头部卡片 -->
-            <div class="bento-card p-8 md:p-12 mb-8 reveal">
-                <div class="mb-4">
-                    <span class="tag {tag_class}">{category}</span>
-                </div>
-                <h1 class="text-3xl md:text-4xl lg:text-5xl font-black mb-6 leading-tight display-text">
-                    {title}
-                </h1>
-                <p class="font-serif italic text-lg md:text-xl text-gray-600 mb-6">
-                    {excerpt}
-                </p>
-                <div class="flex flex-wrap gap-2 text-xs font-mono text-gray-500">
-                    <span>{date_short}</span>
-                    <span>·</span>
-                    <span>{read_time}分钟</span>
-                </div>
-            </div>
-
-            <!-- 文章正文 -->
-            <div class="bento-card p-8 md:p-12">
-                <div class="article-content">
-                    {content}
-                </div>
-            </div>
-        </div>
-    </article>
-
-    <!-- 页脚 -->
-    <footer class="footer">
-        <div class="container">
-            <div class="footer-content">
-                <p>&copy; 2025 计划李. All rights reserved.</p>
-                <div class="social-links">
-                    <a href="https://www.zhihu.com/people/xia-yu-de-xia-tian-40" target="_blank">知乎</a>
-                    <a href="https://github.com" target="_blank">GitHub</a>
-                </div>
-            </div>
-        </div>
-    </footer>
-
-    <script>
-        // Reveal 动画
-        const revealElements = document.querySelectorAll('.reveal');
-        const observer = new IntersectionObserver((entries) => {{
-            entries.forEach(entry => {{
-                if (entry.isIntersecting) {{
-                    entry.target.classList.add('active');
-                }}
-            }});
-        }}, {{ threshold: 0.1 }});
-
-        revealElements.forEach(el => {{
-            observer.observe(el);
-        }});
-
-        // 目录导航生成
-        document.addEventListener('DOMContentLoaded', function() {{
-            const articleContent = document.querySelector('.article-content');
-            const tocList = document.getElementById('toc-list');
-            const headings = articleContent.querySelectorAll('h2, h3, h4');
-
-            if (headings.length === 0) {{
-                document.getElementById('toc').style.display = 'none';
-                return;
-            }}
-
-            // 生成目录
-            headings.forEach((heading, index) => {{
-                // 为标题添加 ID
-                const id = 'heading-' + index;
-                heading.id = id;
-
-                // 创建目录项
-                const li = document.createElement('li');
-                li.className = 'toc-item';
-
-                const a = document.createElement('a');
-                a.href = '#' + id;
-                a.className = 'toc-link toc-' + heading.tagName.toLowerCase();
-                a.textContent = heading.textContent;
-
-                // 点击平滑滚动
-                a.addEventListener('click', function(e) {{
-                    e.preventDefault();
-                    heading.scrollIntoView({{ behavior: 'smooth', block: 'start' }});
-                }});
-
-                li.appendChild(a);
-                tocList.appendChild(li);
-            }});
-
-            // 滚动高亮当前章节
-            const tocLinks = document.querySelectorAll('.toc-link');
-
-            function updateActiveLink() {{
-                let currentHeading = null;
-                const scrollPosition = window.scrollY + 150;
-
-                headings.forEach(heading => {{
-                    if (heading.offsetTop <= scrollPosition) {{
-                        currentHeading = heading;
-                    }}
-                }});
-
-                tocLinks.forEach(link => {{
-                    link.classList.remove('active');
-                    if (currentHeading && link.getAttribute('href') === '#' + currentHeading.id) {{
-                        link.classList.add('active');
-                    }}
-                }});
-            }}
-
-            window.addEventListener('scroll', updateActiveLink);
-            updateActiveLink();
-        }});
-
-        // 阅读进度条
-        const progressBar = document.getElementById('reading-progress');
-
-        function updateProgressBar() {{
-            const scrollTop = window.scrollY;
-            const docHeight = document.documentElement.scrollHeight - window.innerHeight;
-            const progress = (scrollTop / docHeight) * 100;
-            progressBar.style.width = Math.min(progress, 100) + '%';
-        }}
-
-        window.addEventListener('scroll', updateProgressBar);
-        updateProgressBar();
-
-        // 返回顶部按钮
-        const backToTop = document.getElementById('back-to-top');
-
-        function toggleBackToTop() {{
-            if (window.scrollY > 400) {{
-                backToTop.classList.add('visible');
-            }} else {{
-                backToTop.classList.remove('visible');
-            }}
-        }}
-
-        backToTop.addEventListener('click', function() {{
-            window.scrollTo({{
-                top: 0,
-                behavior: 'smooth'
-            }});
-        }});
-
-        window.addEventListener('scroll', toggleBackToTop);
-        toggleBackToTop();
-    </script>
-</body>
-</html>"""
-
     # 添加tag_class到article_data
     article_data["tag_class"] = tag_class
-    return template.format(**article_data)
-
-
-def generate_blog_card(article):
-    """生成单个文章卡片 HTML"""
-    # 生成标签HTML
-    tags_data = ",".join(article.get("tags", []))
-    tags_html = ""
-    if article.get("tags"):
-        tags_html = (
-            '<div class="blog-tags">'
-            + "".join(
-                [f'<span class="blog-item-tag">{tag}</span>' for tag in article["tags"]]
-            )
-            + "</div>"
-        )
-
-    return f'''                <article class="blog-card" data-category="{article["category_en"]}" data-tags="{tags_data}">
-                    <div class="blog-tag">{article["category"]}</div>
-                    <h2 class="blog-title">{article["title"]}</h2>
-                    <p class="blog-excerpt">{article["excerpt"]}</p>
-                    {tags_html}
-                    <div class="blog-meta">
-                        <span class="blog-date">{article["date_short"]}</span>
-                        <span class="blog-read">{article["read_time"]}分钟阅读</span>
-                    </div>
-                    <a href="{article["url"]}.html" class="read-more">阅读全文 →</a>
-                </article>
 
-'''
+    # 封面图位于首屏，不延迟加载
+    cover = article_data.get("cover")
+    article_data["cover_html"] = (
+        f'<figure class="article-cover"><img src="{escape_attr(cover)}" '
+        f'alt="{escape_attr(article_data["title"])}" fetchpriority="high"></figure>'
+        if cover
+        else ""
+    )
+    return render_template(
+        "article.html",
+        og_url=article_data["article_url"],
+        canonical_url=article_data["article_url"],
+        **article_data,
+    )
 
 
 def update_blog_html(articles):
-    """更新 blog.html 的文章列表"""
+    """生成文章列表页：blog.html 及分页、分类、标签列表页与 JSON feed（见 blog_pages.py）"""
     try:
-        with open("blog.html", "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # 收集所有唯一标签
-        all_tags = set()
-        for article in articles:
-            for tag in article.get("tags", []):
-                all_tags.add(tag)
-
-        # 生成标签筛选按钮HTML
-        tags_buttons_html = (
-            '<button class="tag-btn active" data-tag="all">全部标签</button>'
-        )
-        for tag in sorted(all_tags):
-            tags_buttons_html += (
-                f'<button class="tag-btn" data-tag="{tag}">{tag}</button>'
-            )
-
-        # 替换标签筛选区域
-        tag_pattern = r'(<div class="tag-filters" id="tagFilters">)(.*?)(</div>)'
-        if re.search(tag_pattern, content, flags=re.DOTALL):
-            content = re.sub(
-                tag_pattern,
-                r"\1\n                " + tags_buttons_html + r"\n            \3",
-                content,
-                flags=re.DOTALL,
-            )
-
-        # 生成所有文章卡片
-        cards_html = "".join([generate_blog_card(article) for article in articles])
-
-        # 替换文章列表部分
-        # 查找 <div class="blog-grid" id="blogGrid"> 到下一个 </div> 之间的内容
-        pattern = r'(<div class="blog-grid" id="blogGrid">)(.*?)(</div>\s*</div>\s*</section>)'
-        replacement = r"\1\n" + cards_html + r"            \3"
-
-        new_content = re.sub(pattern, replacement, content, flags=re.DOTALL)
-
-        with open("blog.html", "w", encoding="utf-8") as f:
-            f.write(new_content)
-
-        print("✅ blog.html 更新成功")
+        build_blog_pages(articles, CATEGORY_MAP)
         return True
     except Exception as e:
-        print(f"❌ 更新 blog.html 失败: {e}")
+        print(f"❌ 生成文章列表页失败: {e}")
         return False
 
 
@@ -933,138 +209,374 @@ def update_index_html(articles):
 
         new_content = re.sub(pattern, replacement, content, flags=re.DOTALL)
 
-        with open("index.html", "w", encoding="utf-8") as f:
-            f.write(new_content)
-
-        print("✅ index.html 更新成功")
+        if write_text("index.html", new_content):
+            print("✅ index.html 更新成功")
+        else:
+            print("✅ index.html 内容未变化")
         return True
     except Exception as e:
         print(f"❌ 更新 index.html 失败: {e}")
         return False
 
 
-def main():
-    """主函数"""
+def build_article_data(page):
+    """从 Notion 页面属性提取文章数据（不含正文），缺少 URL 时返回 None"""
+    properties = page["properties"]
+    title = get_property_value(properties, "标题")
+    category = get_property_value(properties, "分类")
+    tags = get_property_value(properties, "标签")  # 从Notion获取标签(multi_select)
+    date = get_property_value(properties, "发布日期")
+    excerpt = get_property_value(properties, "摘要")
+    read_time = get_property_value(properties, "阅读时间")
+    url = get_property_value(properties, "URL")
+    # 封面：优先使用「封面」属性，其次是页面封面
+    cover_files = properties.get("封面", {}).get("files") or []
+    cover_file = cover_files[0] if cover_files else page.get("cover")
+    cover = file_object_url(cover_file)
+
+    if not url:
+        print(f"⚠️  跳过文章 '{title}': 缺少 URL")
+        return None
+
+    # 格式化日期
+    if date:
+        try:
+            date_obj = datetime.fromisoformat(date.replace("Z", "+00:00"))
+            formatted_date = date_obj.strftime("%Y年%m月%d日")
+            formatted_date_short = date_obj.strftime("%Y-%m-%d")
+        except:
+            formatted_date = datetime.now().strftime("%Y年%m月%d日")
+            formatted_date_short = datetime.now().strftime("%Y-%m-%d")
+    else:
+        formatted_date = datetime.now().strftime("%Y年%m月%d日")
+        formatted_date_short = datetime.now().strftime("%Y-%m-%d")
+
+    # 处理tags - 如果是列表则保持，否则转为空列表
+    tags_list = tags if isinstance(tags, list) else []
+
+    # 生成关键词
+    keywords = (
+        [category] + tags_list + ["计划李", "Kevin", "个人博客", "职业规划", "GCDF"]
+    )
+    keywords_str = ", ".join(keywords)
+
+    # 生成描述
+    description = (excerpt or "暂无摘要")[:160]
+
+    # 生成文章URL
+    article_url = f"https://kev1nl33.github.io/personal-blog/{url}.html"
+
+    return {
+        "title": title,
+        "category": category,
+        "category_en": CATEGORY_MAP.get(category, "personal"),
+        "tags": tags_list,
+        "date": formatted_date,
+        "date_short": formatted_date_short,
+        "excerpt": excerpt or "暂无摘要",
+        "read_time": read_time,
+        "url": url,
+        "content": "",
+        "keywords": keywords_str,
+        "description": description,
+        "article_url": article_url,
+        "cover": cover,
+        "cover_hosted": is_notion_file(cover_file),
+        "page_id": page["id"],
+        "last_edited_time": page.get("last_edited_time", ""),
+        # 正文纯文本（供搜索索引使用），取不到时为 None
+        "text": None,
+    }
+
+
+def iter_pages_content(page_ids, max_workers=NOTION_MAX_WORKERS):
+    """并发获取多个页面的 blocks，按 page_ids 的顺序逐个产出 Future
+
+    所有页面会立即提交到线程池，调用方按顺序取结果时，
+    后面的页面仍在下载，渲染与网络等待得以重叠，而输出顺序保持不变。
+    """
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(get_page_content, page_id) for page_id in page_ids]
+        yield from futures
+
+
+def register_notion_files(file_mirror, page, article_data, nodes):
+    """登记文章引用的 Notion 托管文件：正文图片以 block 为来源，封面以页面为来源"""
+    for node in iter_nodes(nodes, "image"):
+        notion_file = node.attrs.get("notion_file")
+        if notion_file:
+            file_mirror.add(
+                page["id"], notion_file["key"], notion_file["version"], node.attrs["url"]
+            )
+    if article_data.get("cover_hosted"):
+        # 页面编辑时间随正文变化，封面以文件本身（去掉签名的链接）作为版本
+        cover = article_data["cover"]
+        file_mirror.add(page["id"], f"{page['id']}:cover", stable_url(cover), cover)
+
+
+def apply_local_files(converted, local_files):
+    """把已镜像文件的引用替换为本地路径"""
+    for page, article_data, nodes in converted:
+        for node in iter_nodes(nodes, "image"):
+            notion_file = node.attrs.get("notion_file")
+            if notion_file and notion_file["key"] in local_files:
+                node.attrs["url"] = local_files[notion_file["key"]]
+        cover_path = local_files.get(f"{page['id']}:cover")
+        if cover_path:
+            article_data["cover"] = cover_path
+
+
+def content_hash(text):
+    """计算页面内容的 SHA-256 哈希
+
+    资源引用先还原为源文件路径、页面样式区域清空，
+    资源构建与关键 CSS 内联改写页面后不会被视为页面变化。
+    """
+    text = normalize_page_styles(normalize_asset_urls(text))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_hash(path):
+    """计算页面文件的内容哈希（同 content_hash），文件不存在时返回 None"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return content_hash(f.read())
+    except OSError:
+        return None
+
+
+def renderer_fingerprint():
+    """渲染代码的指纹，模板或渲染逻辑变化后旧的输出不再可信"""
+    digest = hashlib.sha256()
+    for path in RENDERER_FILES:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def load_sync_manifest(path=SYNC_MANIFEST_PATH):
+    """读取增量同步状态文件"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    manifest.setdefault("renderer", "")
+    manifest.setdefault("pages", {})
+    return manifest
+
+
+def save_sync_manifest(manifest, path=SYNC_MANIFEST_PATH):
+    """保存增量同步状态文件"""
+    write_json(
+        path,
+        manifest,
+        trailing_newline=True,
+        ensure_ascii=False,
+        indent=2,
+        sort_keys=True,
+    )
+
+
+def is_page_unchanged(entry, page, article_data):
+    """判断页面自上次同步后是否未变化（且输出文件未被改动或删除）"""
+    if not entry:
+        return False
+    output_path = f"{article_data['url']}.html"
+    return (
+        entry.get("last_edited_time") == page.get("last_edited_time")
+        and entry.get("output_path") == output_path
+        and file_hash(output_path) == entry.get("content_hash")
+    )
+
+
+def remove_output(path, manifest_pages):
+    """删除不再对应已发布文章的输出文件（仅限 manifest 中记录的文件）"""
+    in_use = {entry.get("output_path") for entry in manifest_pages.values()}
+    if not path or path in in_use or not os.path.exists(path):
+        return
+    os.remove(path)
+    print(f"  🗑️  已删除: {path}")
+
+
+def restore_previous_output(article_data, entry):
+    """正文获取或渲染失败时沿用上一次同步的输出（URL 与 IR 缓存中的正文）
+
+    文章保留在本次生成的列表、首页与搜索索引中；从未成功同步过的页面返回 False。
+    """
+    output_path = (entry or {}).get("output_path")
+    if not output_path or not os.path.exists(output_path):
+        return False
+    url = output_path[: -len(".html")]
+    article_data["url"] = url
+    article_data["article_url"] = f"https://kev1nl33.github.io/personal-blog/{url}.html"
+    nodes = load_ir_cache(article_data["page_id"], entry.get("last_edited_time", ""))
+    if nodes is not None:
+        article_data["text"] = render_text(nodes)
+    return True
+
+
+def main(full=False):
+    """主函数
+
+    full=True 时忽略增量同步状态，重新抓取并生成所有文章。
+    返回全部已发布文章的数据（供搜索索引与 sitemap 复用），查询失败时返回 None。
+    """
     print("🚀 开始从 Notion 同步文章...")
 
-    # 查询数据库
+    # 分页查询数据库，边接收边提取文章属性，之后再并发抓取发生变化的正文
+    # 任一分页失败都直接返回，避免把未取到的文章当作已取消发布而清理掉
+    pending = []
+    # 查询返回的全部页面：属性提取失败的页面同样视为已发布，保留其输出与同步状态
+    queried_ids = set()
     try:
-        pages = query_database()
-        print(f"📚 找到 {len(pages)} 篇已发布文章")
+        for page in query_database():
+            queried_ids.add(page["id"])
+            try:
+                article_data = build_article_data(page)
+            except Exception as e:
+                print(f"  ❌ 处理文章失败: {e}")
+                continue
+            if article_data:
+                pending.append((page, article_data))
+        print(f"📚 找到 {len(queried_ids)} 篇已发布文章")
     except Exception as e:
         print(f"❌ 查询 Notion 数据库失败: {e}")
         return
 
+    # 离线模式下数据库查询可能来自过期的缓存
+    offline = notion.offline
+    manifest = load_sync_manifest()
+    fingerprint = renderer_fingerprint()
+    if not full and manifest["renderer"] != fingerprint:
+        print("🔧 渲染代码已变化，执行全量重建")
+        full = True
+    entries = manifest["pages"]
+
+    changed_ids = {
+        page["id"]
+        for page, article_data in pending
+        if full or not is_page_unchanged(entries.get(page["id"]), page, article_data)
+    }
+    print(
+        f"🔍 需要更新 {len(changed_ids)} 篇，未变化 {len(pending) - len(changed_ids)} 篇"
+    )
+
     articles = []
 
-    for page in pages:
-        try:
-            # 提取文章信息
-            properties = page["properties"]
-            title = get_property_value(properties, "标题")
-            category = get_property_value(properties, "分类")
-            tags = get_property_value(
-                properties, "标签"
-            )  # 从Notion获取标签(multi_select)
-            date = get_property_value(properties, "发布日期")
-            excerpt = get_property_value(properties, "摘要")
-            read_time = get_property_value(properties, "阅读时间")
-            url = get_property_value(properties, "URL")
-
-            if not url:
-                print(f"⚠️  跳过文章 '{title}': 缺少 URL")
-                continue
+    if changed_ids:
+        print(
+            f"⚡ 并发获取正文（{NOTION_MAX_WORKERS} 线程，限速 {NOTION_RATE_LIMIT} 次/秒）"
+        )
+    futures = iter_pages_content(
+        [page["id"] for page, _ in pending if page["id"] in changed_ids]
+    )
+    # 子 block（嵌套列表、折叠块等）使用单独的线程池并发获取
+    children_executor = ThreadPoolExecutor(max_workers=max(1, NOTION_MAX_WORKERS))
+    converted = []
+
+    for page, article_data in pending:
+        if page["id"] not in changed_ids:
+            nodes = load_ir_cache(page["id"], page.get("last_edited_time", ""))
+            if nodes is not None:
+                article_data["text"] = render_text(nodes)
+            articles.append(article_data)
+            continue
 
-            print(f"📝 处理文章: {title}")
+        future = next(futures)
+        try:
+            print(f"📝 处理文章: {article_data['title']}")
 
             # 获取文章内容
-            blocks = get_page_content(page["id"])
-            content_html = ""
-
-            in_list = False
-            list_type = None
-
-            for block in blocks:
-                block_type = block["type"]
-
-                # 处理列表
-                if block_type in ["bulleted_list_item", "numbered_list_item"]:
-                    if not in_list:
-                        list_type = "ul" if block_type == "bulleted_list_item" else "ol"
-                        content_html += f"<{list_type}>\n"
-                        in_list = True
-                    content_html += block_to_html(block)
-                else:
-                    if in_list:
-                        content_html += f"</{list_type}>\n"
-                        in_list = False
-                    content_html += block_to_html(block)
-
-            if in_list:
-                content_html += f"</{list_type}>\n"
-
-            # 格式化日期
-            if date:
-                try:
-                    date_obj = datetime.fromisoformat(date.replace("Z", "+00:00"))
-                    formatted_date = date_obj.strftime("%Y年%m月%d日")
-                    formatted_date_short = date_obj.strftime("%Y-%m-%d")
-                except:
-                    formatted_date = datetime.now().strftime("%Y年%m月%d日")
-                    formatted_date_short = datetime.now().strftime("%Y-%m-%d")
-            else:
-                formatted_date = datetime.now().strftime("%Y年%m月%d日")
-                formatted_date_short = datetime.now().strftime("%Y-%m-%d")
-
-            # 准备文章数据
-            # 处理tags - 如果是列表则保持，否则转为空列表
-            tags_list = tags if isinstance(tags, list) else []
-
-            # 生成关键词
-            keywords = (
-                [category]
-                + tags_list
-                + ["计划李", "Kevin", "个人博客", "职业规划", "GCDF"]
-            )
-            keywords_str = ", ".join(keywords)
+            blocks = future.result()
+            nodes = blocks_to_ir(blocks, get_page_content, children_executor)
+            converted.append((page, article_data, nodes))
 
-            # 生成描述
-            description = (excerpt or "暂无摘要")[:160]
+        except Exception as e:
+            print(f"  ❌ 处理文章失败: {e}")
+            if restore_previous_output(article_data, entries.get(page["id"])):
+                print(f"  ↩️  沿用上一次的输出: {article_data['url']}.html")
+                articles.append(article_data)
 
-            # 生成文章URL
-            article_url = f"https://kev1nl33.github.io/personal-blog/{url}.html"
+    futures.close()
+    children_executor.shutdown()
 
-            article_data = {
-                "title": title,
-                "category": category,
-                "category_en": CATEGORY_MAP.get(category, "personal"),
-                "tags": tags_list,
-                "date": formatted_date,
-                "date_short": formatted_date_short,
-                "excerpt": excerpt or "暂无摘要",
-                "read_time": read_time,
-                "url": url,
-                "content": content_html,
-                "keywords": keywords_str,
-                "description": description,
-                "article_url": article_url,
-            }
+    # Notion 托管的文件链接会过期：所有文章引用的文件统一镜像到本地后再渲染
+    file_mirror = NotionFileMirror()
+    for page, article_data, nodes in converted:
+        register_notion_files(file_mirror, page, article_data, nodes)
+    apply_local_files(converted, file_mirror.mirror())
 
-            articles.append(article_data)
+    rendered = []
+    for page, article_data, nodes in converted:
+        try:
+            article_data["content"] = render_html(nodes)
+            article_data["text"] = render_text(nodes)
 
+            # 缓存 IR，供 Obsidian 导出与搜索索引复用，无需再次请求 Notion
             # 生成文章 HTML
             article_html = generate_article_html(article_data)
 
-            # 保存文章
-            filename = f"{url}.html"
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(article_html)
-            print(f"  ✅ 已生成: {filename}")
+            save_ir_cache(page["id"], page.get("last_edited_time", ""), nodes)
+
+            articles.append(article_data)
+            rendered.append((page, article_data, article_html))
 
         except Exception as e:
             print(f"  ❌ 处理文章失败: {e}")
+            if restore_previous_output(article_data, entries.get(page["id"])):
+                print(f"  ↩️  沿用上一次的输出: {article_data['url']}.html")
+                articles.append(article_data)
+
+    # 所有文章中的图片一次性生成响应式版本（多进程并行编码），再写入页面
+    images = process_images(
+        url for _, _, article_html in rendered for url in image_sources(article_html)
+    )
+
+    for page, article_data, article_html in rendered:
+        try:
+            article_html = responsive_images(article_html, images)
+
+            # 保存文章
+            filename = f"{article_data['url']}.html"
+            if write_text(filename, article_html):
+                print(f"  ✅ 已生成: {filename}")
+            else:
+                print(f"  ✅ 内容未变化: {filename}")
+
+            # 记录同步状态；URL 变化时删除旧文件
+            old_entry = entries.get(page["id"], {})
+            entries[page["id"]] = {
+                "last_edited_time": page.get("last_edited_time", ""),
+                "content_hash": content_hash(article_html),
+                "output_path": filename,
+            }
+            if not offline and old_entry.get("output_path") not in (None, filename):
+                remove_output(old_entry["output_path"], entries)
+
+        except Exception as e:
+            print(f"  ❌ 保存文章失败: {e}")
             continue
 
+    # 更新的文章在未变化的文章之后才加入，恢复为查询顺序（首页取前几篇作为精选）
+    position = {id(article_data): i for i, (_, article_data) in enumerate(pending)}
+    articles.sort(key=lambda article: position[id(article)])
+
+    if offline:
+        # 离线时的查询结果可能早于上次同步，之后发布的文章不在其中，
+        # 不能据此清理文章或记录同步状态
+        print("📴 离线模式：跳过取消发布清理，不更新同步状态")
+    else:
+        # 清理已取消发布（或已删除）的文章
+        file_mirror.commit({page["id"] for page, _, _ in rendered}, queried_ids)
+        for page_id in [pid for pid in entries if pid not in queried_ids]:
+            removed = entries.pop(page_id)
+            print(f"🧹 文章已取消发布: {removed.get('output_path')}")
+            remove_output(removed.get("output_path"), entries)
+
+        manifest["renderer"] = fingerprint
+        save_sync_manifest(manifest)
+
     if articles:
         # 更新文章列表页
         print("\n📋 更新文章列表...")
@@ -1074,23 +586,40 @@ def main():
         print("🏠 更新首页...")
         update_index_html(articles)
 
-        print(f"\n🎉 同步完成！共生成 {len(articles)} 篇文章")
+        print(
+            f"\n🎉 同步完成！共 {len(articles)} 篇文章，本次生成 {len(changed_ids)} 篇"
+        )
     else:
         print("\n⚠️  没有文章需要同步")
 
+    return articles
 
-def query_coffee_beans():
-    """查询咖啡豆档案数据库"""
-    url = f"https://api.notion.com/v1/databases/{COFFEE_BEANS_DB_ID}/query"
 
-    payload = {
-        "filter": {"property": "已发布", "checkbox": {"equals": True}},
-        "sorts": [{"property": "购买日期", "direction": "descending"}],
-    }
+# ================================
+# 本次运行的数据集缓存
+# ================================
+
+# 数据库 ID -> 已发布页面列表；每个数据库在一次运行中只查询一次，
+# 同步页面、统计数字、主页预览与城市分布都从这里取数据
+DATASET_CACHE = {}
+
+
+def load_dataset(database_id, query):
+    """获取数据库的全部已发布页面，首次调用时查询并缓存，之后直接复用"""
+    if database_id not in DATASET_CACHE:
+        DATASET_CACHE[database_id] = list(query())
+    return DATASET_CACHE[database_id]
 
-    response = requests.post(url, headers=HEADERS, json=payload)
-    response.raise_for_status()
-    return response.json()["results"]
+
+def query_coffee_beans(page_size=100, edited_after=None):
+    """分页查询咖啡豆档案数据库，惰性地逐条产出已发布的条目"""
+    return notion.iter_database(
+        COFFEE_BEANS_DB_ID,
+        filter={"property": "已发布", "checkbox": {"equals": True}},
+        sorts=[{"property": "购买日期", "direction": "descending"}],
+        page_size=page_size,
+        edited_after=edited_after,
+    )
 
 
 def generate_bean_card_html(bean):
@@ -1167,10 +696,10 @@ def update_coffee_beans_html(beans):
 
         new_content = re.sub(pattern, replacement, content, flags=re.DOTALL)
 
-        with open("coffee-beans.html", "w", encoding="utf-8") as f:
-            f.write(new_content)
-
-        print("✅ coffee-beans.html 更新成功")
+        if write_text("coffee-beans.html", new_content):
+            print("✅ coffee-beans.html 更新成功")
+        else:
+            print("✅ coffee-beans.html 内容未变化")
         return True
     except Exception as e:
         print(f"❌ 更新 coffee-beans.html 失败: {e}")
@@ -1185,7 +714,7 @@ def sync_coffee_beans():
     print("\n☕ 开始同步咖啡豆档案...")
 
     try:
-        beans_data = query_coffee_beans()
+        beans_data = load_dataset(COFFEE_BEANS_DB_ID, query_coffee_beans)
         print(f"📦 找到 {len(beans_data)} 款已发布的咖啡豆")
     except Exception as e:
         print(f"❌ 查询咖啡豆档案数据库失败: {e}")
@@ -1231,18 +760,15 @@ def sync_coffee_beans():
         print("\n⚠️  没有咖啡豆需要同步")
 
 
-def query_cafe_visits():
-    """查询探店笔记数据库"""
-    url = f"https://api.notion.com/v1/databases/{CAFE_VISITS_DB_ID}/query"
-
-    payload = {
-        "filter": {"property": "已发布", "checkbox": {"equals": True}},
-        "sorts": [{"property": "访问日期", "direction": "descending"}],
-    }
-
-    response = requests.post(url, headers=HEADERS, json=payload)
-    response.raise_for_status()
-    return response.json()["results"]
+def query_cafe_visits(page_size=100, edited_after=None):
+    """分页查询探店笔记数据库，惰性地逐条产出已发布的条目"""
+    return notion.iter_database(
+        CAFE_VISITS_DB_ID,
+        filter={"property": "已发布", "checkbox": {"equals": True}},
+        sorts=[{"property": "访问日期", "direction": "descending"}],
+        page_size=page_size,
+        edited_after=edited_after,
+    )
 
 
 def generate_shop_card_html(shop):
@@ -1320,10 +846,10 @@ def update_coffee_shops_html(shops):
 
         new_content = re.sub(pattern, replacement, content, flags=re.DOTALL)
 
-        with open("coffee-shops.html", "w", encoding="utf-8") as f:
-            f.write(new_content)
-
-        print("✅ coffee-shops.html 更新成功")
+        if write_text("coffee-shops.html", new_content):
+            print("✅ coffee-shops.html 更新成功")
+        else:
+            print("✅ coffee-shops.html 内容未变化")
         return True
     except Exception as e:
         print(f"❌ 更新 coffee-shops.html 失败: {e}")
@@ -1338,7 +864,7 @@ def sync_cafe_visits():
     print("\n🏪 开始同步探店笔记...")
 
     try:
-        shops_data = query_cafe_visits()
+        shops_data = load_dataset(CAFE_VISITS_DB_ID, query_cafe_visits)
         print(f"📍 找到 {len(shops_data)} 家已发布的咖啡馆")
     except Exception as e:
         print(f"❌ 查询探店笔记数据库失败: {e}")
@@ -1383,18 +909,15 @@ def sync_cafe_visits():
         print("\n⚠️  没有咖啡馆需要同步")
 
 
-def query_brewing_notes():
-    """查询冲煮日记数据库"""
-    url = f"https://api.notion.com/v1/databases/{BREWING_NOTES_DB_ID}/query"
-
-    payload = {
-        "filter": {"property": "已发布", "checkbox": {"equals": True}},
-        "sorts": [{"property": "日期", "direction": "descending"}],
-    }
-
-    response = requests.post(url, headers=HEADERS, json=payload)
-    response.raise_for_status()
-    return response.json()["results"]
+def query_brewing_notes(page_size=100, edited_after=None):
+    """分页查询冲煮日记数据库，惰性地逐条产出已发布的条目"""
+    return notion.iter_database(
+        BREWING_NOTES_DB_ID,
+        filter={"property": "已发布", "checkbox": {"equals": True}},
+        sorts=[{"property": "日期", "direction": "descending"}],
+        page_size=page_size,
+        edited_after=edited_after,
+    )
 
 
 def generate_note_card_html(note):
@@ -1515,10 +1038,10 @@ def update_coffee_notes_html(notes):
 
         new_content = re.sub(pattern, replacement, content, flags=re.DOTALL)
 
-        with open("coffee-notes.html", "w", encoding="utf-8") as f:
-            f.write(new_content)
-
-        print("✅ coffee-notes.html 更新成功")
+        if write_text("coffee-notes.html", new_content):
+            print("✅ coffee-notes.html 更新成功")
+        else:
+            print("✅ coffee-notes.html 内容未变化")
         return True
     except Exception as e:
         print(f"❌ 更新 coffee-notes.html 失败: {e}")
@@ -1533,7 +1056,7 @@ def sync_brewing_notes():
     print("\n📝 开始同步冲煮日记...")
 
     try:
-        notes_data = query_brewing_notes()
+        notes_data = load_dataset(BREWING_NOTES_DB_ID, query_brewing_notes)
         print(f"📖 找到 {len(notes_data)} 条已发布的日记")
     except Exception as e:
         print(f"❌ 查询冲煮日记数据库失败: {e}")
@@ -1610,17 +1133,17 @@ def get_equipment_count():
 def get_coffee_stats():
     """获取咖啡模块统计数据"""
     try:
-        beans_count = len(query_coffee_beans())
+        beans_count = len(load_dataset(COFFEE_BEANS_DB_ID, query_coffee_beans))
     except:
         beans_count = 0
 
     try:
-        cafes_count = len(query_cafe_visits())
+        cafes_count = len(load_dataset(CAFE_VISITS_DB_ID, query_cafe_visits))
     except:
         cafes_count = 0
 
     try:
-        notes_count = len(query_brewing_notes())
+        notes_count = len(load_dataset(BREWING_NOTES_DB_ID, query_brewing_notes))
     except:
         notes_count = 0
 
@@ -1635,7 +1158,7 @@ def get_coffee_stats():
 def get_latest_beans_data(limit=2):
     """获取最新N款豆子的数据"""
     try:
-        beans_data = query_coffee_beans()[:limit]
+        beans_data = load_dataset(COFFEE_BEANS_DB_ID, query_coffee_beans)[:limit]
         beans = []
         for bean_page in beans_data:
             properties = bean_page["properties"]
@@ -1654,7 +1177,7 @@ def get_latest_beans_data(limit=2):
 def get_latest_notes_data(limit=3):
     """获取最新N条日记的数据"""
     try:
-        notes_data = query_brewing_notes()[:limit]
+        notes_data = load_dataset(BREWING_NOTES_DB_ID, query_brewing_notes)[:limit]
         notes = []
         for note_page in notes_data:
             properties = note_page["properties"]
@@ -1683,7 +1206,7 @@ def get_latest_notes_data(limit=3):
 def get_city_distribution():
     """获取探店城市分布"""
     try:
-        shops_data = query_cafe_visits()
+        shops_data = load_dataset(CAFE_VISITS_DB_ID, query_cafe_visits)
         cities = {}
         for shop_page in shops_data:
             properties = shop_page["properties"]
@@ -1815,10 +1338,10 @@ def update_coffee_html():
             flags=re.DOTALL,
         )
 
-        with open("coffee.html", "w", encoding="utf-8") as f:
-            f.write(content)
-
-        print("  ✅ coffee.html 更新成功")
+        if write_text("coffee.html", content):
+            print("  ✅ coffee.html 更新成功")
+        else:
+            print("  ✅ coffee.html 内容未变化")
         return True
     except Exception as e:
         print(f"  ❌ 更新 coffee.html 失败: {e}")
@@ -1828,9 +1351,32 @@ def update_coffee_html():
         return False
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="从 Notion 同步博客文章与咖啡数据")
+    parser.add_argument(
+        "--full", action="store_true", help="忽略增量同步状态，重新生成所有文章"
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="使用本地响应缓存（.cache/），TTL 内的重复请求不再访问 Notion",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="完全离线，只使用本地缓存中的数据渲染页面",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    if args.cache or args.offline:
+        notion.enable_cache(ResponseCache(), offline=args.offline)
+    main(full=args.full)
     sync_coffee_beans()
     sync_cafe_visits()
     sync_brewing_notes()
     update_coffee_html()
+    notion.print_stats()
+    print_write_stats()
@@ -0,0 +1,78 @@
+"""
+轻量模板引擎
+模板文件只解析一次，编译为「静态片段 + 变量插槽」列表，渲染时直接拼接
+
+语法：
+    {{ name }}                       插入变量（按 str() 输出，不做转义）
+    {% include "partials/x.html" %}  编译期内联子模板（独占一行时连同换行一起替换）
+
+模板中的 CSS/JS 花括号无需转义。
+"""
+
+import os
+import re
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+SLOT_PATTERN = re.compile(r"\{\{\s*([A-Za-z_]\w*)\s*\}\}")
+INCLUDE_PATTERN = re.compile(r'\{%\s*include\s+"([^"]+)"\s*%\}\n?')
+
+# 模板名 -> 编译后的 Template，每个模板在一次运行中只解析一次
+_template_cache = {}
+
+
+class Template:
+    """编译后的模板：相邻的静态文本已合并为一个字符串"""
+
+    __slots__ = ("name", "parts", "slots")
+
+    def __init__(self, name, source):
+        self.name = name
+        # parts 中偶数位是静态文本，奇数位是变量名
+        self.parts = []
+        pos = 0
+        for match in SLOT_PATTERN.finditer(source):
+            self.parts.append(source[pos : match.start()])
+            self.parts.append(match.group(1))
+            pos = match.end()
+        self.parts.append(source[pos:])
+        self.slots = frozenset(self.parts[1::2])
+
+    def render(self, **context):
+        """渲染模板，缺少变量时抛出 KeyError"""
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = str(context[parts[i]])
+        return "".join(parts)
+
+
+def _load_source(name, template_dir, stack=()):
+    """读取模板源码并递归展开 include"""
+    if name in stack:
+        raise ValueError(f"模板循环引用: {' -> '.join(stack + (name,))}")
+    with open(os.path.join(template_dir, name), "r", encoding="utf-8") as f:
+        source = f.read()
+    return INCLUDE_PATTERN.sub(
+        lambda m: _load_source(m.group(1), template_dir, stack + (name,)), source
+    )
+
+
+def get_template(name, template_dir=TEMPLATE_DIR):
+    """获取编译后的模板（带缓存）"""
+    key = (template_dir, name)
+    if key not in _template_cache:
+        _template_cache[key] = Template(name, _load_source(name, template_dir))
+    return _template_cache[key]
+
+
+def render_template(name, **context):
+    """渲染 templates/ 下的模板"""
+    return get_template(name).render(**context)
+
+
+def template_files(template_dir=TEMPLATE_DIR):
+    """列出模板目录下的所有文件（用于计算渲染指纹）"""
+    paths = []
+    for root, _, files in os.walk(template_dir):
+        paths.extend(os.path.join(root, f) for f in files)
+    return sorted(paths)